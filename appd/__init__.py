@@ -8,6 +8,16 @@ __version__ = '0.4.5'
 __author__ = 'Todd Radel <tradel@appdynamics.com>'
 
 from . import model
+from . import pool
+from . import retry
+from . import ratelimit
+from . import cache
+from . import singleflight
+from . import stream
+from . import decoder
+from . import crawler
+from . import metric_index
+from . import poller
 from . import request
 from . import cmdline
 from . import time
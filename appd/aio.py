@@ -0,0 +1,410 @@
+"""
+This module contains an :mod:`asyncio` flavour of the AppDynamics REST API client. It requires Python 3.7 or
+later and the optional :mod:`aiohttp` package (``pip install AppDynamicsREST[async]``).
+"""
+
+from __future__ import print_function
+
+import asyncio
+import contextvars
+import sys
+
+import aiohttp
+
+from appd.cache import ResponseCache
+from appd.crawler import Expansion, MetricTreeCrawler, start_node
+from appd.metric_index import BatchPlan, MetricPathIndex
+from appd.pool import PoolStats
+from appd.request import AppDynamicsClient
+from appd.stream import JsonArrayParser
+from appd.time import split_time_range
+from appd.model.metric_data import MetricData, MetricDataSingle
+from appd.model.metric_treenode import MetricTreeNodes
+
+
+class AsyncSingleFlight(object):
+    """
+    Version of :class:`SingleFlight <appd.singleflight.SingleFlight>` for coroutines running in one event loop.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self.shared = 0
+
+    async def do(self, key, func, *args, **kwargs):
+        """
+        Awaits ``func(*args, **kwargs)``, unless a call with the same key is already running, in which case
+        its result is returned instead.
+
+        :param key: Hashable key identifying the call.
+        :param func: Coroutine function to call.
+        :returns: The result of the coroutine.
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self.shared += 1
+        else:
+            future = self._calls[key] = asyncio.ensure_future(func(*args, **kwargs))
+            future.add_done_callback(lambda f: self._calls.pop(key, None))
+        # Shield the shared call, so that one waiter being cancelled does not cancel it for the others.
+        return await asyncio.shield(future)
+
+
+class AsyncAppDynamicsClient(AppDynamicsClient):
+    """
+    Asynchronous version of :class:`AppDynamicsClient <appd.request.AppDynamicsClient>`. It offers exactly the
+    same methods, but every ``get_*`` method is a coroutine, so many requests can be in flight at once
+    from a single event loop:
+
+    >>> async with AsyncAppDynamicsClient(...) as c:
+    ...     apps = await c.get_applications()
+    ...     all_nodes = await asyncio.gather(*[c.get_nodes(app.id) for app in apps])
+
+    Responses are parsed by the same model classes as the synchronous client.
+    """
+
+    def __init__(self, base_url='http://localhost:8090', username='user1', password='welcome',
+                 account='customer1', debug=False, limit=100, retry_policy=None, rate_limiter=None,
+                 cache=None, coalesce=True, json_decoder=None):
+        """
+        Creates a new instance of the client.
+
+        :param base_url: URL of your controller.
+        :type base_url: str.
+        :param username: User name to authenticate to the controller with.
+        :type username: str.
+        :param password: Password for authentication to the controller.
+        :type password: str.
+        :param account: Account name for multi-tenant controllers. For single-tenant controllers, use
+                        the default value of "customer1".
+        :param debug: Set to :const:`True` to print extra debugging information to :const:`sys.stdout`.
+        :type debug: bool.
+        :param limit: Maximum number of simultaneous connections to the controller.
+        :type limit: int.
+        :param retry_policy: Policy for retrying requests that fail because the controller is busy or
+                             unreachable. If :const:`None`, failed requests are not retried.
+        :type retry_policy: appd.retry.RetryPolicy
+        :param rate_limiter: Limits the rate at which requests are sent to the controller. If :const:`None`,
+                             requests are sent as fast as possible.
+        :type rate_limiter: appd.ratelimit.RateLimiter
+        :param cache: Cache for slowly changing metadata, like the lists of tiers and nodes. If :const:`None`,
+                      every request is sent to the controller.
+        :type cache: appd.cache.ResponseCache
+        :param coalesce: If :const:`True`, coroutines that make the same GET request at the same time share a
+                         single call to the controller.
+        :type coalesce: bool.
+        :param json_decoder: Name of the JSON decoder to use (see :data:`appd.decoder.BACKENDS`), or a function
+                             that decodes a :class:`bytes` document. If :const:`None`, the fastest decoder
+                             installed is used.
+        :type json_decoder: str.
+        """
+        super(AsyncAppDynamicsClient, self).__init__(base_url, username, password, account, debug,
+                                                     retry_policy=retry_policy, rate_limiter=rate_limiter,
+                                                     cache=cache, coalesce=coalesce, json_decoder=json_decoder)
+        self._limit = limit
+        self._stats = PoolStats()
+        self._retries = contextvars.ContextVar('retries', default=0)
+
+    @staticmethod
+    def _new_flights():
+        return AsyncSingleFlight()
+
+    @property
+    def pool_stats(self):
+        """
+        Statistics about the connections opened to the controller. ``waited`` counts the requests that had to
+        wait because ``limit`` connections were already in use.
+
+        :rtype: appd.pool.PoolStats
+        """
+        return self._stats
+
+    @property
+    def last_retries(self):
+        """
+        Number of times the most recent request made by the current task had to be retried.
+
+        :rtype: int
+        """
+        return self._retries.get()
+
+    def _trace_config(self):
+        stats, trace = self._stats, aiohttp.TraceConfig()
+
+        async def opened(session, context, params):
+            stats._incr('requests')
+            stats._incr('opened')
+
+        async def reused(session, context, params):
+            stats._incr('requests')
+
+        async def waited(session, context, params):
+            stats._incr('waited')
+
+        trace.on_connection_create_end.append(opened)
+        trace.on_connection_reuseconn.append(reused)
+        trace.on_connection_queued_start.append(waited)
+        return trace
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def _get_session(self):
+        if not self._session:
+            connector = aiohttp.TCPConnector(limit=self._limit)
+            self._session = aiohttp.ClientSession(connector=connector, trace_configs=[self._trace_config()])
+        return self._session
+
+    async def close(self):
+        """
+        Closes the underlying HTTP session and releases its connections.
+        """
+        if self._session:
+            await self._session.close()
+            self._session = None
+
+    async def fan_out(self, func, apps, max_workers=100, return_exceptions=False, **kwargs):
+        """
+        Asynchronous version of :meth:`AppDynamicsClient.fan_out <appd.request.AppDynamicsClient.fan_out>`.
+        It is an async generator, so use it with :keyword:`async for`:
+
+        >>> async for app, nodes in c.fan_out(c.get_nodes, await c.get_applications()):
+        ...     print(app.name, len(nodes))
+
+        :param func: Coroutine method of this client that accepts an ``app_id`` argument.
+        :param apps: Application ID's, or :class:`Application <appd.model.Application>` objects.
+        :param int max_workers: Maximum number of requests to run at the same time.
+        :param bool return_exceptions: If :const:`True`, an exception raised by a call is yielded in place
+          of its result. If :const:`False`, the first exception is raised and the remaining calls are cancelled.
+        :param kwargs: Additional keyword arguments to pass to :data:`func` on every call.
+        :returns: An async generator of ``(app, result)`` tuples.
+        """
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def call(app):
+            async with semaphore:
+                try:
+                    return app, await func(app_id=getattr(app, 'id', app), **kwargs)
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    return app, e
+
+        tasks = [asyncio.ensure_future(call(app)) for app in apps]
+        try:
+            for task in asyncio.as_completed(tasks):
+                yield await task
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def get_metrics_range(self, metric_path, start_time, end_time, app_id=None, frequency='ONE_MIN',
+                                window_mins=None, max_workers=100):
+        """
+        Asynchronous version of :meth:`AppDynamicsClient.get_metrics_range
+        <appd.request.AppDynamicsClient.get_metrics_range>`.
+        """
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def call(window):
+            async with semaphore:
+                return await self.get_metrics(metric_path, app_id, 'BETWEEN_TIMES', None, window[0], window[1],
+                                              False)
+
+        windows = split_time_range(start_time, end_time, frequency, window_mins)
+        parts = await asyncio.gather(*[call(w) for w in windows])
+        return MetricData.stitch(parts)
+
+    async def get_metrics_batch(self, paths, app_id=None, time_range_type='BEFORE_NOW', duration_in_mins=15,
+                                start_time=None, end_time=None, rollup=True, max_workers=100, index=None,
+                                min_merge=2):
+        """
+        Asynchronous version of :meth:`AppDynamicsClient.get_metrics_batch
+        <appd.request.AppDynamicsClient.get_metrics_batch>`.
+        """
+        plan = BatchPlan(paths, index, min_merge)
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def call(query):
+            async with semaphore:
+                return await self.get_metrics(query, app_id, time_range_type, duration_in_mins, start_time,
+                                              end_time, rollup)
+
+        results = await asyncio.gather(*[call(q) for q in plan.queries])
+        return self._merge_batch(plan, results)
+
+    async def crawl_metric_tree(self, app_id=None, metric_path=None, max_depth=None, include=None, exclude=None,
+                                max_workers=100, progress=None):
+        """
+        Asynchronous version of :meth:`AppDynamicsClient.crawl_metric_tree
+        <appd.request.AppDynamicsClient.crawl_metric_tree>`.
+        """
+        crawler = MetricTreeCrawler(self, app_id, max_workers, max_depth, include, exclude, progress)
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def fetch(parent):
+            async with semaphore:
+                return crawler.keep_wanted(parent, await self._get_metric_tree(app_id, parent=parent))
+
+        top = await fetch(start_node(metric_path))
+        expansion = Expansion(crawler, [x for x in top if x.type == 'folder'])
+        while expansion.folders:
+            for future in asyncio.as_completed([fetch(x) for x in expansion.folders]):
+                expansion.add(await future)
+            expansion.next_level()
+        return top
+
+    async def get_metric_index(self, app_id=None, metric_path=None, include=None, exclude=None, max_workers=100):
+        """
+        Asynchronous version of :meth:`AppDynamicsClient.get_metric_index
+        <appd.request.AppDynamicsClient.get_metric_index>`.
+        """
+        return MetricPathIndex.from_tree(await self.crawl_metric_tree(app_id, metric_path, include=include,
+                                                                      exclude=exclude, max_workers=max_workers))
+
+    async def request(self, path, params=None, method='GET', json=True):
+        self._retries.set(0)
+        url, params = self._prepare_request(path, params, json)
+
+        key, ttl, entry = self._cache_lookup(method, url, params, json)
+        if entry is not None:
+            if entry.is_fresh:
+                return entry.value
+            if self.cache.can_serve_stale(entry):
+                self._start_revalidation(method, url, params, key, ttl, entry)
+                return entry.value
+
+        # A shared call runs in a task of its own, so its retry count is handed back rather than set there.
+        if self._flights is not None and method == 'GET':
+            value, retries = await self._flights.do(ResponseCache.key(url, params) + (json,), self._fetch,
+                                                    method, url, params, json, key, ttl, entry)
+        else:
+            value, retries = await self._fetch(method, url, params, json, key, ttl, entry)
+        self._retries.set(retries)
+        return value
+
+    @staticmethod
+    def _query_params(params):
+        # aiohttp only accepts strings and numbers as query values, so mimic how requests renders the rest.
+        return dict((k, v if isinstance(v, (str, int, float)) and not isinstance(v, bool) else str(v))
+                    for k, v in params.items())
+
+    async def _send(self, method, url, params, headers=None):
+        # Counterpart of AppDynamicsClient._send. The response is returned unread, together with the number of
+        # retries it took, and the caller must release it.
+        params = self._query_params(params)
+        auth = aiohttp.BasicAuth(*self._auth)
+
+        policy, attempt = self.retry_policy, 0
+        while True:
+            if policy:
+                policy.check()
+            if self.rate_limiter:
+                wait = self.rate_limiter.reserve(url)
+                if wait:
+                    await asyncio.sleep(wait)
+            try:
+                r = await self._get_session().request(method, url, auth=auth, params=params, headers=headers)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if not policy:
+                    raise
+                policy.record(error=e)
+                if not policy.should_retry(method, attempt, error=e):
+                    raise
+                wait = policy.delay(attempt)
+            else:
+                if not policy:
+                    return r, attempt
+                policy.record(status=r.status)
+                if not policy.should_retry(method, attempt, status=r.status):
+                    return r, attempt
+                wait = policy.delay(attempt, r.headers.get('Retry-After'))
+                r.release()
+            if self.debug:
+                print('Retrying ' + url, 'in %.1f seconds' % wait)
+            await asyncio.sleep(wait)
+            attempt += 1
+
+    async def _fetch(self, method, url, params, json, key=None, ttl=None, entry=None):
+        r, attempt = await self._send(method, url, params, entry.validators if entry is not None else None)
+        try:
+            if r.status == 304 and entry is not None:
+                self.cache.touch(key, entry)
+                return entry.value, attempt
+            if r.status != 200:
+                print(url, file=sys.stderr)
+                r.raise_for_status()
+            if not json:
+                return await r.text(), attempt
+            value = self._decode(await r.read())
+        finally:
+            r.release()
+        if ttl:
+            self.cache.set(key, value, ttl, r.headers.get('ETag'), r.headers.get('Last-Modified'))
+        return value, attempt
+
+    def _start_revalidation(self, method, url, params, key, ttl, entry):
+        # Keeping the task also stops it from being garbage collected before it has finished.
+        if key not in self._revalidating:
+            self._revalidating[key] = asyncio.ensure_future(self._revalidate(method, url, params, key, ttl, entry))
+
+    async def _revalidate(self, method, url, params, key, ttl, entry):
+        try:
+            await self._fetch(method, url, params, True, key, ttl, entry)
+        except Exception as e:
+            if self.debug:
+                print('Failed to refresh ' + url, e)
+        finally:
+            self._revalidating.pop(key, None)
+
+    async def iter_metrics(self, metric_path, app_id=None, time_range_type='BEFORE_NOW',
+                           duration_in_mins=15, start_time=None, end_time=None, rollup=True, chunk_size=65536):
+        """
+        Asynchronous version of :meth:`AppDynamicsClient.iter_metrics
+        <appd.request.AppDynamicsClient.iter_metrics>`. It is an async generator, so use it with
+        :keyword:`async for`.
+        """
+        params = self._validate_time_range(time_range_type, duration_in_mins, start_time, end_time)
+        params.update({'metric-path': metric_path,
+                       'rollup': rollup})
+        url, params = self._prepare_request(self._app_path(app_id, '/metric-data'), params)
+
+        parser = JsonArrayParser()
+        r, retries = await self._send('GET', url, params)
+        self._retries.set(retries)
+        try:
+            if r.status != 200:
+                print(url, file=sys.stderr)
+                r.raise_for_status()
+            async for chunk in r.content.iter_chunked(chunk_size):
+                for item in parser.feed(chunk):
+                    yield MetricDataSingle.from_json(item)
+        finally:
+            r.release()
+        for item in parser.close():
+            yield MetricDataSingle.from_json(item)
+
+    async def _get_metric_tree(self, app_id=None, parent=None, recurse=False):
+        params = {}
+        if parent:
+            params['metric-path'] = parent.path
+        path = self._app_path(app_id, '/metrics')
+        nodes = MetricTreeNodes.from_json(await self.request(path, params), parent)
+        if recurse:
+            await asyncio.gather(*[self._get_metric_tree(app_id, parent=node, recurse=True)
+                                   for node in nodes if node.type == 'folder'])
+        return nodes
+
+    async def _top_request(self, cls, path):
+        return cls.from_json(await self.request('/controller/rest' + path))
+
+    async def _app_request(self, cls, path, app_id=None, params=None, lazy=False):
+        path = self._app_path(app_id, path)
+        data = await self.request(path, params)
+        return cls.from_json(data, lazy=True) if lazy else cls.from_json(data)
+
+    async def _v2_request(self, cls, path, params=None):
+        return cls.from_json(await self.request('/api' + path, params))
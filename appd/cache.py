@@ -0,0 +1,287 @@
+"""
+Response caching for the AppDynamics REST API client.
+"""
+
+import contextlib
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+
+from collections import OrderedDict
+
+
+class CacheEntry(object):
+    """
+    A cached response body, together with the time it was stored and the validators the controller sent
+    with it.
+    """
+
+    def __init__(self, value, ttl, stored_at=None, etag=None, last_modified=None):
+        self.value, self.ttl, self.etag, self.last_modified = value, ttl, etag, last_modified
+        self.stored_at = stored_at if stored_at is not None else time.time()
+
+    @property
+    def age(self):
+        return time.time() - self.stored_at
+
+    @property
+    def is_fresh(self):
+        return self.age < self.ttl
+
+    @property
+    def validators(self):
+        """
+        Headers that make a request conditional on the entry having changed.
+
+        :rtype: dict
+        """
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache(object):
+    """
+    In-memory cache of decoded controller responses, for metadata that changes slowly, like the lists of
+    applications, tiers, nodes and business transactions. Only endpoints with a TTL are cached. Entries
+    expire after their TTL, and the least recently used entries are evicted when the cache is full:
+
+    >>> cache = ResponseCache(max_size=500, ttls={r'/nodes$': 60})
+    >>> c = AppDynamicsClient(..., cache=cache)
+    >>> c.get_nodes(10)                  # sent to the controller
+    >>> c.get_nodes(10)                  # served from the cache
+    >>> cache.invalidate('/nodes')       # forget all cached node lists
+
+    An expired entry is not thrown away. For up to :data:`stale_while_revalidate` seconds after it expires,
+    it is still returned, while the client refreshes it in the background. After that, the client asks the
+    controller for a new copy with ``If-None-Match``/``If-Modified-Since`` headers, if the controller sent an
+    ``ETag`` or ``Last-Modified`` header with the original, so an unchanged response costs no download.
+
+    A cache can be shared by several clients, as long as they connect to the same controller as the same user.
+    """
+
+    DEFAULT_TTLS = {
+        r'/controller/rest/configuration$': 300,
+        r'/controller/rest/applications$': 300,
+        r'/tiers$': 300,
+        r'/nodes(/[^/]+)?$': 300,
+        r'/business-transactions$': 300,
+    }
+
+    def __init__(self, max_size=1000, ttls=None, stale_while_revalidate=0):
+        """
+        :param int max_size: Maximum number of responses to keep.
+        :param dict ttls: Map of regular expression to the number of seconds that responses from matching
+          URL paths stay fresh. Merged with :data:`DEFAULT_TTLS`, and checked before it. Use a TTL of zero or
+          :const:`None` to disable caching for an endpoint.
+        :param float stale_while_revalidate: Number of seconds after expiry during which an entry may still be
+          returned while it is refreshed in the background.
+        """
+        self.max_size, self.stale_while_revalidate = max_size, stale_while_revalidate
+        self.ttls = dict(self.DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        # Check the caller's patterns before the defaults, so they can carve exceptions out of them.
+        order = list(ttls or {}) + [k for k in self.DEFAULT_TTLS if k not in (ttls or {})]
+        self._patterns = [(re.compile(k), self.ttls[k]) for k in order]
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits, self.stale_hits, self.misses, self.revalidations, self.evictions = 0, 0, 0, 0, 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl_for(self, url):
+        """
+        :param str url: Request URL.
+        :returns: Number of seconds to cache responses from this URL, or :const:`None` if they should not be
+          cached.
+        """
+        path = url.split('://', 1)[-1].partition('/')[2]
+        for pattern, ttl in self._patterns:
+            if pattern.search('/' + path):
+                return ttl or None
+        return None
+
+    @staticmethod
+    def key(url, params):
+        """
+        Builds the cache key for a request.
+
+        :param str url: Request URL.
+        :param dict params: Query string parameters.
+        :rtype: tuple
+        """
+        return url, tuple(sorted((k, str(v)) for k, v in (params or {}).items()))
+
+    def can_serve_stale(self, entry):
+        """
+        :param CacheEntry entry: An expired entry.
+        :returns: :const:`True` if the entry may be returned while it is being refreshed.
+        """
+        return entry.age < entry.ttl + self.stale_while_revalidate
+
+    def lookup(self, key):
+        """
+        Finds the entry for a key, whether or not it has expired, and counts it as a hit, stale hit or miss.
+
+        :param key: Key built by :meth:`key`.
+        :rtype: CacheEntry
+        """
+        entry = self._load(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            elif entry.is_fresh:
+                self.hits += 1
+            elif self.can_serve_stale(entry):
+                self.stale_hits += 1
+            else:
+                self.misses += 1
+        return entry
+
+    def get(self, key):
+        """
+        :param key: Key built by :meth:`key`.
+        :returns: The cached value, or :const:`None` if there is no fresh entry for the key.
+        """
+        entry = self.lookup(key)
+        return entry.value if entry is not None and entry.is_fresh else None
+
+    def set(self, key, value, ttl, etag=None, last_modified=None):
+        """
+        :param key: Key built by :meth:`key`.
+        :param value: Decoded response body.
+        :param float ttl: Number of seconds the entry stays fresh.
+        :param str etag: Value of the response's ``ETag`` header.
+        :param str last_modified: Value of the response's ``Last-Modified`` header.
+        """
+        self._store(key, CacheEntry(value, ttl, etag=etag, last_modified=last_modified))
+
+    def touch(self, key, entry):
+        """
+        Marks an entry as fresh again, after the controller has confirmed it has not changed.
+
+        :param key: Key built by :meth:`key`.
+        :param CacheEntry entry: The entry that was revalidated.
+        """
+        with self._lock:
+            self.revalidations += 1
+        entry.stored_at = time.time()
+        self._store(key, entry)
+
+    def invalidate(self, fragment=None):
+        """
+        Removes entries from the cache.
+
+        :param str fragment: Only remove entries whose URL contains this string. If :const:`None`, empty the
+          whole cache.
+        """
+        with self._lock:
+            if fragment is None:
+                self._entries.clear()
+                return
+            for key in [k for k in self._entries if fragment in k[0]]:
+                del self._entries[key]
+
+    def _load(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._entries[key] = entry
+            return entry
+
+    def _store(self, key, entry):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def __str__(self):
+        return '<{0}[{1}]: hits={2}, stale_hits={3}, misses={4}, revalidations={5}, evictions={6}>'.format(
+            self.__class__.__name__, len(self), self.hits, self.stale_hits, self.misses, self.revalidations,
+            self.evictions)
+
+    __repr__ = __str__
+
+
+class SQLiteCache(ResponseCache):
+    """
+    Persistent version of :class:`ResponseCache` that keeps compressed responses in an SQLite database, so
+    that short-lived scripts can reuse metadata downloaded by earlier runs. Several processes can use the
+    same database file at once:
+
+    >>> cache = SQLiteCache(os.path.expanduser('~/.appd_cache.db'), stale_while_revalidate=3600)
+    >>> c = AppDynamicsClient(..., cache=cache)
+    """
+
+    def __init__(self, path, max_size=10000, ttls=None, stale_while_revalidate=0):
+        """
+        :param str path: Database file. It is created if it does not exist.
+        :param int max_size: Maximum number of responses to keep.
+        :param dict ttls: Map of regular expression to TTL, as for :class:`ResponseCache`.
+        :param float stale_while_revalidate: Grace period after expiry, as for :class:`ResponseCache`.
+        """
+        super(SQLiteCache, self).__init__(max_size, ttls, stale_while_revalidate)
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        with self._db() as db:
+            db.execute('CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, url TEXT, body BLOB, '
+                       'ttl REAL, stored_at REAL, used_at REAL, etag TEXT, last_modified TEXT)')
+            db.execute('CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)')
+
+    @contextlib.contextmanager
+    def _db(self):
+        # Every thread shares one connection, so they take turns to use it, one transaction at a time.
+        with self._db_lock:
+            with self._conn as db:
+                yield db
+
+    def close(self):
+        """
+        Closes the database connection. The cache cannot be used after this.
+        """
+        with self._db_lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._db() as db:
+            return db.execute('SELECT COUNT(*) FROM responses').fetchone()[0]
+
+    def _load(self, key):
+        db_key = json.dumps(key)
+        with self._db() as db:
+            row = db.execute('SELECT body, ttl, stored_at, etag, last_modified FROM responses WHERE key = ?',
+                             (db_key,)).fetchone()
+            if row is None:
+                return None
+            db.execute('UPDATE responses SET used_at = ? WHERE key = ?', (time.time(), db_key))
+        body, ttl, stored_at, etag, last_modified = row
+        return CacheEntry(json.loads(zlib.decompress(body).decode('utf-8')), ttl, stored_at, etag, last_modified)
+
+    def _store(self, key, entry):
+        body = zlib.compress(json.dumps(entry.value).encode('utf-8'))
+        with self._db() as db:
+            db.execute('INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                       (json.dumps(key), key[0], sqlite3.Binary(body), entry.ttl, entry.stored_at, time.time(),
+                        entry.etag, entry.last_modified))
+            evicted = db.execute('DELETE FROM responses WHERE key IN (SELECT key FROM responses '
+                                 'ORDER BY used_at DESC LIMIT -1 OFFSET ?)', (self.max_size,)).rowcount
+        if evicted > 0:
+            with self._lock:
+                self.evictions += evicted
+
+    def invalidate(self, fragment=None):
+        with self._db() as db:
+            if fragment is None:
+                db.execute('DELETE FROM responses')
+            else:
+                db.execute("DELETE FROM responses WHERE instr(url, ?) > 0", (fragment,))
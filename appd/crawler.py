@@ -0,0 +1,329 @@
+"""
+Breadth-first, concurrent crawling of the metric browser tree.
+"""
+
+import gzip
+import json
+import time
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fnmatch import fnmatchcase
+
+from appd.model.metric_treenode import MetricTreeNode, MetricTreeNodes
+
+
+def _split(path):
+    return path.split('|') if path else []
+
+
+def _prefix_match(pattern_parts, path_parts):
+    n = min(len(pattern_parts), len(path_parts))
+    return all(fnmatchcase(path_parts[i], pattern_parts[i]) for i in range(n))
+
+
+class MetricTreeCrawler(object):
+    """
+    Retrieves the metric tree one level at a time, fetching all the folders on a level concurrently, instead of
+    walking it depth-first with one request at a time like :meth:`get_metric_tree
+    <appd.request.AppDynamicsClient.get_metric_tree>`.
+
+    Patterns are metric paths whose components may contain glob wildcards (``*``, ``?``, ``[abc]``). Each
+    component of a pattern is matched against the component at the same depth of a node's path:
+
+    * If :data:`include` patterns are given, a folder is only expanded if it lies on the way to, or inside, a
+      path matching one of them, and a leaf is only kept if it lies inside one.
+    * A node matching the start of an :data:`exclude` pattern is dropped, together with everything below it.
+
+    >>> crawler = MetricTreeCrawler(c, app_id=10, max_workers=16,
+    ...                             include=['Business Transaction Performance|Business Transactions|*|*'],
+    ...                             exclude=['*|*|*|_APPDYNAMICS_DEFAULT_TX_'])
+    >>> tree = crawler.crawl()
+    """
+
+    def __init__(self, client, app_id=None, max_workers=8, max_depth=None, include=None, exclude=None,
+                 progress=None):
+        """
+        :param appd.request.AppDynamicsClient client: Client used to send requests.
+        :param int app_id: Application ID to crawl. If :const:`None`, the client's `app_id` property is used.
+        :param int max_workers: Maximum number of folders to retrieve at the same time.
+        :param int max_depth: Number of levels below the starting point to retrieve. If :const:`None`, retrieve
+          the whole tree.
+        :param include: Patterns of paths to retrieve. If :const:`None`, retrieve everything.
+        :param exclude: Patterns of paths to skip.
+        :param progress: Function called as ``progress(done, pending)`` after each folder is retrieved, where
+          :data:`done` is the number of folders retrieved so far and :data:`pending` the number known but not
+          yet retrieved.
+        """
+        self.client, self.app_id, self.max_workers, self.max_depth = client, app_id, max_workers, max_depth
+        self.include = [_split(x) for x in include or []]
+        self.exclude = [_split(x) for x in exclude or []]
+        self.progress = progress
+
+    def wanted(self, node):
+        """
+        Applies the :data:`include` and :data:`exclude` patterns to a node.
+
+        :param appd.model.MetricTreeNode node: Node to check.
+        :returns: :const:`True` if the node should be kept.
+        :rtype: bool
+        """
+        parts = _split(node.path)
+        if any(len(p) <= len(parts) and _prefix_match(p, parts) for p in self.exclude):
+            return False
+        if not self.include:
+            return True
+        if node.type == 'folder':
+            return any(_prefix_match(p, parts) for p in self.include)
+        return any(len(p) <= len(parts) and _prefix_match(p, parts) for p in self.include)
+
+    def keep_wanted(self, parent, nodes):
+        """
+        Records that a folder has just been retrieved, and drops the nodes in it that :meth:`wanted` rejects.
+
+        :param appd.model.MetricTreeNode parent: Folder that was retrieved, or :const:`None` for the root.
+        :param nodes: Nodes the controller returned for the folder.
+        :rtype: appd.model.MetricTreeNodes
+        """
+        if parent:
+            parent.fetched_at = time.time()
+        return MetricTreeNodes([x for x in nodes if self.wanted(x)], parent)
+
+    def _fetch(self, parent):
+        return self.keep_wanted(parent, self.client._get_metric_tree(self.app_id, parent=parent))
+
+    def crawl(self, metric_path=None):
+        """
+        Retrieves the tree.
+
+        :param str metric_path: Point in the metric tree to start from. If :const:`None`, start at the root.
+        :returns: The nodes at the starting point, with their descendants available through
+          :attr:`MetricTreeNode.children <appd.model.MetricTreeNode.children>`.
+        :rtype: appd.model.MetricTreeNodes
+        """
+        top = self._fetch(start_node(metric_path))
+        self.expand([x for x in top if x.type == 'folder'])
+        return top
+
+    def expand(self, folders, depth=1):
+        """
+        Retrieves the descendants of some folders, breadth-first.
+
+        :param folders: Folder nodes to expand.
+        :param int depth: Depth of :data:`folders` below the starting point of the crawl.
+        """
+        expansion = Expansion(self, folders, depth)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while expansion.folders:
+                for future in as_completed([executor.submit(self._fetch, x) for x in expansion.folders]):
+                    expansion.add(future.result())
+                expansion.next_level()
+
+    def snapshot(self, metric_path=None):
+        """
+        Crawls the tree and wraps the result in a :class:`MetricTreeSnapshot`, which can be saved to disk and
+        brought up to date later with :meth:`refresh`.
+
+        :param str metric_path: Point in the metric tree to start from. If :const:`None`, start at the root.
+        :rtype: MetricTreeSnapshot
+        """
+        fetched_at = time.time()
+        return MetricTreeSnapshot(self.crawl(metric_path), self.app_id, metric_path, fetched_at)
+
+    def refresh(self, snapshot, ttl):
+        """
+        Brings a snapshot up to date. Only folders retrieved more than :data:`ttl` seconds ago are retrieved
+        again. When a folder's contents have changed, new subfolders are crawled, and the subtrees of
+        deleted nodes are dropped; the subtrees of nodes that are still there are kept and checked in the
+        same way.
+
+        :param MetricTreeSnapshot snapshot: Snapshot to refresh. It is updated in place.
+        :param float ttl: Maximum age of a folder's contents, in seconds.
+        :returns: A tuple of two sorted lists: the paths of the nodes that were added, and of those removed,
+          including everything below them.
+        :rtype: tuple
+        """
+        added, removed = [], []
+        now = time.time()
+
+        def stale(fetched_at):
+            return fetched_at is None or now - fetched_at >= ttl
+
+        def merge(old_nodes, new_nodes, parent):
+            old = dict((x.name, x) for x in old_nodes)
+            merged = []
+            for node in new_nodes:
+                kept = old.pop(node.name, None)
+                if kept is not None and kept.type == node.type:
+                    merged.append(kept)
+                else:
+                    added.append(node.path)
+                    merged.append(node)
+                    if kept is not None:
+                        old[node.name] = kept
+            for node in old.values():
+                removed.extend(_subtree_paths(node))
+            return MetricTreeNodes(merged, parent)
+
+        if stale(snapshot.fetched_at):
+            root, old = snapshot.nodes.parent, snapshot.nodes
+            snapshot.nodes = merge(old, self._fetch(root), root)
+            snapshot.fetched_at = now
+
+        folders, depth = [x for x in snapshot.nodes if x.type == 'folder'], 1
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while folders and (self.max_depth is None or depth < self.max_depth):
+                to_fetch = [x for x in folders if stale(x.fetched_at)]
+                # Fetching a folder replaces its children, so hold on to the old ones to merge them back in.
+                cached = [x.children for x in to_fetch]
+                for folder, old, fresh in zip(to_fetch, cached, executor.map(self._fetch, to_fetch)):
+                    merge(old, fresh, folder)
+                folders = [child for x in folders for child in x.children if child.type == 'folder']
+                depth += 1
+
+        return sorted(added), sorted(removed)
+
+
+def start_node(metric_path):
+    """
+    :param str metric_path: Point in the metric tree to start a crawl from, or :const:`None` for the root.
+    :returns: A folder node for the path, or :const:`None` for the root.
+    :rtype: appd.model.MetricTreeNode
+    """
+    return MetricTreeNode(parent=None, node_name=metric_path, node_type='folder') if metric_path else None
+
+
+class Expansion(object):
+    """
+    Bookkeeping for expanding a tree one level at a time: which folders to retrieve next, where to stop, and
+    what to report to the crawler's ``progress`` function. It does not retrieve anything itself, so that
+    :meth:`MetricTreeCrawler.expand` and the asynchronous client can share it:
+
+    >>> expansion = Expansion(crawler, folders)
+    >>> while expansion.folders:
+    ...     for nodes in fetch_all(expansion.folders):
+    ...         expansion.add(nodes)
+    ...     expansion.next_level()
+    """
+
+    def __init__(self, crawler, folders, depth=1):
+        """
+        :param MetricTreeCrawler crawler: Crawler whose ``max_depth`` and ``progress`` apply.
+        :param folders: Folder nodes to expand.
+        :param int depth: Depth of :data:`folders` below the starting point of the crawl.
+        """
+        self.crawler, self.depth, self.done = crawler, depth, 0
+        self.folders = list(folders) if self._expands(depth) else []
+        self._next, self._fetched = [], 0
+
+    def _expands(self, depth):
+        return self.crawler.max_depth is None or depth < self.crawler.max_depth
+
+    def add(self, nodes):
+        """
+        Takes in the contents of one of the current :attr:`folders`, in whatever order they arrive.
+
+        :param nodes: Wanted nodes of the folder, as returned by :meth:`MetricTreeCrawler.keep_wanted`.
+        """
+        self._next.extend(x for x in nodes if x.type == 'folder')
+        self.done, self._fetched = self.done + 1, self._fetched + 1
+        if self.crawler.progress:
+            pending = len(self.folders) - self._fetched + (len(self._next) if self._expands(self.depth + 1) else 0)
+            self.crawler.progress(self.done, pending)
+
+    def next_level(self):
+        """
+        Moves on to the subfolders of the current :attr:`folders`, once all of them have been added. :attr:`folders`
+        is empty when there is nothing left to retrieve.
+        """
+        self.depth += 1
+        self.folders = self._next if self._expands(self.depth) else []
+        self._next, self._fetched = [], 0
+
+
+def _subtree_paths(node):
+    paths, stack = [], [node]
+    while stack:
+        n = stack.pop()
+        paths.append(n.path)
+        stack.extend(n.children)
+    return paths
+
+
+class MetricTreeSnapshot(object):
+    """
+    A crawled metric tree that can be saved to a file and loaded again, so that later runs only have to
+    retrieve the parts of the tree that have changed:
+
+    >>> crawler = MetricTreeCrawler(c, app_id=10)
+    >>> try:
+    ...     snapshot = MetricTreeSnapshot.load('tree.json.gz')
+    ...     added, removed = crawler.refresh(snapshot, ttl=24 * 3600)
+    ... except IOError:
+    ...     snapshot = crawler.snapshot()
+    >>> snapshot.save('tree.json.gz')
+
+    Files whose name ends in ``.gz`` are compressed.
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, nodes, app_id=None, metric_path=None, fetched_at=None):
+        """
+        :param appd.model.MetricTreeNodes nodes: Nodes at the top of the crawled tree.
+        :param int app_id: Application the tree belongs to.
+        :param str metric_path: Point in the metric tree the crawl started from, or :const:`None` for the root.
+        :param float fetched_at: Time the top level of the tree was retrieved.
+        """
+        self.nodes, self.app_id, self.metric_path, self.fetched_at = nodes, app_id, metric_path, fetched_at
+
+    def paths(self):
+        """
+        :returns: The paths of all the nodes in the tree, folders as well as leaves.
+        :rtype: list
+        """
+        return [p for node in self.nodes for p in _subtree_paths(node)]
+
+    @staticmethod
+    def _open(path, mode):
+        return gzip.open(path, mode) if path.endswith('.gz') else open(path, mode)
+
+    def save(self, path):
+        """
+        Writes the snapshot to a file.
+
+        :param str path: File name.
+        """
+        def encode(node):
+            return [node.name, node.type, node.fetched_at, [encode(x) for x in node.children]]
+
+        doc = {'version': self.FORMAT_VERSION, 'app_id': self.app_id, 'metric_path': self.metric_path,
+               'fetched_at': self.fetched_at, 'nodes': [encode(x) for x in self.nodes]}
+        with self._open(path, 'wb') as f:
+            f.write(json.dumps(doc, separators=(',', ':')).encode('utf-8'))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Reads a snapshot written by :meth:`save`.
+
+        :param str path: File name.
+        :rtype: MetricTreeSnapshot
+        :raises ValueError: if the file was written by an incompatible version of this library.
+        """
+        with cls._open(path, 'rb') as f:
+            doc = json.loads(f.read().decode('utf-8'))
+        if doc.get('version') != cls.FORMAT_VERSION:
+            raise ValueError('unsupported metric tree snapshot version: {0}'.format(doc.get('version')))
+
+        def decode(items, parent):
+            nodes = MetricTreeNodes(parent=parent)
+            for name, node_type, fetched_at, children in items:
+                node = MetricTreeNode(parent=None, node_name=name, node_type=node_type)
+                node.parent, node.fetched_at = parent, fetched_at
+                node._children = decode(children, node)
+                nodes.append(node)
+            return nodes
+
+        metric_path = doc['metric_path']
+        root = MetricTreeNode(parent=None, node_name=metric_path, node_type='folder') if metric_path else None
+        return cls(decode(doc['nodes'], root), doc['app_id'], metric_path, doc['fetched_at'])
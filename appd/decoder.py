@@ -0,0 +1,72 @@
+"""
+Pluggable JSON decoding for controller responses.
+
+The standard library's :mod:`json` module always works, but decoding large responses with it can take
+longer than downloading them. If one of the optional packages ``orjson``, ``ujson`` or ``pysimdjson`` is
+installed, the fastest one available is used instead. All of them decode straight from the raw response bytes.
+"""
+
+import json
+
+
+def _json_loads(raw):
+    if isinstance(raw, bytes):
+        raw = raw.decode('utf-8')
+    return json.loads(raw)
+
+
+def _load_orjson():
+    import orjson
+    return orjson.loads
+
+
+def _load_ujson():
+    import ujson
+    return ujson.loads
+
+
+def _load_simdjson():
+    import simdjson
+    return simdjson.loads
+
+
+BACKENDS = (('orjson', _load_orjson),
+            ('simdjson', _load_simdjson),
+            ('ujson', _load_ujson),
+            ('json', lambda: _json_loads))
+"""
+Supported decoders, fastest first.
+"""
+
+
+def available_decoders():
+    """
+    :returns: Names of the decoders that can be used in this environment, fastest first.
+    :rtype: list
+    """
+    names = []
+    for name, loader in BACKENDS:
+        try:
+            loader()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def get_decoder(name=None):
+    """
+    Looks up a decoding function.
+
+    :param str name: One of the names in :data:`BACKENDS`. If :const:`None`, the fastest available decoder
+      is returned.
+    :returns: A function that takes a :class:`bytes` or :class:`str` JSON document and returns the decoded value.
+    :raises ValueError: if the name is not a known decoder.
+    :raises ImportError: if the package needed by the named decoder is not installed.
+    """
+    loaders = dict(BACKENDS)
+    if name is not None:
+        if name not in loaders:
+            raise ValueError('decoder must be one of: ' + ', '.join(loaders))
+        return loaders[name]()
+    return loaders[available_decoders()[0]]()
@@ -0,0 +1,244 @@
+"""
+Local index of metric paths, for expanding wildcards without asking the controller.
+"""
+
+import re
+
+from collections import OrderedDict
+from fnmatch import fnmatchcase
+
+
+class _TrieNode(object):
+
+    __slots__ = ('children', 'leaf')
+
+    def __init__(self):
+        self.children, self.leaf = {}, False
+
+
+def _is_wildcard(component):
+    return '*' in component
+
+
+def _unique(items):
+    seen = set()
+    return [x for x in items if not (x in seen or seen.add(x))]
+
+
+def path_matches(pattern, path):
+    """
+    :param str pattern: Metric path, which may contain ``*`` wildcards.
+    :param str path: Full metric path.
+    :returns: :const:`True` if the path matches the pattern, component by component.
+    :rtype: bool
+    """
+    pattern_parts, path_parts = pattern.split('|'), path.split('|')
+    return len(pattern_parts) == len(path_parts) and \
+        all(p == q or _is_wildcard(p) and fnmatchcase(q, p) for p, q in zip(pattern_parts, path_parts))
+
+
+class MetricPathIndex(object):
+    """
+    Prefix tree of the metric paths in an application, built from a metric tree that has already been
+    retrieved. It answers wildcard queries locally, and can break a wildcard that would make the controller
+    scan a huge part of the tree into a list of narrower queries:
+
+    >>> index = MetricPathIndex.from_tree(c.crawl_metric_tree(10))
+    >>> index.match('Backends|*|Calls per Minute')
+    ['Backends|DB|Calls per Minute', 'Backends|Cache|Calls per Minute']
+    >>> index.plan('Application Infrastructure Performance|*|Individual Nodes|*|*', max_queries=20)
+    ['Application Infrastructure Performance|Web|Individual Nodes|*|*', ...]
+
+    As in the controller, a ``*`` in a pattern matches any part of a single path component, so ``*`` matches
+    a whole component and ``Calls*`` matches ``Calls per Minute``. Only leaves are returned.
+
+    The index only knows the paths that were in the tree when it was built, so rebuild it, or
+    :meth:`refresh <appd.crawler.MetricTreeCrawler.refresh>` the tree it came from, to pick up new metrics.
+    """
+
+    def __init__(self, paths=None):
+        """
+        :param paths: Full metric paths of leaves to add to the index.
+        """
+        self._root = _TrieNode()
+        self._size = 0
+        for path in paths or []:
+            self.add(path)
+
+    @classmethod
+    def from_tree(cls, nodes):
+        """
+        Builds an index from a retrieved metric tree.
+
+        :param nodes: A :class:`MetricTreeNodes <appd.model.MetricTreeNodes>` list, a
+          :class:`CompactMetricTree <appd.model.metric_treenode.CompactMetricTree>`, or a
+          :class:`MetricTreeSnapshot <appd.crawler.MetricTreeSnapshot>`.
+        :rtype: MetricPathIndex
+        """
+        if hasattr(nodes, 'roots'):
+            nodes = nodes.roots()
+        nodes = getattr(nodes, 'nodes', nodes)
+
+        index = cls()
+        # The top of a partial tree may have a parent folder that was never retrieved itself.
+        parent = getattr(nodes, 'parent', None)
+        start = index._insert(parent.path.split('|'), False) if parent else index._root
+        stack = [(start, x) for x in nodes]
+        while stack:
+            trie, node = stack.pop()
+            child = trie.children.get(node.name)
+            if child is None:
+                child = trie.children[node.name] = _TrieNode()
+            if node.type == 'leaf' and not child.leaf:
+                child.leaf = True
+                index._size += 1
+            stack.extend((child, x) for x in node.children)
+        return index
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, path):
+        node = self._find(path.split('|'))
+        return node is not None and node.leaf
+
+    def _insert(self, parts, leaf):
+        node = self._root
+        for part in parts:
+            child = node.children.get(part)
+            if child is None:
+                child = node.children[part] = _TrieNode()
+            node = child
+        if leaf and not node.leaf:
+            node.leaf = True
+            self._size += 1
+        return node
+
+    def _find(self, parts):
+        node = self._root
+        for part in parts:
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def add(self, path):
+        """
+        Adds the path of a leaf to the index.
+
+        :param str path: Full metric path.
+        """
+        self._insert(path.split('|'), True)
+
+    def _expand(self, entries, component):
+        # entries is a list of (path components, trie node) pairs.
+        if not _is_wildcard(component):
+            return [(parts + [component], node.children[component])
+                    for parts, node in entries if component in node.children]
+        matched = []
+        for parts, node in entries:
+            matched.extend((parts + [name], child) for name, child in node.children.items()
+                           if component == '*' or fnmatchcase(name, component))
+        return matched
+
+    def match(self, pattern):
+        """
+        Finds the leaves matching a metric path pattern.
+
+        :param str pattern: Metric path, which may contain ``*`` wildcards.
+        :returns: Sorted list of full metric paths.
+        :rtype: list
+        """
+        entries = [([], self._root)]
+        for component in pattern.split('|'):
+            entries = self._expand(entries, component)
+        return sorted('|'.join(parts) for parts, node in entries if node.leaf)
+
+    def search(self, regex):
+        """
+        Finds the leaves whose full path matches a regular expression.
+
+        :param regex: Regular expression, as a string or compiled pattern. It is matched with
+          :meth:`re.search`, so anchor it with ``^`` and ``$`` to match whole paths.
+        :returns: Sorted list of full metric paths.
+        :rtype: list
+        """
+        regex = re.compile(regex) if not hasattr(regex, 'search') else regex
+        found = []
+        stack = [(name, child) for name, child in self._root.children.items()]
+        while stack:
+            path, node = stack.pop()
+            if node.leaf and regex.search(path):
+                found.append(path)
+            stack.extend((path + '|' + name, child) for name, child in node.children.items())
+        return sorted(found)
+
+    def plan(self, pattern, max_queries=50):
+        """
+        Rewrites a wildcard pattern as a list of narrower patterns that together match the same metrics.
+        Wildcards are replaced with the names found in the index from left to right, for as long as the
+        number of patterns stays within :data:`max_queries`. If every wildcard can be replaced, the result is
+        a list of concrete metric paths.
+
+        Components of the pattern that are not in the index at all are dropped from the plan, so a pattern
+        that matches nothing gives an empty list.
+
+        :param str pattern: Metric path, which may contain ``*`` wildcards.
+        :param int max_queries: Maximum number of patterns to return.
+        :returns: Sorted list of metric path patterns.
+        :rtype: list
+        """
+        components = pattern.split('|')
+        entries = [([], self._root)]
+        for i, component in enumerate(components):
+            expanded = self._expand(entries, component)
+            if len(expanded) > max_queries:
+                return sorted('|'.join(parts + components[i:]) for parts, node in entries)
+            entries = expanded
+        return sorted('|'.join(parts) for parts, node in entries if node.leaf)
+
+
+class BatchPlan(object):
+    """
+    Works out the fewest metric data queries needed to retrieve a list of metric paths. Duplicate paths are
+    dropped, and concrete paths that share a parent folder are fetched together with one ``parent|*``
+    query. If an index is given, wildcard paths are first narrowed with :meth:`MetricPathIndex.plan`.
+
+    Merged queries can return metrics that were not asked for, so use :meth:`wanted` to filter the results.
+    """
+
+    def __init__(self, paths, index=None, min_merge=2, max_queries=50):
+        """
+        :param paths: Metric paths or patterns to retrieve.
+        :param MetricPathIndex index: Index used to narrow wildcard patterns. If :const:`None`, patterns are
+          sent as they are.
+        :param int min_merge: Minimum number of paths in the same folder to fetch them with a wildcard query.
+        :param int max_queries: Maximum number of queries to expand each wildcard pattern into.
+        """
+        self.paths = _unique(paths)
+        exact, patterns = [], []
+        for path in self.paths:
+            expanded = index.plan(path, max_queries) if index is not None and _is_wildcard(path) else [path]
+            for x in expanded:
+                (patterns if _is_wildcard(x) else exact).append(x)
+
+        folders = OrderedDict()
+        for path in exact:
+            folders.setdefault(path.rpartition('|')[0], []).append(path)
+        queries = list(patterns)
+        for folder, members in folders.items():
+            if folder and len(members) >= min_merge:
+                queries.append(folder + '|*')
+            else:
+                queries.extend(members)
+
+        self.queries = _unique(queries)
+        self._exact, self._patterns = set(exact), _unique(patterns)
+
+    def wanted(self, path):
+        """
+        :param str path: Full metric path of a retrieved metric.
+        :returns: :const:`True` if the metric was asked for.
+        :rtype: bool
+        """
+        return path in self._exact or any(path_matches(p, path) for p in self._patterns)
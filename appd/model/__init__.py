@@ -5,35 +5,226 @@ Model classes for AppDynamics REST API
 """
 
 
+import keyword
+import operator
+import threading
+
+import six
 from six.moves import UserList
 from appd.time import from_ts
+from appd.model.aggregate import group_by
+from appd.model.query import Query
 from datetime import datetime
 
 
-def _filter_func(obj, pred):
-    def func():
-        return obj.__class__([item for item in obj.data])
+class InternTable(object):
+    """
+    Table of shared string objects. Collections of thousands of model objects repeat the same few tier names,
+    machine names, agent versions and so on, and :meth:`intern` lets all the objects point at one copy of each
+    string instead of keeping their own.
 
-    return func
+    Unlike :func:`sys.intern`, the table has a size limit, so that fields with many distinct values cannot
+    make it grow without bound. Once it is full, new strings are returned as they are, and the ones already
+    in it are still shared. It can be emptied with :meth:`clear`.
+    """
+
+    def __init__(self, max_size=100000):
+        """
+        :param int max_size: Maximum number of strings to keep.
+        """
+        self.max_size = max_size
+        self._strings = {}
+
+    def __len__(self):
+        return len(self._strings)
+
+    def intern(self, value):
+        """
+        :param value: String to look up. Other values, such as :const:`None`, are returned unchanged.
+        :returns: The copy of the string in the table.
+        """
+        try:
+            return self._strings[value]
+        except (KeyError, TypeError):
+            if isinstance(value, six.string_types) and len(self._strings) < self.max_size:
+                self._strings[value] = value
+            return value
+
+    def clear(self):
+        self._strings.clear()
+
+
+STRINGS = InternTable()
+"""
+Intern table used for the :attr:`JsonObject.INTERNED` fields of every model class.
+"""
+
+
+def _compile_assigner(fields, interned=()):
+    # Generates a function that copies every field from a JSON dict with one plain assignment each, instead of
+    # looping over FIELDS and calling __setattr__ for every object.
+    lines = ['def _assign_fields(obj, json_dict):']
+    for k, v in sorted(fields.items()):
+        value = 'json_dict[{0!r}]'.format(v or k)
+        if k in interned:
+            value = '_intern({0})'.format(value)
+        if keyword.iskeyword(k):
+            lines.append('    setattr(obj, {0!r}, {1})'.format(k, value))
+        else:
+            lines.append('    obj.{0} = {1}'.format(k, value))
+    lines.append('    return obj')
+    namespace = {'_intern': STRINGS.intern}
+    exec('\n'.join(lines), namespace)
+    return namespace['_assign_fields']
+
+
+class _JsonObjectMeta(type):
+    """
+    Gives every model class :data:`__slots__` for its fields, and a generated :meth:`_assign_fields`
+    function, when the class is created.
+    """
+
+    def __new__(mcs, name, bases, namespace):
+        fields = namespace.get('FIELDS', None)
+        if fields is None:
+            fields = next((b.FIELDS for b in bases if hasattr(b, 'FIELDS')), {})
+        declared = namespace.get('__slots__', ())
+        declared = (declared,) if isinstance(declared, six.string_types) else tuple(declared)
+
+        inherited = set()
+        for base in bases:
+            for c in base.__mro__:
+                inherited.update(c.__dict__.get('__slots__', ()))
+
+        def is_property(k):
+            attr = namespace.get(k, None)
+            if attr is None:
+                attr = next((getattr(b, k) for b in bases if hasattr(b, k)), None)
+            return isinstance(attr, property)
 
+        slots = []
+        for k in list(declared) + sorted(fields):
+            if k not in inherited and k not in slots and not is_property(k):
+                slots.append(k)
+        namespace['__slots__'] = tuple(slots)
 
+        cls = super(_JsonObjectMeta, mcs).__new__(mcs, name, bases, namespace)
+        cls._assign_fields = staticmethod(_compile_assigner(cls.FIELDS, cls.INTERNED))
+        return cls
+
+
+_HYDRATE_LOCK = threading.RLock()
+
+
+@six.add_metaclass(_JsonObjectMeta)
 class JsonObject(object):
+    """
+    Base class of the model objects. Each subclass lists the attributes it reads from the JSON returned by the
+    controller in :data:`FIELDS`, a map of attribute name to JSON key (or ``''`` if they are the same).
+
+    Model classes use :data:`__slots__` to keep their instances small. The fields in :data:`FIELDS` are added
+    to a class's slots automatically, so only other attributes set in :meth:`__init__` need to be declared.
+    A class that should accept arbitrary extra attributes can add ``'__dict__'`` to its slots.
+
+    An object built by :meth:`from_json_lazy` keeps the JSON dict it came from, and only copies a field out of
+    it the first time the field is read. Reading any other attribute that has not been set yet builds the rest
+    of the object, as :meth:`from_json` would have, keeping any values already assigned. Lazy objects can be
+    read from several threads: an attribute only ever goes from unset to its final value.
+    """
+
+    __slots__ = ('_json',)
 
     FIELDS = {}
 
+    INTERNED = ()
+    """
+    Fields whose values repeat across many objects, such as tier names. Their strings are shared through
+    :data:`STRINGS` when objects are built from JSON. The table is shared by the whole process and keeps what
+    it holds, so do not list fields with many distinct values, like URLs, which would fill it up.
+    """
+
     @classmethod
     def _set_fields_from_json_dict(cls, obj, json_dict):
-        for k, v in list(obj.FIELDS.items()):
-            obj.__setattr__(k, json_dict[v or k])
+        obj.__class__._assign_fields(obj, json_dict)
 
     @classmethod
     def from_json(cls, json_dict):
-        obj = cls()
+        # Skip __init__, which would set every field to a default only for it to be overwritten.
+        obj = cls.__new__(cls)
+        obj._init_state()
         cls._set_fields_from_json_dict(obj, json_dict)
         return obj
 
+    def _init_state(self):
+        """
+        Sets the attributes that are not read from the JSON to their defaults. :meth:`from_json` calls this
+        instead of :meth:`__init__`, so classes with attributes that are not in :data:`FIELDS` must override it.
+        """
+        pass
+
+    @classmethod
+    def from_json_lazy(cls, json_dict):
+        """
+        Wraps a JSON dict without copying any fields out of it yet.
+
+        :param dict json_dict: Decoded JSON object.
+        """
+        obj = cls.__new__(cls)
+        obj._json = json_dict
+        return obj
+
+    def __getattr__(self, name):
+        # Only called for attributes that have not been set. Unset slots of an eagerly built object, and
+        # special methods looked up by copy or pickle, are not lazy.
+        if name == '_json' or name.startswith('__'):
+            raise AttributeError(name)
+        try:
+            json_dict = self._json
+        except AttributeError:
+            # Another thread may have finished building the object since the attribute was looked up.
+            return object.__getattribute__(self, name)
+        key = self.FIELDS.get(name)
+        if key is not None and not isinstance(getattr(self.__class__, name, None), property):
+            value = json_dict[key or name]
+            if name in self.INTERNED:
+                value = STRINGS.intern(value)
+            setattr(self, name, value)
+            return value
+        self._hydrate()
+        return getattr(self, name)
+
+    def _hydrate(self):
+        # Build a complete copy and only fill in what is missing, so other threads never see a field reset to
+        # its default. The lock stops two threads from building the same object at once.
+        with _HYDRATE_LOCK:
+            try:
+                json_dict = object.__getattribute__(self, '_json')
+            except AttributeError:
+                return
+            assigned = set(name for name, value in self._attributes())
+            for name, value in self.from_json(json_dict)._attributes():
+                if name not in assigned:
+                    setattr(self, name, value)
+            del self._json
+
+    def _attributes(self):
+        names = []
+        for c in reversed(self.__class__.__mro__):
+            names.extend(x for x in c.__dict__.get('__slots__', ()) if x not in ('__dict__', '_json'))
+        # Look slots up without going through __getattr__, so that listing a lazy object's attributes does
+        # not build it.
+        values = []
+        for x in names:
+            try:
+                values.append((x, object.__getattribute__(self, x)))
+            except AttributeError:
+                pass
+        return values + list(getattr(self, '__dict__', {}).items())
+
     def __str__(self):
-        rep = ', '.join([x + '=' + repr(y) for x, y in list(self.__dict__.items())])
+        if hasattr(self, '_json'):
+            self._hydrate()
+        rep = ', '.join([x + '=' + repr(y) for x, y in self._attributes()])
         return '<{0}: {1}>'.format(self.__class__.__name__, rep)
 
     __repr__ = __str__
@@ -45,12 +236,73 @@ class JsonObject(object):
         self.__setattr__(attr_name, new_val)
 
 
+class _LazyData(list):
+    """
+    List of decoded JSON dicts that turns each one into a lazy model object the first time it is read.
+    """
+
+    def __init__(self, object_type, items):
+        super(_LazyData, self).__init__(items)
+        self._object_type = object_type
+
+    def _get(self, i):
+        item = list.__getitem__(self, i)
+        if isinstance(item, dict):
+            with _HYDRATE_LOCK:
+                item = list.__getitem__(self, i)
+                if isinstance(item, dict):
+                    item = self._object_type.from_json_lazy(item)
+                    list.__setitem__(self, i, item)
+        return item
+
+    def _wrap_all(self):
+        for i in range(len(self)):
+            self._get(i)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._get(j) for j in range(*i.indices(len(self)))]
+        return self._get(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._get(i)
+
+    def __reversed__(self):
+        for i in reversed(range(len(self))):
+            yield self._get(i)
+
+
+def _wrapping(method):
+    def func(self, *args, **kwargs):
+        self._wrap_all()
+        return method(self, *args, **kwargs)
+    func.__name__ = method.__name__
+    return func
+
+
+# List methods implemented in C read the items directly, so make sure they see model objects.
+for _name in ('__contains__', '__eq__', '__ne__', '__add__', '__mul__', '__lt__', '__le__', '__gt__', '__ge__',
+              'index', 'count', 'remove', 'pop', 'sort', 'copy'):
+    if hasattr(list, _name):
+        setattr(_LazyData, _name, _wrapping(getattr(list, _name)))
+
+
 class JsonList(UserList):
+    """
+    Base class of the model collections. Lookups by attribute value, like :meth:`Nodes.by_tier_id
+    <appd.model.node.Nodes.by_tier_id>`, use hash indexes that are built the first time they are needed and
+    thrown away when the collection is changed, so a lookup takes constant time instead of scanning the list.
+    Changing an attribute of an item does not update the indexes; call :meth:`invalidate_indexes` after doing
+    that.
+    """
 
     OBJECT_TYPE = None
 
     def __init__(self, cls, initial_list=None):
         UserList.__init__(self)
+        self._object_type = cls
+        self._indexes, self._indexed = {}, None
         if initial_list:
             for item in initial_list:
                 if isinstance(item, cls):
@@ -59,10 +311,96 @@ class JsonList(UserList):
                     self.data.append(cls.from_json(item))
 
     @classmethod
-    def from_json(cls, json_list):
-        return cls(json_list)
+    def from_json(cls, json_list, lazy=False):
+        """
+        Builds a collection from a decoded JSON list.
+
+        :param list json_list: Decoded JSON objects.
+        :param bool lazy: If :const:`True`, keep the JSON objects, and only build a model object when an item is
+          read, with its fields copied out on first access (see :meth:`JsonObject.from_json_lazy`). This saves
+          time when only a few attributes of each item are used, especially for objects with many fields, like
+          snapshots. The JSON objects are kept for as long as the collection.
+        """
+        if not lazy:
+            return cls(json_list)
+        obj = cls()
+        obj.data = _LazyData(obj._object_type, json_list)
+        return obj
 
     def __str__(self):
         rep = ', '.join([str(x) for x in self.data])
         return '<{0}[{1}]: {2}>'.format(self.__class__.__name__, len(self.data), rep)
 
+    def query(self):
+        """
+        Starts a query over the items, to filter, sort and project them without a new request to the
+        controller. See :class:`appd.model.query.Query`.
+
+        >>> nodes.query().where(F('tier_name') == 'Web').order_by('name').all()
+
+        :rtype: appd.model.query.Query
+        """
+        return Query(self)
+
+    def group_by(self, keys, **columns):
+        """
+        Groups the items by one or more keys and aggregates each group in a single pass. See
+        :func:`appd.model.aggregate.group_by`.
+
+        >>> nodes.group_by(['tier_name', 'type'], nodes=Count(), hosts=CountDistinct('machine_id'))
+
+        :param keys: Attribute name or key function, or a list of them.
+        :param columns: :class:`Aggregate <appd.model.aggregate.Aggregate>` or :class:`Derived
+          <appd.model.aggregate.Derived>` instances, by column name.
+        :rtype: collections.OrderedDict
+        """
+        return group_by(self.data, keys, **columns)
+
+    def invalidate_indexes(self):
+        """
+        Throws away the lookup indexes, so they are rebuilt on the next lookup.
+        """
+        self._indexes, self._indexed = {}, None
+
+    def _index(self, *fields):
+        # Also catch changes made to self.data directly, rather than through the list methods.
+        state = (id(self.data), len(self.data))
+        if self._indexed != state:
+            self._indexes, self._indexed = {}, state
+        index = self._indexes.get(fields)
+        if index is None:
+            index = self._indexes[fields] = {}
+            key = operator.attrgetter(*fields)
+            for item in self.data:
+                index.setdefault(key(item), []).append(item)
+        return index
+
+    def _lookup(self, fields, value):
+        """
+        :param fields: Attribute name, or tuple of attribute names.
+        :param value: Value to look for, or tuple of values if there is more than one attribute.
+        :returns: The items with that value, in order. Do not change the list.
+        :rtype: list
+        """
+        return self._index(*(fields if isinstance(fields, tuple) else (fields,))).get(value, [])
+
+    def _first(self, fields, value):
+        found = self._lookup(fields, value)
+        if not found:
+            raise KeyError(value)
+        return found[0]
+
+
+def _invalidating(method):
+    def func(self, *args, **kwargs):
+        self._indexes, self._indexed = {}, None
+        return method(self, *args, **kwargs)
+    func.__name__ = method.__name__
+    return func
+
+
+for _name in ('__setitem__', '__delitem__', '__iadd__', '__imul__', 'append', 'insert', 'pop', 'remove', 'clear',
+              'extend', 'sort', 'reverse'):
+    if hasattr(UserList, _name):
+        setattr(JsonList, _name, _invalidating(getattr(UserList, _name)))
+
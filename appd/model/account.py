@@ -47,8 +47,4 @@ class Accounts(JsonList):
         :returns: First account with the correct name
         :rtype: Account
         """
-        found = [x for x in self.data if x.name == name]
-        try:
-            return found[0]
-        except IndexError:
-            raise KeyError(name)
+        return self._first('name', name)
@@ -0,0 +1,202 @@
+"""
+Grouping and aggregation of model collections.
+
+.. moduleauthor:: Todd Radel <tradel@appdynamics.com>
+"""
+
+import itertools
+import operator
+
+from collections import OrderedDict
+
+
+def _getter(field, is_dict):
+    """
+    :param field: Attribute name, or a function taking an item and returning a value.
+    :param bool is_dict: :const:`True` if the items are dicts rather than objects.
+    :returns: A function that reads the field from an item.
+    """
+    if callable(field):
+        return field
+    return operator.itemgetter(field) if is_dict else operator.attrgetter(field)
+
+
+class Aggregate(object):
+    """
+    Base class of the aggregate functions accepted by :func:`group_by`. Each group keeps one accumulator,
+    which :meth:`add` updates with every item in the group, and :meth:`result` turns into the final value.
+    """
+
+    def __init__(self, field=None):
+        """
+        :param field: Attribute to aggregate, or a function computing the value from an item.
+        """
+        self.field = field
+        self.get = None
+
+    def bind(self, is_dict):
+        if self.field is not None:
+            self.get = _getter(self.field, is_dict)
+
+    def start(self):
+        return None
+
+    def add(self, acc, item):
+        raise NotImplementedError
+
+    def result(self, acc):
+        return acc
+
+
+class Count(Aggregate):
+    """
+    Number of items in the group or, if a field is given, number of items where it is not :const:`None`.
+    """
+
+    def start(self):
+        return 0
+
+    def add(self, acc, item):
+        return acc + 1 if self.get is None or self.get(item) is not None else acc
+
+
+class Sum(Aggregate):
+    """
+    Sum of a field, skipping :const:`None` values.
+    """
+
+    def start(self):
+        return 0
+
+    def add(self, acc, item):
+        value = self.get(item)
+        return acc if value is None else acc + value
+
+
+class CountDistinct(Aggregate):
+    """
+    Number of different values of a field, not counting :const:`None`.
+    """
+
+    def start(self):
+        return set()
+
+    def add(self, acc, item):
+        acc.add(self.get(item))
+        return acc
+
+    def result(self, acc):
+        acc.discard(None)
+        return len(acc)
+
+
+class Min(Aggregate):
+    """
+    Smallest value of a field, skipping :const:`None` values.
+    """
+
+    def add(self, acc, item):
+        value = self.get(item)
+        return value if acc is None or (value is not None and value < acc) else acc
+
+
+class Max(Aggregate):
+    """
+    Largest value of a field, skipping :const:`None` values.
+    """
+
+    def add(self, acc, item):
+        value = self.get(item)
+        return value if acc is None or (value is not None and value > acc) else acc
+
+
+class First(Aggregate):
+    """
+    Value of a field in the first item of the group.
+    """
+
+    _UNSET = object()
+
+    def start(self):
+        return self._UNSET
+
+    def add(self, acc, item):
+        return self.get(item) if acc is self._UNSET else acc
+
+    def result(self, acc):
+        return None if acc is self._UNSET else acc
+
+
+class Derived(object):
+    """
+    Column computed from the other columns of a group once all the items have been added, such as a ratio of
+    two sums. Derived columns are computed after all the aggregates, in alphabetical order of their names.
+    """
+
+    def __init__(self, func):
+        """
+        :param func: Function taking the group's row, as a dict, and returning the column's value.
+        """
+        self.func = func
+
+
+def group_by(items, keys, **columns):
+    """
+    Groups items by one or more keys and aggregates each group, in a single pass over the items:
+
+    >>> hosts = group_by(nodes, 'machine_id', agent=First('group_type'), nodes=Count(),
+    ...                  licenses=Derived(lambda row: row['nodes'] if 'Java' in row['agent'] else 1))
+    >>> group_by(hosts.values(), 'agent', hosts=Count(), licenses=Sum('licenses'))
+    OrderedDict([('Java App Agent', {'hosts': 12, 'licenses': 40}), ...])
+
+    :param items: Model objects, or dicts such as the rows returned by an earlier call.
+    :param keys: Attribute name or key function, or a list of them to group by several columns.
+    :param columns: :class:`Aggregate` or :class:`Derived` instances, by the name of the column they produce.
+    :returns: The row of each group, as a dict of column values, keyed by the group's key (a tuple if
+      several keys are given), in the order the groups were first seen.
+    :rtype: collections.OrderedDict
+    :raises TypeError: if a column is not an :class:`Aggregate` or :class:`Derived`.
+    """
+    items = iter(items)
+    first = next(items, None)
+    groups = OrderedDict()
+    if first is None:
+        return groups
+
+    is_dict = isinstance(first, dict)
+    if isinstance(keys, (list, tuple)):
+        getters = [_getter(k, is_dict) for k in keys]
+        if all(not callable(k) for k in keys) and len(keys) > 1:
+            key_func = (operator.itemgetter if is_dict else operator.attrgetter)(*keys)
+        else:
+            def key_func(x):
+                return tuple(g(x) for g in getters)
+    else:
+        key_func = _getter(keys, is_dict)
+
+    for name, col in columns.items():
+        if not isinstance(col, (Aggregate, Derived)):
+            raise TypeError('column {0} must be an Aggregate or Derived'.format(name))
+    aggregates = [(name, col) for name, col in sorted(columns.items()) if isinstance(col, Aggregate)]
+    derived = [(name, col) for name, col in sorted(columns.items()) if isinstance(col, Derived)]
+    for name, agg in aggregates:
+        agg.bind(is_dict)
+    funcs = [agg.add for name, agg in aggregates]
+
+    accs = {}
+    for item in itertools.chain([first], items):
+        key = key_func(item)
+        acc = accs.get(key)
+        if acc is None:
+            acc = accs[key] = [agg.start() for name, agg in aggregates]
+            groups[key] = None
+        for i, add in enumerate(funcs):
+            acc[i] = add(acc[i], item)
+
+    for key, acc in accs.items():
+        row = dict((name, agg.result(acc[i])) for i, (name, agg) in enumerate(aggregates))
+        for name, col in derived:
+            row[name] = col.func(row)
+        groups[key] = row
+    return groups
+
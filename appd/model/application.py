@@ -51,8 +51,4 @@ class Applications(JsonList):
         :returns: First application with the correct name
         :rtype: :class:`Application`
         """
-        found = [x for x in self.data if x.name == name]
-        try:
-            return found[0]
-        except IndexError:
-            raise KeyError(name)
+        return self._first('name', name)
@@ -21,6 +21,8 @@ class BusinessTransaction(JsonObject):
     FIELDS = {'id': '', 'name': '', 'type': 'entryPointType', 'internal_name': 'internalName',
               'is_background': 'background', 'tier_id': 'tierId', 'tier_name': 'tierName'}
 
+    INTERNED = ('type', 'tier_name')
+
     def __init__(self, bt_id=0, name='', internal_name='', tier_id=0, tier_name='',
                  bt_type='POJO', is_background=False):
         (self.id, self.name, self.internal_name, self.tier_id, self.tier_name, self.type, self.is_background) = \
@@ -46,7 +48,7 @@ class BusinessTransactions(JsonList):
         :returns: a BusinessTransactions object containing the matching business transactions.
         :rtype: BusinessTransactions
         """
-        return BusinessTransactions([x for x in self.data if x.name == bt_name])
+        return BusinessTransactions(self._lookup('name', bt_name))
 
     def by_tier_and_name(self, bt_name, tier_name):
         """
@@ -55,6 +57,6 @@ class BusinessTransactions(JsonList):
         :returns: a BusinessTransactions object containing the matching business transactions.
         :rtype: BusinessTransactions
         """
-        return BusinessTransactions([x for x in self.data if x.name == bt_name and x.tier_name == tier_name])
+        return BusinessTransactions(self._lookup(('name', 'tier_name'), (bt_name, tier_name)))
 
 
@@ -0,0 +1,208 @@
+"""
+Column-oriented storage for large model collections.
+
+.. moduleauthor:: Todd Radel <tradel@appdynamics.com>
+"""
+
+import copy
+import csv
+
+from array import array
+
+import six
+
+from . import JsonObject, JsonList
+from appd.model.aggregate import group_by, Aggregate
+from appd.model.query import F
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    array('q')
+    _INT64 = 'q'
+except ValueError:
+    _INT64 = 'l'
+
+
+def _is_int(value):
+    return isinstance(value, six.integer_types) and not isinstance(value, bool)
+
+
+class ColumnarList(object):
+    """
+    Alternative to a :class:`JsonList <appd.model.JsonList>` for inventories too large to keep as one object
+    per item, such as every node of every application. Each field in the model class's :attr:`FIELDS
+    <appd.model.JsonObject.FIELDS>` is kept in a single column:
+
+    * integer fields in a NumPy array, or an :class:`array.array` if NumPy is not installed;
+    * everything else in a list, with equal strings stored only once.
+
+    Filtering, grouping and exporting work on the columns directly. Model objects are only created when
+    items are read by index or iteration, or all at once with :meth:`to_list` to use the methods of the
+    regular collection:
+
+    >>> nodes = ColumnarList.from_json(Node, json_nodes, Nodes)
+    >>> java = nodes.where(F('type').contains('Tomcat'))
+    >>> java.group_by('tier_name', hosts=CountDistinct('machine_id'))
+    >>> java.to_list().by_machine_name('host12')
+
+    Only model classes that are built straight from their fields, such as :class:`Node <appd.model.Node>`,
+    :class:`Tier <appd.model.Tier>` or :class:`BusinessTransaction <appd.model.BusinessTransaction>`, can be
+    stored this way.
+    """
+
+    def __init__(self, object_type, columns, list_type=None):
+        """
+        :param object_type: Model class of the items.
+        :param dict columns: Sequence of values of each field in the class's :attr:`FIELDS`, by attribute name.
+        :param list_type: Collection class returned by :meth:`to_list`. If :const:`None`, a plain
+          :class:`JsonList <appd.model.JsonList>` is used.
+        :raises TypeError: if the model class converts its JSON in a way other than copying its fields.
+        :raises ValueError: if the columns do not match the class's fields, or have different lengths.
+        """
+        if object_type._set_fields_from_json_dict.__func__ is not JsonObject._set_fields_from_json_dict.__func__:
+            raise TypeError('{0} cannot be stored in columns'.format(object_type.__name__))
+        if set(columns) != set(object_type.FIELDS):
+            raise ValueError('columns must match the fields of ' + object_type.__name__)
+        if len(set(len(x) for x in columns.values())) > 1:
+            raise ValueError('all columns must have the same length')
+        self.object_type, self.columns, self.list_type = object_type, columns, list_type
+
+    @staticmethod
+    def _column(values, strings):
+        if values and all(_is_int(x) for x in values):
+            return numpy.asarray(values, dtype=numpy.int64) if numpy is not None else array(_INT64, values)
+        return [strings.setdefault(x, x) if isinstance(x, six.string_types) else x for x in values]
+
+    @classmethod
+    def from_json(cls, object_type, json_list, list_type=None):
+        """
+        Fills the columns straight from the decoded JSON, without creating model objects.
+
+        :param object_type: Model class of the items.
+        :param list json_list: Decoded JSON objects.
+        :param list_type: Collection class returned by :meth:`to_list`.
+        :rtype: ColumnarList
+        """
+        strings = {}
+        columns = dict((name, cls._column([x[key or name] for x in json_list], strings))
+                       for name, key in object_type.FIELDS.items())
+        return cls(object_type, columns, list_type)
+
+    def __len__(self):
+        for column in self.columns.values():
+            return len(column)
+        return 0
+
+    def _value(self, name, i):
+        value = self.columns[name][i]
+        return int(value) if numpy is not None and isinstance(value, numpy.integer) else value
+
+    def row(self, i):
+        """
+        Builds the model object for one item.
+
+        :param int i: Index of the item.
+        """
+        return self.object_type.from_json(dict((key or name, self._value(name, i))
+                                               for name, key in self.object_type.FIELDS.items()))
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self._take(range(len(self))[i])
+        return self.row(i)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def __str__(self):
+        return '<{0}[{1}]: {2}>'.format(self.__class__.__name__, len(self), self.object_type.__name__)
+
+    __repr__ = __str__
+
+    def to_list(self):
+        """
+        :returns: A regular collection of model objects with the same items.
+        :rtype: appd.model.JsonList
+        """
+        result = self.list_type() if self.list_type is not None else JsonList(self.object_type)
+        result.data = list(self)
+        return result
+
+    def _take(self, indices):
+        columns = {}
+        for name, column in self.columns.items():
+            if numpy is not None and isinstance(column, numpy.ndarray):
+                columns[name] = column[numpy.asarray(indices, dtype=numpy.int64)]
+            elif isinstance(column, array):
+                columns[name] = array(column.typecode, [column[i] for i in indices])
+            else:
+                columns[name] = [column[i] for i in indices]
+        return self.__class__(self.object_type, columns, self.list_type)
+
+    def where(self, predicate):
+        """
+        :param appd.model.query.Predicate predicate: Condition the items must match.
+        :returns: The matching items, in a new :class:`ColumnarList`.
+        :rtype: ColumnarList
+        """
+        mask = predicate.mask(self.columns)
+        if numpy is not None and isinstance(mask, numpy.ndarray):
+            return self._take(numpy.nonzero(mask)[0])
+        return self._take([i for i, m in enumerate(mask) if m])
+
+    def _getter(self, field):
+        if callable(field):
+            raise TypeError('use F(name).map(func) instead of a function on a ColumnarList')
+        if not isinstance(field, F):
+            return lambda i: self._value(field, i)
+        name, func = field.name, field.func or (lambda x: x)
+        return lambda i: func(self._value(name, i))
+
+    def group_by(self, keys, **columns):
+        """
+        Groups and aggregates the items, reading only the columns involved. Keys and aggregated fields are
+        given as attribute names or :class:`F <appd.model.query.F>` expressions, rather than functions of an
+        item. See :func:`appd.model.aggregate.group_by`.
+
+        :rtype: collections.OrderedDict
+        """
+        if isinstance(keys, (list, tuple)):
+            getters = [self._getter(k) for k in keys]
+
+            def key(i):
+                return tuple(g(i) for g in getters)
+        else:
+            key = self._getter(keys)
+        for name, col in list(columns.items()):
+            if isinstance(col, Aggregate) and col.field is not None:
+                col = columns[name] = copy.copy(col)
+                col.field = self._getter(col.field)
+        return group_by(range(len(self)), key, **columns)
+
+    def to_dicts(self, *fields):
+        """
+        :param fields: Attribute names to export. If none are given, all fields are exported.
+        :returns: A dict of field values for each item.
+        :rtype: list
+        """
+        fields = fields or sorted(self.object_type.FIELDS)
+        return [dict((name, self._value(name, i)) for name in fields) for i in range(len(self))]
+
+    def to_csv(self, f, *fields):
+        """
+        Writes the items to a CSV file, with a header row of attribute names.
+
+        :param f: File object opened for writing text.
+        :param fields: Attribute names to export. If none are given, all fields are exported.
+        """
+        fields = fields or sorted(self.object_type.FIELDS)
+        writer = csv.writer(f)
+        writer.writerow(fields)
+        columns = [self.columns[name] for name in fields]
+        for i in range(len(self)):
+            writer.writerow([column[i] for column in columns])
@@ -67,8 +67,4 @@ class ConfigVariables(JsonList):
         :return: The matching config variable.
         :rtype: appd.model.ConfigVariable
         """
-        found = [x for x in self.data if x.name == name]
-        try:
-            return found[0]
-        except IndexError:
-            raise KeyError(name)
+        return self._first('name', name)
@@ -8,6 +8,9 @@ from . import JsonObject, JsonList
 
 
 class EntityDefinition(JsonObject):
+
+    __slots__ = ('id', '_type')
+
     FIELDS = {'entity_id': 'entityId',
               'type': 'entityType'}
 
@@ -27,6 +30,9 @@ class EntityDefinition(JsonObject):
         self._type = None
         (self.id, self.type) = (entity_id, entity_type)
 
+    def _init_state(self):
+        self.id = 0
+
     @property
     def type(self):
         return self._type
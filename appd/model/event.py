@@ -9,6 +9,8 @@ from .entity_def import EntityDefinition
 
 class Event(JsonObject):
 
+    __slots__ = ('_event_type', 'triggered_entity', 'affected_entities')
+
     FIELDS = {'id': '',
               'summary': '',
               'type': '',
@@ -39,6 +41,10 @@ class Event(JsonObject):
         self.triggered_entity = triggered_entity or EntityDefinition()
         self.affected_entities = affected_entities or []
 
+    def _init_state(self):
+        self._event_type = None
+        self.triggered_entity, self.affected_entities = EntityDefinition(), []
+
     @property
     def event_type(self):
         """
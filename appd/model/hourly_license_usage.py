@@ -53,17 +53,19 @@ class HourlyLicenseUsageList(JsonList):
         """
         :rtype: HourlyLicenseUsageList
         """
-        return HourlyLicenseUsageList([x for x in self.data if x.account_id == account_id])
+        return HourlyLicenseUsageList(self._lookup('account_id', account_id))
 
     def by_license_module(self, license_module):
         """
         :rtype: HourlyLicenseUsageList
         """
-        return HourlyLicenseUsageList([x for x in self.data if x.license_module == license_module])
+        return HourlyLicenseUsageList(self._lookup('license_module', license_module))
 
 
 class HourlyLicenseUsages(JsonObject):
 
+    __slots__ = ('usages',)
+
     FIELDS = {}
 
     def __init__(self):
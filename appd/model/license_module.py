@@ -34,19 +34,16 @@ class LicenseModuleList(JsonList):
         :returns: First account with the correct name
         :rtype: LicenseModule
         """
-        found = [x for x in self.data if x.name == name]
-        try:
-            return found[0]
-        except IndexError:
-            raise KeyError(name)
+        return self._first('name', name)
 
     def __contains__(self, item):
-        found = [x for x in self.data if x.name == item]
-        return True if found else False
+        return bool(self._lookup('name', item))
 
 
 class LicenseModules(JsonObject):
 
+    __slots__ = ('modules',)
+
     FIELDS = {}
 
     def __init__(self):
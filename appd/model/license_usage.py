@@ -47,17 +47,19 @@ class LicenseUsageList(JsonList):
         """
         :rtype: LicenseUsageList
         """
-        return LicenseUsageList([x for x in self.data if x.account_id == account_id])
+        return LicenseUsageList(self._lookup('account_id', account_id))
 
     def by_license_module(self, license_module):
         """
         :rtype: LicenseUsageList
         """
-        return LicenseUsageList([x for x in self.data if x.license_module == license_module])
+        return LicenseUsageList(self._lookup('license_module', license_module))
 
 
 class LicenseUsages(JsonObject):
 
+    __slots__ = ('usages',)
+
     FIELDS = {}
 
     def __init__(self):
@@ -4,11 +4,17 @@ Model classes for AppDynamics REST API
 .. moduleauthor:: Todd Radel <tradel@appdynamics.com>
 """
 
-from . import JsonObject, JsonList
-from .metric_value import MetricValues
+from collections import OrderedDict
+
+from . import JsonObject, JsonList, STRINGS
+from .metric_value import MetricValues, ColumnarMetricValues
 
 class MetricDataSingle(JsonObject):
 
+    # The path is kept as its folder and leaf name, which are interned separately: the folder is shared by all
+    # the metrics in it, across every response.
+    __slots__ = ('_frequency', 'values', '_folder', '_leaf')
+
     FIELDS = {
         'frequency': '',
         'path': 'metricPath'
@@ -25,6 +31,21 @@ class MetricDataSingle(JsonObject):
         JsonObject._set_fields_from_json_dict(obj, json_dict)
         obj.values = MetricValues.from_json(json_dict['metricValues'])
 
+    def __str__(self):
+        return '<{0}: path={1!r}, frequency={2!r}, values={3}>'.format(
+            self.__class__.__name__, self.path, self.frequency, len(self.values))
+
+    __repr__ = __str__
+
+    @property
+    def path(self):
+        return self._folder + self._leaf
+
+    @path.setter
+    def path(self, new_path):
+        folder, sep, leaf = new_path.rpartition('|')
+        self._folder, self._leaf = STRINGS.intern(folder + sep), STRINGS.intern(leaf)
+
     @property
     def frequency(self):
         return self._frequency
@@ -34,6 +55,18 @@ class MetricDataSingle(JsonObject):
         self._list_setter('_frequency', new_freq, MetricDataSingle.FREQUENCIES)
 
 
+class ColumnarMetricDataSingle(MetricDataSingle):
+    """
+    Version of :class:`MetricDataSingle` whose values are a :class:`ColumnarMetricValues
+    <appd.model.metric_value.ColumnarMetricValues>`.
+    """
+
+    @classmethod
+    def _set_fields_from_json_dict(cls, obj, json_dict):
+        JsonObject._set_fields_from_json_dict(obj, json_dict)
+        obj.values = ColumnarMetricValues.from_json(json_dict['metricValues'])
+
+
 class MetricData(JsonList):
     def __init__(self, initial_list=None):
         super(MetricData, self).__init__(MetricDataSingle, initial_list)
@@ -48,10 +81,44 @@ class MetricData(JsonList):
         return MetricData([x for x in self if name in x.path])
 
     def by_leaf_name(self, name):
-        return MetricData([x for x in self if x.path.split('|')[-1] == name])
+        return MetricData(self._lookup('_leaf', name))
 
     def by_path(self, path):
-        return MetricData([x for x in self if x.path == path])
+        return MetricData(self._lookup('path', path))
+
+    @classmethod
+    def stitch(cls, parts):
+        """
+        Joins the results of several queries for consecutive time windows, so that each metric path appears
+        once, with its values in time order. Values with the same :attr:`start_time_ms
+        <appd.model.MetricValue.start_time_ms>`, from windows that overlap, are only kept once.
+
+        :param parts: :class:`MetricData` objects to join.
+        :rtype: MetricData
+        """
+        singles, seen = OrderedDict(), {}
+        for part in parts:
+            for md in part:
+                single = singles.get(md.path)
+                if single is None:
+                    single = singles[md.path] = MetricDataSingle(md.path, md.frequency, MetricValues())
+                    seen[md.path] = set()
+                for value in md.values:
+                    if value.start_time_ms not in seen[md.path]:
+                        seen[md.path].add(value.start_time_ms)
+                        single.values.append(value)
+        for single in singles.values():
+            single.values.data.sort(key=lambda v: v.start_time_ms)
+        return cls(list(singles.values()))
 
     def first_value(self):
         return self[0].values[0].value
+
+
+class ColumnarMetricData(MetricData):
+    """
+    Version of :class:`MetricData` that stores the values of each metric in columns.
+    """
+
+    def __init__(self, initial_list=None):
+        JsonList.__init__(self, ColumnarMetricDataSingle, initial_list)
@@ -4,28 +4,53 @@ Model classes for AppDynamics REST API
 .. moduleauthor:: Todd Radel <tradel@appdynamics.com>
 """
 
+from array import array
+
 from . import JsonObject, JsonList
 
 
 class MetricTreeNode(JsonObject):
 
+    __slots__ = ('parent', '_children', 'fetched_at')
+
     FIELDS = {'name': '', 'type': ''}
+
+    INTERNED = ('name', 'type')
     NODE_TYPES = ('leaf', 'folder')
 
     def __init__(self, parent=None, node_name='', node_type=''):
         self.parent, self.name, self.type = parent, node_name, node_type
         self._children = MetricTreeNodes()
+        self.fetched_at = None
         if parent:
             parent._children.append(self)
 
+    def _init_state(self):
+        self.parent, self._children, self.fetched_at = None, MetricTreeNodes(), None
+
+    def __str__(self):
+        return '<{0}: path={1!r}, type={2!r}, children={3}>'.format(self.__class__.__name__, self.path, self.type,
+                                                                    len(self._children))
+
+    __repr__ = __str__
+
+    @property
+    def children(self):
+        """
+        Nodes one level below this one, if they have been retrieved.
+
+        :rtype: MetricTreeNodes
+        """
+        return self._children
+
     @property
     def path(self):
         n = self
         stack = []
         while n:
-            stack.insert(0, n.name)
+            stack.append(n.name)
             n = n.parent
-        return '|'.join(stack)
+        return '|'.join(reversed(stack))
 
 
 class MetricTreeNodes(JsonList):
@@ -39,6 +64,7 @@ class MetricTreeNodes(JsonList):
                 raise TypeError('was expecting a MetricTreeNode')
             for x in self.data:
                 x.parent = parent
+            parent._children = self
 
     def __getitem__(self, i):
         """
@@ -58,8 +84,231 @@ class MetricTreeNodes(JsonList):
         :return: Metric tree node matching the name.
         :rtype: appd.model.MetricTreeNode
         """
-        found = [x for x in self.data if x.name == name]
-        try:
-            return found[0]
-        except IndexError:
-            raise KeyError(name)
+        return self._first('name', name)
+
+
+class CompactMetricTreeNode(object):
+    """
+    A node of a :class:`CompactMetricTree`. It has the same read-only interface as :class:`MetricTreeNode`,
+    but it is only a view: the node's data stays in the tree's arrays.
+    """
+
+    __slots__ = ('tree', 'index')
+
+    def __init__(self, tree, index):
+        self.tree, self.index = tree, index
+
+    @property
+    def name(self):
+        return self.tree.name_of(self.index)
+
+    @property
+    def type(self):
+        return self.tree.type_of(self.index)
+
+    @property
+    def parent(self):
+        p = self.tree.parents[self.index]
+        return CompactMetricTreeNode(self.tree, p) if p >= 0 else None
+
+    @property
+    def children(self):
+        """
+        :rtype: list
+        """
+        return [CompactMetricTreeNode(self.tree, i) for i in self.tree.child_indices(self.index)]
+
+    @property
+    def path(self):
+        return self.tree.path_of(self.index)
+
+    def __eq__(self, other):
+        return isinstance(other, CompactMetricTreeNode) and (self.tree, self.index) == (other.tree, other.index)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash((id(self.tree), self.index))
+
+    def __str__(self):
+        return '<{0}: path={1!r}, type={2!r}>'.format(self.__class__.__name__, self.path, self.type)
+
+    __repr__ = __str__
+
+
+class CompactMetricTree(object):
+    """
+    Memory-efficient representation of a large metric tree. Instead of an object per node, the tree is kept
+    in parallel arrays indexed by node number: the id of the node's name in a table of distinct names, the
+    number of its parent (-1 for nodes at the top), and a type flag. Names like ``Calls per Minute`` that
+    occur thousands of times are only stored once.
+
+    >>> tree = CompactMetricTree.from_nodes(c.get_metric_tree(10, recurse=True))
+    >>> node = tree.find('Overall Application Performance|Calls per Minute')
+    >>> node.type
+    'leaf'
+
+    Full paths are built by walking up the parent indices, and remembered once built, so looking up the paths
+    of many nodes under the same folder only joins each folder's path once.
+    """
+
+    def __init__(self, cache_paths=True):
+        """
+        :param bool cache_paths: Remember the path of each folder once it has been built. Turn this off to
+          save memory when paths are rarely needed.
+        """
+        self.names = []
+        self._name_ids = {}
+        self.name_ids = array('i')
+        self.parents = array('i')
+        self.types = array('b')
+        self.cache_paths = cache_paths
+        self._paths = {}
+        self._child_start, self._child_index = None, None
+
+    def __len__(self):
+        return len(self.parents)
+
+    def __iter__(self):
+        return (CompactMetricTreeNode(self, i) for i in range(len(self)))
+
+    def __getitem__(self, i):
+        """
+        :rtype: CompactMetricTreeNode
+        """
+        if not -len(self) <= i < len(self):
+            raise IndexError(i)
+        return CompactMetricTreeNode(self, i % len(self))
+
+    def add(self, name, node_type, parent=-1):
+        """
+        Appends a node to the tree.
+
+        :param str name: Name of the node.
+        :param str node_type: One of :attr:`MetricTreeNode.NODE_TYPES`.
+        :param int parent: Number of the parent node, or -1 for a node at the top of the tree.
+        :returns: Number of the new node.
+        :rtype: int
+        """
+        if node_type not in MetricTreeNode.NODE_TYPES:
+            raise ValueError('node_type must be one of [{0}] but got {1}'.format(
+                ', '.join(MetricTreeNode.NODE_TYPES), node_type))
+        if parent >= len(self):
+            raise IndexError(parent)
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = self._name_ids[name] = len(self.names)
+            self.names.append(name)
+        self.name_ids.append(name_id)
+        self.parents.append(parent)
+        self.types.append(MetricTreeNode.NODE_TYPES.index(node_type))
+        self._child_start, self._child_index = None, None
+        return len(self) - 1
+
+    @classmethod
+    def from_nodes(cls, nodes, cache_paths=True):
+        """
+        Converts a tree of :class:`MetricTreeNode` objects.
+
+        :param MetricTreeNodes nodes: Nodes at the top of the tree, with their descendants available through
+          :attr:`MetricTreeNode.children`.
+        :rtype: CompactMetricTree
+        """
+        tree = cls(cache_paths)
+        level = [(x, -1) for x in nodes]
+        while level:
+            next_level = []
+            for node, parent in level:
+                i = tree.add(node.name, node.type, parent)
+                next_level.extend((x, i) for x in node.children)
+            level = next_level
+        return tree
+
+    def name_of(self, i):
+        return self.names[self.name_ids[i]]
+
+    def type_of(self, i):
+        return MetricTreeNode.NODE_TYPES[self.types[i]]
+
+    def path_of(self, i):
+        """
+        Builds the full path of a node, in time proportional to its depth.
+
+        :param int i: Number of the node.
+        :rtype: str
+        """
+        names = []
+        prefix = None
+        while i >= 0:
+            prefix = self._paths.get(i)
+            if prefix is not None:
+                break
+            names.append(i)
+            i = self.parents[i]
+
+        path = prefix
+        for n in reversed(names):
+            name = self.name_of(n)
+            path = name if path is None else path + '|' + name
+            if self.cache_paths and self.types[n]:
+                self._paths[n] = path
+        return path
+
+    def _index_children(self):
+        # Children of node i are _child_index[_child_start[i + 1]:_child_start[i + 2]]; slot 0 is the top level.
+        counts = array('i', [0]) * (len(self) + 2)
+        for p in self.parents:
+            counts[p + 2] += 1
+        for i in range(2, len(counts)):
+            counts[i] += counts[i - 1]
+        child_index = array('i', [0]) * len(self)
+        fill = array('i', counts)
+        for i, p in enumerate(self.parents):
+            child_index[fill[p + 1]] = i
+            fill[p + 1] += 1
+        self._child_start, self._child_index = counts, child_index
+
+    def child_indices(self, i=-1):
+        """
+        :param int i: Number of a node, or -1 for the top of the tree.
+        :returns: Numbers of the node's children.
+        :rtype: array.array
+        """
+        if self._child_start is None:
+            self._index_children()
+        return self._child_index[self._child_start[i + 1]:self._child_start[i + 2]]
+
+    def roots(self):
+        """
+        :returns: The nodes at the top of the tree.
+        :rtype: list
+        """
+        return [CompactMetricTreeNode(self, i) for i in self.child_indices()]
+
+    def find(self, path):
+        """
+        Finds a node by its full path.
+
+        :param str path: Metric path, with components separated by ``|``.
+        :rtype: CompactMetricTreeNode
+        :raises KeyError: if there is no node with this path.
+        """
+        name_ids = [self._name_ids.get(x) for x in path.split('|')]
+        if None in name_ids:
+            raise KeyError(path)
+        i = -1
+        for name_id in name_ids:
+            for child in self.child_indices(i):
+                if self.name_ids[child] == name_id:
+                    i = child
+                    break
+            else:
+                raise KeyError(path)
+        return CompactMetricTreeNode(self, i)
+
+    def leaf_paths(self):
+        """
+        :returns: A generator of the full paths of all the leaves in the tree.
+        """
+        return (self.path_of(i) for i, t in enumerate(self.types) if not t)
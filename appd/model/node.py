@@ -9,11 +9,16 @@ from . import JsonObject, JsonList
 
 class Node(JsonObject):
 
+    # Scripts often annotate nodes with their application or license group, so nodes keep a __dict__.
+    __slots__ = ('unique_local_id', '__dict__')
+
     FIELDS = {'id': '', 'name': '', 'type': '', 'machine_id': 'machineId', 'machine_name': 'machineName',
               'tier_id': 'tierId', 'tier_name': 'tierName', 'unique_id': 'nodeUniqueLocalId',
               'os_type': 'machineOSType', 'has_app_agent': 'appAgentPresent', 'app_agent_version': 'appAgentVersion',
               'has_machine_agent': 'machineAgentPresent', 'machine_agent_version': 'machineAgentVersion'}
 
+    INTERNED = ('type', 'machine_name', 'tier_name', 'os_type', 'app_agent_version', 'machine_agent_version')
+
     def __init__(self, node_id=0, name='', node_type='', machine_id=0, machine_name='', os_type='',
                  unique_local_id='', tier_id=0, tier_name='', has_app_agent=False, app_agent_version='',
                  has_machine_agent=False, machine_agent_version=''):
@@ -23,6 +28,9 @@ class Node(JsonObject):
                                         tier_id, tier_name, has_app_agent, app_agent_version,
                                         has_machine_agent, machine_agent_version)
 
+    def _init_state(self):
+        self.unique_local_id = ''
+
 
 class Nodes(JsonList):
 
@@ -42,7 +50,7 @@ class Nodes(JsonList):
         :returns: a Nodes collection filtered by hostname.
         :rtype: Nodes
         """
-        return Nodes([x for x in self.data if x.machineName == name])
+        return Nodes(self._lookup('machine_name', name))
 
     def by_machine_id(self, machine_id):
         """
@@ -51,7 +59,7 @@ class Nodes(JsonList):
         :returns: a Nodes collection filtered by machine ID.
         :rtype: Nodes
         """
-        return Nodes([x for x in self.data if x.machineId == machine_id])
+        return Nodes(self._lookup('machine_id', machine_id))
 
     def by_tier_name(self, name):
         """
@@ -60,7 +68,7 @@ class Nodes(JsonList):
         :returns: a Nodes collection filtered by tier.
         :rtype: Nodes
         """
-        return Nodes([x for x in self.data if x.tier_name == name])
+        return Nodes(self._lookup('tier_name', name))
 
     def by_tier_id(self, tier_id):
         """
@@ -69,4 +77,4 @@ class Nodes(JsonList):
         :returns: a Nodes collection filtered by tier.
         :rtype: Nodes
         """
-        return Nodes([x for x in self.data if x.tier_id == tier_id])
+        return Nodes(self._lookup('tier_id', tier_id))
@@ -11,6 +11,8 @@ from appd.time import from_ts
 
 class PolicyViolation(JsonObject):
 
+    __slots__ = ('_status', '_severity', 'affected_entity', 'triggered_entity')
+
     FIELDS = {'id': '',
               'name': '',
               'description': '',
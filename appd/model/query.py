@@ -0,0 +1,360 @@
+"""
+Queries over model collections that have already been retrieved.
+
+.. moduleauthor:: Todd Radel <tradel@appdynamics.com>
+"""
+
+import copy
+import itertools
+import operator
+import re
+
+from appd.model.aggregate import group_by
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+_VERSION_RE = re.compile(r'\d+(?:\.\d+)*')
+
+
+def version_tuple(version):
+    """
+    Turns the first dotted number in a version string into a tuple of integers that sorts correctly, so that
+    ``'4.10'`` comes after ``'4.9'``. Agent versions reported as ``Server Agent v4.5.1.0 GA #...`` are handled
+    as well as plain ``4.5.1.0``.
+
+    :param str version: Version string.
+    :returns: Tuple of integers, or :const:`None` if the string has no version number in it.
+    :rtype: tuple
+    """
+    match = _VERSION_RE.search(version or '')
+    return tuple(int(x) for x in match.group().split('.')) if match else None
+
+
+def _ordered(op):
+    # None never compares as less or greater than anything, instead of raising TypeError on Python 3.
+    def func(a, b):
+        return a is not None and op(a, b)
+    return func
+
+
+_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': _ordered(operator.lt),
+    '<=': _ordered(operator.le),
+    '>': _ordered(operator.gt),
+    '>=': _ordered(operator.ge),
+    'in': lambda a, b: a in b,
+    'contains': lambda a, b: a is not None and b in a,
+    'startswith': lambda a, b: a is not None and a.startswith(b),
+}
+
+_VECTOR_OPERATORS = {
+    '==': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '<=': operator.le,
+    '>': operator.gt,
+    '>=': operator.ge,
+}
+
+
+class F(object):
+    """
+    Reference to a field of the items in a collection, used to build predicates:
+
+    >>> (F('type') == 'Tomcat 7') & F('tier_name').isin(['Web', 'API'])
+    >>> F('app_agent_version').map(version_tuple) < (4, 5)
+
+    The comparison operators and methods below return a :class:`Predicate`.
+    """
+
+    def __init__(self, name, func=None):
+        """
+        :param str name: Attribute name, or key name if the items are dicts.
+        :param func: Function applied to the value before comparing it.
+        """
+        self.name, self.func = name, func
+
+    def map(self, func):
+        """
+        :param func: Function to apply to the field's value before comparing it.
+        :rtype: F
+        """
+        if self.func is None:
+            return F(self.name, func)
+        inner = self.func
+        return F(self.name, lambda x: func(inner(x)))
+
+    def _compare(self, op, value):
+        return Predicate('compare', (self, op, value))
+
+    def __eq__(self, value):
+        return self._compare('==', value)
+
+    def __ne__(self, value):
+        return self._compare('!=', value)
+
+    def __lt__(self, value):
+        return self._compare('<', value)
+
+    def __le__(self, value):
+        return self._compare('<=', value)
+
+    def __gt__(self, value):
+        return self._compare('>', value)
+
+    def __ge__(self, value):
+        return self._compare('>=', value)
+
+    __hash__ = object.__hash__
+
+    def isin(self, values):
+        """
+        :param values: Values to accept.
+        :rtype: Predicate
+        """
+        return self._compare('in', frozenset(values))
+
+    def contains(self, value):
+        """
+        :param value: Substring, or item, that the field must contain.
+        :rtype: Predicate
+        """
+        return self._compare('contains', value)
+
+    def startswith(self, prefix):
+        """
+        :param str prefix: String the field must start with.
+        :rtype: Predicate
+        """
+        return self._compare('startswith', prefix)
+
+    def is_null(self):
+        """
+        :rtype: Predicate
+        """
+        return self._compare('==', None)
+
+    def getter(self, is_dict=False):
+        """
+        :param bool is_dict: :const:`True` if the items are dicts rather than objects.
+        :returns: A function that reads the field's value, after :meth:`map`, from an item.
+        """
+        get = operator.itemgetter(self.name) if is_dict else operator.attrgetter(self.name)
+        if self.func is None:
+            return get
+        func = self.func
+        return lambda x: func(get(x))
+
+
+class Predicate(object):
+    """
+    Condition on the items of a collection, built from :class:`F` comparisons and combined with ``&``, ``|``
+    and ``~``. A predicate is evaluated in one of two ways:
+
+    * :meth:`compile` turns it into a function of one item, built from closures once, so that applying it to
+      each item does not walk the expression tree again;
+    * :meth:`mask` evaluates it over whole columns of values at once, which is vectorised with NumPy if the
+      columns are NumPy arrays.
+    """
+
+    def __init__(self, kind, args):
+        """
+        :param str kind: ``compare``, ``and``, ``or`` or ``not``.
+        :param tuple args: ``(field, operator, value)`` for a comparison, or the predicates being combined.
+        """
+        self.kind, self.args = kind, args
+
+    def __and__(self, other):
+        return Predicate('and', (self, other))
+
+    def __or__(self, other):
+        return Predicate('or', (self, other))
+
+    def __invert__(self):
+        return Predicate('not', (self,))
+
+    def fields(self):
+        """
+        :returns: Names of the fields the predicate reads.
+        :rtype: set
+        """
+        if self.kind == 'compare':
+            return set([self.args[0].name])
+        return set().union(*[x.fields() for x in self.args])
+
+    def compile(self, is_dict=False):
+        """
+        :param bool is_dict: :const:`True` if the items are dicts rather than objects.
+        :returns: A function taking an item and returning :const:`True` if it matches.
+        """
+        if self.kind == 'compare':
+            field, op, value = self.args
+            get, test = field.getter(is_dict), _OPERATORS[op]
+            return lambda x: test(get(x), value)
+        if self.kind == 'not':
+            inner = self.args[0].compile(is_dict)
+            return lambda x: not inner(x)
+        a, b = [x.compile(is_dict) for x in self.args]
+        if self.kind == 'and':
+            return lambda x: a(x) and b(x)
+        return lambda x: a(x) or b(x)
+
+    def mask(self, columns):
+        """
+        Evaluates the predicate over columns of values.
+
+        :param dict columns: Sequence of values of each field, by field name. All must have the same length.
+        :returns: A NumPy boolean array if NumPy is installed and the columns used are NumPy arrays,
+          otherwise a list of booleans.
+        """
+        if self.kind == 'compare':
+            field, op, value = self.args
+            column = columns[field.name]
+            if field.func is None and op in _VECTOR_OPERATORS and numpy is not None and \
+                    isinstance(column, numpy.ndarray) and value is not None:
+                return _VECTOR_OPERATORS[op](column, value)
+            func, test = field.func, _OPERATORS[op]
+            if func is None:
+                return [test(v, value) for v in column]
+            return [test(func(v), value) for v in column]
+
+        masks = [x.mask(columns) for x in self.args]
+        if numpy is not None and all(isinstance(m, numpy.ndarray) for m in masks):
+            if self.kind == 'not':
+                return ~masks[0]
+            return (masks[0] & masks[1]) if self.kind == 'and' else (masks[0] | masks[1])
+        if self.kind == 'not':
+            return [not m for m in masks[0]]
+        if self.kind == 'and':
+            return [m and n for m, n in zip(*masks)]
+        return [m or n for m, n in zip(*masks)]
+
+
+class Query(object):
+    """
+    Filters, sorts, limits and projects a collection without asking the controller again. Each method
+    returns a new query, and nothing is evaluated until the results are read:
+
+    >>> nodes = c.get_nodes(10)
+    >>> old_java = nodes.query().where((F('type') == 'Tomcat 7') & (F('tier_name') == 'Web') &
+    ...                                (F('app_agent_version').map(version_tuple) < (4, 5)))
+    >>> old_java.order_by('-machine_name').limit(10).select('name', 'machine_name', 'app_agent_version')
+    [{'name': 'web-7', 'machine_name': 'host12', 'app_agent_version': '4.4.3.0'}, ...]
+    """
+
+    def __init__(self, source, predicates=(), ordering=(), count=None):
+        """
+        :param source: Collection to query, such as :class:`Nodes <appd.model.Nodes>`, or any list of model
+          objects or dicts.
+        """
+        self.source = source
+        self._predicates, self._ordering, self._limit = tuple(predicates), tuple(ordering), count
+
+    def _copy(self, **kwargs):
+        args = dict(predicates=self._predicates, ordering=self._ordering, count=self._limit)
+        args.update(kwargs)
+        return Query(self.source, **args)
+
+    def where(self, predicate):
+        """
+        :param Predicate predicate: Condition the items must match, in addition to any given before.
+        :rtype: Query
+        """
+        return self._copy(predicates=self._predicates + (predicate,))
+
+    def order_by(self, *fields):
+        """
+        :param fields: Field names to sort on, most significant first. Prefix a name with ``-`` to sort in
+          descending order. :const:`None` values sort first.
+        :rtype: Query
+        """
+        return self._copy(ordering=self._ordering + fields)
+
+    def limit(self, count):
+        """
+        :param int count: Maximum number of items to return.
+        :rtype: Query
+        """
+        return self._copy(count=count)
+
+    def _items(self):
+        data = getattr(self.source, 'data', self.source)
+        first = next(iter(data), None)
+        is_dict = isinstance(first, dict)
+
+        items = data
+        if self._predicates:
+            predicate = self._predicates[0]
+            for x in self._predicates[1:]:
+                predicate = predicate & x
+            test = predicate.compile(is_dict)
+            items = [x for x in data if test(x)]
+
+        if self._ordering:
+            items = list(items)
+            # Sort on the least significant field first; list.sort is stable. Items where the field is None are
+            # kept apart, so they come first in either direction.
+            for field in reversed(self._ordering):
+                get = F(field.lstrip('-')).getter(is_dict)
+                keyed = [(get(x), x) for x in items]
+                present = [pair for pair in keyed if pair[0] is not None]
+                present.sort(key=operator.itemgetter(0), reverse=field.startswith('-'))
+                items = [x for value, x in keyed if value is None] + [x for value, x in present]
+
+        if self._limit is not None:
+            items = itertools.islice(items, self._limit)
+        return list(items)
+
+    def __iter__(self):
+        return iter(self._items())
+
+    def all(self):
+        """
+        :returns: The matching items, in a collection of the same type as the source if it is a
+          :class:`JsonList <appd.model.JsonList>`, otherwise in a list.
+        """
+        items = self._items()
+        if not hasattr(self.source, 'invalidate_indexes'):
+            return items
+        result = copy.copy(self.source)
+        result.data = items
+        result.invalidate_indexes()
+        return result
+
+    def first(self):
+        """
+        :returns: The first matching item, or :const:`None` if there is none.
+        """
+        items = self.limit(1)._items()
+        return items[0] if items else None
+
+    def count(self):
+        """
+        :rtype: int
+        """
+        return len(self._items())
+
+    def select(self, *fields):
+        """
+        :param fields: Names of the fields to return.
+        :returns: A dict of the selected field values for each matching item.
+        :rtype: list
+        """
+        items = self._items()
+        is_dict = bool(items) and isinstance(items[0], dict)
+        getters = [(name, F(name).getter(is_dict)) for name in fields]
+        return [dict((name, get(x)) for name, get in getters) for x in items]
+
+    def group_by(self, keys, **columns):
+        """
+        Groups and aggregates the matching items. See :func:`appd.model.aggregate.group_by`.
+
+        :rtype: collections.OrderedDict
+        """
+        return group_by(self._items(), keys, **columns)
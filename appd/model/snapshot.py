@@ -34,6 +34,8 @@ class Snapshot(JsonObject):
               'warning_threshold': 'warningThreshold', 'critical_threshold': 'criticalThreshold',
               'user_experience': 'userExperience'}
 
+    INTERNED = ('thread_name', 'user_experience')
+
     def __init__(self, snap_id=0, **kwargs):
         self.id = snap_id
         self.local_start_time_ms, self.server_start_time_ms = 0, 0
@@ -9,6 +9,8 @@ from . import JsonObject, JsonList
 
 class Tier(JsonObject):
 
+    __slots__ = ('_agent_type',)
+
     FIELDS = {'id': '', 'name': '', 'description': '', 'type': '',
               'node_count': 'numberOfNodes', 'agent_type': 'agentType'}
     AGENT_TYPES = ('APP_AGENT', 'MACHINE_AGENT',
@@ -57,4 +59,4 @@ class Tiers(JsonList):
         :returns: a Tiers object containing any tiers matching the criteria
         :rtype: Tiers
         """
-        return Tiers([x for x in self.data if x.agentType == agent_type])
+        return Tiers(self._lookup('agent_type', agent_type))
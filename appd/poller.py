@@ -0,0 +1,120 @@
+"""
+Incremental collection of metric data.
+"""
+
+import json
+import os
+import tempfile
+import time
+
+from appd.metric_index import path_matches
+from appd.model.metric_data import MetricData, MetricDataSingle
+from appd.model.metric_value import MetricValues
+
+# os.rename cannot overwrite an existing file on Windows; os.replace can, but is only in Python 3.3 and later.
+_replace = getattr(os, 'replace', os.rename)
+
+
+class MetricPoller(object):
+    """
+    Collects new metric data points on each call to :meth:`poll`, instead of downloading a fixed window of
+    history every time. For each metric path it remembers the time of the last data point it returned (its
+    *watermark*), and only asks the controller for data after the oldest watermark:
+
+    >>> poller = MetricPoller(c, ['Overall Application Performance|*'], app_id=10,
+    ...                       state_file='/var/lib/collector/watermarks.json')
+    >>> while True:
+    ...     for md in poller.poll():
+    ...         send(md.path, md.values)
+    ...     time.sleep(60)
+
+    If a state file is given, the watermarks are saved to it after every poll and loaded from it on start,
+    so a restarted collector carries on where it stopped.
+
+    The controller keeps updating the current minute until it is over, so data points less than
+    :data:`lag_mins` old are held back until a later poll.
+
+    A pattern is polled from the oldest watermark of the series it matches, ignoring watermarks more than
+    :data:`max_lookback_mins` old. Otherwise a series that stopped reporting, such as a decommissioned node
+    under a wildcard, would make every poll download an ever longer range. If such a series starts reporting
+    again, it only gets the data from then on.
+    """
+
+    def __init__(self, client, paths, app_id=None, state_file=None, initial_mins=15, lag_mins=1,
+                 max_lookback_mins=60):
+        """
+        :param appd.request.AppDynamicsClient client: Client used to send requests.
+        :param paths: Metric paths to collect. Wildcards are supported.
+        :param int app_id: Application ID to collect metrics for. If :const:`None`, the client's `app_id`
+          property is used.
+        :param str state_file: JSON file in which to keep the watermarks between runs.
+        :param int initial_mins: Number of minutes of history to collect for a metric seen for the first time.
+        :param int lag_mins: Number of minutes to wait before returning a data point.
+        :param int max_lookback_mins: Maximum number of minutes of history to ask for in one poll.
+        """
+        self.client, self.paths, self.app_id = client, list(paths), app_id
+        self.state_file, self.initial_mins, self.lag_mins = state_file, initial_mins, lag_mins
+        self.max_lookback_mins = max_lookback_mins
+        self.watermarks = {}
+        if state_file and os.path.exists(state_file):
+            with open(state_file) as f:
+                self.watermarks = json.load(f)
+
+    def _start_time(self, pattern, now):
+        # Start from the oldest watermark of the series matching the pattern, so that none of them misses data.
+        # Watermarks older than the lookback limit belong to series that have stopped reporting, and are ignored.
+        default = now - self.initial_mins * 60 * 1000
+        floor = now - self.max_lookback_mins * 60 * 1000
+        marks = [ms for path, ms in self.watermarks.items() if path_matches(pattern, path)]
+        recent = [ms for ms in marks if ms >= floor]
+        if recent:
+            return min(recent) + 1
+        return floor if marks else default
+
+    def poll(self):
+        """
+        Retrieves the data points that have appeared since the last poll.
+
+        :returns: The new data points for each metric path that has any, in time order.
+        :rtype: appd.model.MetricData
+        """
+        now = int(time.time() * 1000)
+        cutoff = now - self.lag_mins * 60 * 1000
+
+        # Paths that start at the same time can share a batch.
+        groups = {}
+        for pattern in self.paths:
+            groups.setdefault(self._start_time(pattern, now), []).append(pattern)
+
+        parts = []
+        for start_time, patterns in sorted(groups.items()):
+            duration = max(1, -(-(now - start_time) // (60 * 1000)))
+            parts.append(self.client.get_metrics_batch(patterns, self.app_id, 'AFTER_TIME', duration, start_time,
+                                                       rollup=False))
+
+        result = MetricData()
+        for md in MetricData.stitch(parts):
+            mark = self.watermarks.get(md.path, -1)
+            values = [v for v in md.values if mark < v.start_time_ms <= cutoff]
+            if values:
+                self.watermarks[md.path] = values[-1].start_time_ms
+                result.append(MetricDataSingle(md.path, md.frequency, MetricValues(values)))
+
+        if self.state_file:
+            self.save()
+        return result
+
+    def save(self):
+        """
+        Writes the watermarks to the state file. The file is replaced in one step, so a crash while saving
+        leaves the previous version intact.
+        """
+        directory = os.path.dirname(os.path.abspath(self.state_file))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix='.watermarks')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self.watermarks, f)
+            _replace(tmp, self.state_file)
+        except Exception:
+            os.unlink(tmp)
+            raise
@@ -0,0 +1,102 @@
+"""
+HTTP connection pooling for the AppDynamics REST API client.
+"""
+
+import threading
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+
+class PoolStats(object):
+    """
+    Counters describing how well the connection pool is being used. The following attributes are defined:
+
+    .. data:: requests
+
+        Number of times a connection was taken from the pool to send a request.
+
+    .. data:: opened
+
+        Number of new TCP (or TLS) connections made to the controller.
+
+    .. data:: reused
+
+        Number of requests that were sent over an already-open connection.
+
+    .. data:: waited
+
+        Number of requests that had to wait for another thread to return a connection to the pool. Only
+        possible when the pool is created with ``pool_block=True``. If this number is high, increase
+        ``pool_maxsize``.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests, self.opened, self.waited = 0, 0, 0
+
+    def _incr(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    @property
+    def reused(self):
+        return max(self.requests - self.opened, 0)
+
+    def reset(self):
+        """
+        Sets all counters back to zero.
+        """
+        with self._lock:
+            self.requests, self.opened, self.waited = 0, 0, 0
+
+    def __str__(self):
+        return '<PoolStats: requests={0}, opened={1}, reused={2}, waited={3}>'.format(
+            self.requests, self.opened, self.reused, self.waited)
+
+    __repr__ = __str__
+
+
+class _CountingPoolMixin(object):
+
+    stats = None
+
+    def _get_conn(self, timeout=None):
+        if self.block and self.pool is not None and self.pool.empty():
+            self.stats._incr('waited')
+        self.stats._incr('requests')
+        return super(_CountingPoolMixin, self)._get_conn(timeout)
+
+
+class _CountingConnectionMixin(object):
+
+    stats = None
+
+    def connect(self):
+        self.stats._incr('opened')
+        return super(_CountingConnectionMixin, self).connect()
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    Transport adapter that keeps a pool of persistent connections to the controller and records
+    :class:`PoolStats` about it. :class:`AppDynamicsClient <appd.request.AppDynamicsClient>` mounts one of
+    these for its base URL; you should not normally need to create one yourself.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.stats = PoolStats()
+        super(PooledHTTPAdapter, self).__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super(PooledHTTPAdapter, self).init_poolmanager(*args, **kwargs)
+        attrs = {'stats': self.stats}
+        http_conn = type('CountingHTTPConnection', (_CountingConnectionMixin, HTTPConnection), attrs)
+        https_conn = type('CountingHTTPSConnection', (_CountingConnectionMixin, HTTPSConnection), attrs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': type('CountingHTTPConnectionPool', (_CountingPoolMixin, HTTPConnectionPool),
+                         dict(attrs, ConnectionCls=http_conn)),
+            'https': type('CountingHTTPSConnectionPool', (_CountingPoolMixin, HTTPSConnectionPool),
+                          dict(attrs, ConnectionCls=https_conn)),
+        }
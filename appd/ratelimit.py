@@ -0,0 +1,162 @@
+"""
+Client-side rate limiting for the AppDynamics REST API client.
+"""
+
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class TokenBucket(object):
+    """
+    Token bucket that allows :data:`rate` requests per second on average, with bursts of up to
+    :data:`capacity` requests. A bucket is safe to share between threads.
+    """
+
+    def __init__(self, rate, capacity=None):
+        """
+        :param float rate: Number of requests allowed per second.
+        :param float capacity: Largest burst of requests allowed. Defaults to one second's worth.
+        """
+        self.rate, self.capacity = float(rate), float(capacity or rate)
+        self._tokens, self._updated = self.capacity, time.time()
+        self._lock = threading.Lock()
+
+    def _take(self, tokens, balance, updated, now):
+        balance = min(self.capacity, balance + (now - updated) * self.rate) - tokens
+        return balance, max(-balance / self.rate, 0.0)
+
+    def reserve(self, tokens=1):
+        """
+        Takes tokens from the bucket without waiting. If the bucket does not hold enough tokens, it goes
+        into debt, and the caller must wait for the returned delay before sending its request.
+
+        :param float tokens: Number of tokens to take.
+        :returns: Number of seconds to wait.
+        :rtype: float
+        """
+        with self._lock:
+            now = time.time()
+            self._tokens, wait = self._take(tokens, self._tokens, self._updated, now)
+            self._updated = now
+            return wait
+
+    def acquire(self, tokens=1):
+        """
+        Takes tokens from the bucket, sleeping until they are available.
+
+        :param float tokens: Number of tokens to take.
+        :returns: Number of seconds spent waiting.
+        :rtype: float
+        """
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket whose state is kept in a local file, so that it can be shared by several processes on the
+    same machine, e.g. parallel collector jobs. Every process must use the same :data:`path`, :data:`rate`
+    and :data:`capacity`. Requires a platform with :mod:`fcntl`.
+    """
+
+    def __init__(self, path, rate, capacity=None):
+        """
+        :param str path: File to keep the bucket state in. It is created if it does not exist.
+        :param float rate: Number of requests allowed per second.
+        :param float capacity: Largest burst of requests allowed. Defaults to one second's worth.
+        :raises RuntimeError: if the platform does not have :mod:`fcntl`.
+        """
+        if fcntl is None:
+            raise RuntimeError('FileTokenBucket requires fcntl, which is not available on this platform')
+        super(FileTokenBucket, self).__init__(rate, capacity)
+        self.path = path
+
+    def reserve(self, tokens=1):
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                now = time.time()
+                try:
+                    balance, updated = [float(x) for x in os.read(fd, 64).split()]
+                except ValueError:
+                    balance, updated = self.capacity, now
+                balance, wait = self._take(tokens, balance, updated, now)
+                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, 0)
+                os.write(fd, '{0!r} {1!r}'.format(balance, now).encode('ascii'))
+                return wait
+            finally:
+                os.close(fd)
+
+
+class RateLimiter(object):
+    """
+    Applies separate request budgets to different classes of endpoint. Each budget is a :class:`TokenBucket`
+    (or :class:`FileTokenBucket`), chosen by the pattern that occurs in the request URL. If several patterns
+    occur, the one found furthest along the URL (i.e. the most specific endpoint) wins:
+
+    >>> limiter = RateLimiter({'/metric-data': TokenBucket(10),
+    ...                        '/request-snapshots': TokenBucket(2),
+    ...                        '/api/accounts': TokenBucket(1)},
+    ...                       default=TokenBucket(20))
+    >>> c = AppDynamicsClient(..., rate_limiter=limiter)
+
+    Several clients, possibly in different threads, can share one limiter.
+    """
+
+    def __init__(self, buckets=None, default=None):
+        """
+        :param dict buckets: Map of URL fragment to the bucket that limits requests to matching URL's.
+        :param TokenBucket default: Bucket for requests that do not match any pattern. If :const:`None`,
+          those requests are not limited.
+        """
+        self.buckets, self.default = dict(buckets or {}), default
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def bucket_for(self, url):
+        """
+        :param str url: Request URL.
+        :returns: The bucket that limits requests to this URL, or :const:`None`.
+        :rtype: TokenBucket
+        """
+        matches = [k for k in self.buckets if k in url]
+        if not matches:
+            return self.default
+        return self.buckets[max(matches, key=lambda k: (url.rfind(k) + len(k), len(k)))]
+
+    def reserve(self, url):
+        """
+        Takes a token for a request to :data:`url` without waiting.
+
+        :param str url: Request URL.
+        :returns: Number of seconds to wait before sending the request.
+        :rtype: float
+        """
+        bucket = self.bucket_for(url)
+        wait = bucket.reserve() if bucket else 0.0
+        with self._lock:
+            self.waited += wait
+        return wait
+
+    def acquire(self, url):
+        """
+        Waits until a request to :data:`url` is allowed.
+
+        :param str url: Request URL.
+        :returns: Number of seconds spent waiting.
+        :rtype: float
+        """
+        wait = self.reserve(url)
+        if wait:
+            time.sleep(wait)
+        return wait
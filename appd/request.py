@@ -5,10 +5,22 @@ This module contains the main classes for handling requests to the AppDynamics R
 from __future__ import print_function
 
 import sys
+import threading
+import time
 import requests
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
+from appd.pool import PooledHTTPAdapter
+from appd.cache import ResponseCache
+from appd.singleflight import SingleFlight
+from appd.stream import iter_json_array
+from appd.decoder import get_decoder
+from appd.crawler import MetricTreeCrawler
+from appd.metric_index import MetricPathIndex, BatchPlan
+from appd.time import split_time_range
+
 from appd.model.account import *
 from appd.model.application import *
 from appd.model.config_variable import *
@@ -64,7 +76,9 @@ class AppDynamicsClient(object):
     STALLS = 'Stall Count'
 
     def __init__(self, base_url='http://localhost:8090', username='user1', password='welcome',
-                 account='customer1', debug=False):
+                 account='customer1', debug=False, pool_connections=10, pool_maxsize=10, pool_block=False,
+                 keep_alive=True, timeout=None, retry_policy=None, rate_limiter=None,
+                 cache=None, coalesce=True, json_decoder=None):
         """
         Creates a new instance of the client.
 
@@ -78,10 +92,48 @@ class AppDynamicsClient(object):
                         the default value of "customer1".
         :param debug: Set to :const:`True` to print extra debugging information to :const:`sys.stdout`.
         :type debug: bool.
+        :param pool_connections: Number of per-host connection pools to keep.
+        :type pool_connections: int.
+        :param pool_maxsize: Maximum number of connections to keep open to the controller. Set this to at
+                             least the number of threads making requests at the same time.
+        :type pool_maxsize: int.
+        :param pool_block: If :const:`True`, a request made while all :data:`pool_maxsize` connections are
+                           busy waits for one to be free, instead of opening a connection that will not
+                           be kept.
+        :type pool_block: bool.
+        :param keep_alive: Set to :const:`False` to close the connection after every request.
+        :type keep_alive: bool.
+        :param timeout: Number of seconds to wait for the controller to respond, or a ``(connect, read)``
+                        tuple. If :const:`None`, wait forever.
+        :type timeout: float.
+        :param retry_policy: Policy for retrying requests that fail because the controller is busy or
+                             unreachable. If :const:`None`, failed requests are not retried.
+        :type retry_policy: appd.retry.RetryPolicy
+        :param rate_limiter: Limits the rate at which requests are sent to the controller. If :const:`None`,
+                             requests are sent as fast as possible.
+        :type rate_limiter: appd.ratelimit.RateLimiter
+        :param cache: Cache for slowly changing metadata, like the lists of tiers and nodes. If :const:`None`,
+                      every request is sent to the controller.
+        :type cache: appd.cache.ResponseCache
+        :param coalesce: If :const:`True`, threads that make the same GET request at the same time share a
+                         single call to the controller.
+        :type coalesce: bool.
+        :param json_decoder: Name of the JSON decoder to use (see :data:`appd.decoder.BACKENDS`), or a function
+                             that decodes a :class:`bytes` document. If :const:`None`, the fastest decoder
+                             installed is used.
+        :type json_decoder: str.
         """
 
         self._username, self._password, self._account, self._app_id, self._session = '', '', '', None, None
-        self._base_url = ''
+        self._base_url, self._adapter = '', None
+        self._pool_options = {'pool_connections': pool_connections, 'pool_maxsize': pool_maxsize,
+                              'pool_block': pool_block}
+        self.keep_alive, self.timeout, self.retry_policy = keep_alive, timeout, retry_policy
+        self.rate_limiter, self.cache = rate_limiter, cache
+        self._flights = self._new_flights() if coalesce else None
+        self._decode = json_decoder if callable(json_decoder) else get_decoder(json_decoder)
+        self._local = threading.local()
+        self._revalidating, self._revalidating_lock = {}, threading.Lock()
         (self.base_url, self.username, self.password, self.account, self.debug) = (base_url, username, password,
                                                                                    account, debug)
 
@@ -91,6 +143,7 @@ class AppDynamicsClient(object):
 
     @base_url.setter
     def base_url(self, new_url):
+        self._session = None
         self._base_url = new_url
         if not '://' in self._base_url:
             self._base_url = 'http://' + self._base_url
@@ -135,13 +188,28 @@ class AppDynamicsClient(object):
     def app_id(self, new_app_id):
         self._app_id = new_app_id
 
+    @property
+    def pool_stats(self):
+        """
+        Statistics about the connections opened to the controller, which are useful for choosing a
+        suitable ``pool_maxsize``.
+
+        :rtype: appd.pool.PoolStats
+        """
+        self._get_session()
+        return self._adapter.stats
+
     def _get_session(self):
         if not self._session:
             from requests.sessions import Session
             self._session = Session()
+            self._adapter = PooledHTTPAdapter(**self._pool_options)
+            self._session.mount(self._base_url, self._adapter)
+            if not self.keep_alive:
+                self._session.headers['Connection'] = 'close'
         return self._session
 
-    def request(self, path, params=None, method='GET', json=True):
+    def _prepare_request(self, path, params=None, json=True):
         if not path.startswith('/'):
             path = '/' + path
         url = self._base_url + path
@@ -156,13 +224,121 @@ class AppDynamicsClient(object):
         if self.debug:
             print('Retrieving ' + url, self._auth, params)
 
-        r = self._get_session().request(method, url, auth=self._auth, params=params)
+        return url, params
+
+    @staticmethod
+    def _new_flights():
+        return SingleFlight()
+
+    @property
+    def last_retries(self):
+        """
+        Number of times the most recent request made by the current thread had to be retried.
+
+        :rtype: int
+        """
+        return getattr(self._local, 'retries', 0)
+
+    def _send(self, method, url, params, headers=None, stream=False):
+        policy, attempt = self.retry_policy, 0
+        self._local.retries = 0
+        while True:
+            if policy:
+                policy.check()
+            if self.rate_limiter:
+                self.rate_limiter.acquire(url)
+            try:
+                r = self._get_session().request(method, url, auth=self._auth, params=params, headers=headers,
+                                                timeout=self.timeout, stream=stream)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if not policy:
+                    raise
+                policy.record(error=e)
+                if not policy.should_retry(method, attempt, error=e):
+                    raise
+                wait = policy.delay(attempt)
+            else:
+                if not policy:
+                    return r
+                policy.record(status=r.status_code)
+                if not policy.should_retry(method, attempt, status=r.status_code):
+                    return r
+                wait = policy.delay(attempt, r.headers.get('Retry-After'))
+                r.close()
+            if self.debug:
+                print('Retrying ' + url, 'in %.1f seconds' % wait)
+            time.sleep(wait)
+            attempt += 1
+            self._local.retries = attempt
+
+    def _cache_lookup(self, method, url, params, json):
+        ttl = self.cache.ttl_for(url) if self.cache is not None and method == 'GET' and json else None
+        if not ttl:
+            return None, None, None
+        key = self.cache.key(url, params)
+        return key, ttl, self.cache.lookup(key)
+
+    def request(self, path, params=None, method='GET', json=True):
+        self._local.retries = 0
+        url, params = self._prepare_request(path, params, json)
+
+        key, ttl, entry = self._cache_lookup(method, url, params, json)
+        if entry is not None:
+            if entry.is_fresh:
+                return entry.value
+            if self.cache.can_serve_stale(entry):
+                self._start_revalidation(method, url, params, key, ttl, entry)
+                return entry.value
+
+        # A shared call runs on the thread that started it, so its retry count is handed back with the result.
+        if self._flights is not None and method == 'GET':
+            value, self._local.retries = self._flights.do(ResponseCache.key(url, params) + (json,),
+                                                          self._shared_fetch, method, url, params, json, key,
+                                                          ttl, entry)
+            return value
+        return self._fetch(method, url, params, json, key, ttl, entry)
+
+    def _shared_fetch(self, *args):
+        value = self._fetch(*args)
+        return value, self._local.retries
+
+    def _fetch(self, method, url, params, json, key=None, ttl=None, entry=None):
+        r = self._send(method, url, params, entry.validators if entry is not None else None)
+
+        if r.status_code == requests.codes.not_modified and entry is not None:
+            self.cache.touch(key, entry)
+            return entry.value
 
         if r.status_code != requests.codes.ok:
             print(url, file=sys.stderr)
             r.raise_for_status()
 
-        return r.json() if json else r.text
+        if not json:
+            return r.text
+        value = self._decode(r.content)
+        if ttl:
+            self.cache.set(key, value, ttl, r.headers.get('ETag'), r.headers.get('Last-Modified'))
+        return value
+
+    def _start_revalidation(self, method, url, params, key, ttl, entry):
+        # Refresh each stale key once, however many callers are served the stale value in the meantime.
+        with self._revalidating_lock:
+            if key in self._revalidating:
+                return
+            thread = self._revalidating[key] = threading.Thread(target=self._revalidate,
+                                                                args=(method, url, params, key, ttl, entry))
+        thread.daemon = True
+        thread.start()
+
+    def _revalidate(self, method, url, params, key, ttl, entry):
+        try:
+            self._fetch(method, url, params, True, key, ttl, entry)
+        except Exception as e:
+            if self.debug:
+                print('Failed to refresh ' + url, e)
+        finally:
+            with self._revalidating_lock:
+                self._revalidating.pop(key, None)
 
     def _app_path(self, app_id, path=None):
         app_id = app_id if isinstance(app_id, int) or isinstance(app_id, str) else self._app_id
@@ -171,6 +347,38 @@ class AppDynamicsClient(object):
         path = '/controller/rest/applications/%s' % app_id + (path or '')
         return path
 
+    def fan_out(self, func, apps, max_workers=8, return_exceptions=False, **kwargs):
+        """
+        Calls an application-level method once for each of several applications, using a pool of threads
+        so that the requests run concurrently. Results are yielded as soon as they arrive, which is not
+        necessarily the order of :data:`apps`:
+
+        >>> for app, nodes in c.fan_out(c.get_nodes, c.get_applications()):
+        ...     print(app.name, len(nodes))
+
+        :param func: Bound method of this client that accepts an ``app_id`` argument, e.g. :meth:`get_nodes`.
+        :param apps: Application ID's, or :class:`Application <appd.model.Application>` objects.
+        :param int max_workers: Maximum number of requests to run at the same time.
+        :param bool return_exceptions: If :const:`True`, an exception raised by a call is yielded in place
+          of its result. If :const:`False`, the first exception is raised and the remaining calls are cancelled.
+        :param kwargs: Additional keyword arguments to pass to :data:`func` on every call.
+        :returns: A generator of ``(app, result)`` tuples, where ``app`` is the item from :data:`apps`.
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = dict((executor.submit(func, app_id=getattr(app, 'id', app), **kwargs), app) for app in apps)
+            try:
+                for future in as_completed(futures):
+                    try:
+                        result = future.result()
+                    except Exception as e:
+                        if not return_exceptions:
+                            raise
+                        result = e
+                    yield futures[future], result
+            finally:
+                for future in futures:
+                    future.cancel()
+
     def get_metric_tree(self, app_id=None, metric_path=None, recurse=False):
         """
         Retrieves a list of available metrics.
@@ -188,11 +396,49 @@ class AppDynamicsClient(object):
             parent = MetricTreeNode(parent=None, node_name=metric_path, node_type='folder')
         return self._get_metric_tree(app_id, parent=parent, recurse=recurse)
 
+    def crawl_metric_tree(self, app_id=None, metric_path=None, max_depth=None, include=None, exclude=None,
+                          max_workers=8, progress=None):
+        """
+        Retrieves the metric tree breadth-first, fetching many folders at the same time. This is much faster than
+        :meth:`get_metric_tree` for large trees, and parts of the tree can be skipped altogether. See
+        :class:`MetricTreeCrawler <appd.crawler.MetricTreeCrawler>` for the meaning of the arguments.
+
+        :param int app_id: Application ID to retrieve metrics for. If :const:`None`, the value stored in the
+          `app_id` property will be used.
+        :param str metric_path: Point in the metric tree at which to start. If :const:`None`, start at the root.
+        :param int max_depth: Number of levels to retrieve. If :const:`None`, retrieve the whole tree.
+        :param include: Patterns of metric paths to retrieve.
+        :param exclude: Patterns of metric paths to skip.
+        :param int max_workers: Maximum number of folders to retrieve at the same time.
+        :param progress: Function called as ``progress(done, pending)`` after each folder is retrieved.
+        :returns: The nodes at the starting point, with their descendants in their
+          :attr:`children <appd.model.MetricTreeNode.children>`.
+        :rtype: appd.model.MetricTreeNodes
+        """
+        crawler = MetricTreeCrawler(self, app_id, max_workers, max_depth, include, exclude, progress)
+        return crawler.crawl(metric_path)
+
+    def get_metric_index(self, app_id=None, metric_path=None, include=None, exclude=None, max_workers=8):
+        """
+        Crawls the metric tree and builds an index of its paths, which can expand wildcards locally instead of
+        sending them to the controller. See :class:`MetricPathIndex <appd.metric_index.MetricPathIndex>`.
+
+        :param int app_id: Application ID to retrieve metrics for. If :const:`None`, the value stored in the
+          `app_id` property will be used.
+        :param str metric_path: Point in the metric tree at which to start. If :const:`None`, start at the root.
+        :param include: Patterns of metric paths to retrieve.
+        :param exclude: Patterns of metric paths to skip.
+        :param int max_workers: Maximum number of folders to retrieve at the same time.
+        :rtype: appd.metric_index.MetricPathIndex
+        """
+        return MetricPathIndex.from_tree(self.crawl_metric_tree(app_id, metric_path, include=include,
+                                                                exclude=exclude, max_workers=max_workers))
+
     def _get_metric_tree(self, app_id=None, parent=None, recurse=False):
         params = {}
         if parent:
             params['metric-path'] = parent.path
-        path = '/applications/%d/metrics' % app_id
+        path = self._app_path(app_id, '/metrics')
         nodes = MetricTreeNodes.from_json(self.request(path, params), parent)
         if recurse:
             for node in nodes:
@@ -225,11 +471,12 @@ class AppDynamicsClient(object):
 
     # Application-level requests
 
-    def _app_request(self, cls, path, app_id=None, params=None):
+    def _app_request(self, cls, path, app_id=None, params=None, lazy=False):
         path = self._app_path(app_id, path)
-        return cls.from_json(self.request(path, params))
+        data = self.request(path, params)
+        return cls.from_json(data, lazy=True) if lazy else cls.from_json(data)
 
-    def get_bt_list(self, app_id=None, excluded=False):
+    def get_bt_list(self, app_id=None, excluded=False, lazy=False):
         """
         Get the list of all registered business transactions in an application.
 
@@ -237,10 +484,13 @@ class AppDynamicsClient(object):
           `app_id` property will be used.
         :param bool excluded: If True, the function will return BT's that have been excluded in the AppDynamics
           UI. If False, the function will return all BT's that have not been excluded. The default is False.
+        :param bool lazy: If :const:`True`, build each business transaction only when it is used. See
+          :meth:`JsonList.from_json <appd.model.JsonList.from_json>`.
         :returns: The list of registered business transactions.
         :rtype: appd.model.BusinessTransactions
         """
-        return self._app_request(BusinessTransactions, '/business-transactions', app_id, {'exclude': excluded})
+        return self._app_request(BusinessTransactions, '/business-transactions', app_id, {'exclude': excluded},
+                                 lazy)
 
     def get_tiers(self, app_id=None):
         """
@@ -253,7 +503,7 @@ class AppDynamicsClient(object):
         """
         return self._app_request(Tiers, '/tiers', app_id)
 
-    def get_nodes(self, app_id=None, tier_id=None):
+    def get_nodes(self, app_id=None, tier_id=None, lazy=False):
         """
         Retrieves the list of nodes in the application, optionally filtered by tier.
 
@@ -261,12 +511,14 @@ class AppDynamicsClient(object):
           `app_id` property will be used.
         :param int tier_id: If set, retrieve only the nodes belonging to the specified tier. If :const:`None`,
           retrieve all nodes in the application.
+        :param bool lazy: If :const:`True`, build each node only when it is used. See
+          :meth:`JsonList.from_json <appd.model.JsonList.from_json>`.
         :return: A :class:`Nodes <appd.model.Nodes>` object, representing a collection of nodes.
         :rtype: appd.model.Nodes
         """
 
         path = ('/tiers/%s/nodes' % tier_id) if tier_id else '/nodes'
-        return self._app_request(Nodes, path, app_id)
+        return self._app_request(Nodes, path, app_id, lazy=lazy)
 
     def get_node(self, node_id, app_id=None):
         """
@@ -312,7 +564,7 @@ class AppDynamicsClient(object):
                 'end-time': end_time}
 
     def get_metrics(self, metric_path, app_id=None, time_range_type='BEFORE_NOW',
-                    duration_in_mins=15, start_time=None, end_time=None, rollup=True):
+                    duration_in_mins=15, start_time=None, end_time=None, rollup=True, columnar=False):
         """
         Retrieves metric data.
 
@@ -331,6 +583,9 @@ class AppDynamicsClient(object):
             :attr:`time_range_type` is :const:`BEFORE_TIME` or :const:`BETWEEN_TIMES`.
         :param bool rollup: If :const:`False`, return individual data points for each time slice in
             the given time range. If :const:`True`, aggregates the data and returns a single data point.
+        :param bool columnar: If :const:`True`, store the values of each metric in a
+            :class:`ColumnarMetricValues <appd.model.metric_value.ColumnarMetricValues>`, which takes much less
+            memory for long series and has fast aggregate functions.
         :returns: A list of metric values.
         :rtype: appd.model.MetricData
         """
@@ -339,10 +594,127 @@ class AppDynamicsClient(object):
         params.update({'metric-path': metric_path,
                        'rollup': rollup})
 
-        return self._app_request(MetricData, '/metric-data', app_id, params)
+        return self._app_request(ColumnarMetricData if columnar else MetricData, '/metric-data', app_id, params)
+
+    def get_metrics_range(self, metric_path, start_time, end_time, app_id=None, frequency='ONE_MIN',
+                          window_mins=None, max_workers=8):
+        """
+        Retrieves individual data points over a long time range. The controller rejects or downsamples requests
+        that span too many time slices, so the range is split into windows aligned to the slices of
+        :data:`frequency` (see :func:`split_time_range <appd.time.split_time_range>`). The windows are
+        fetched concurrently and joined back together with :meth:`MetricData.stitch
+        <appd.model.MetricData.stitch>`:
+
+        >>> end = to_ts(datetime.now())
+        >>> data = c.get_metrics_range('Overall Application Performance|Calls per Minute',
+        ...                            end - 30 * 24 * 3600 * 1000, end, 10, frequency='SIXTY_MIN')
+
+        :param str metric_path: Full metric path of the metric(s) to be retrieved. Wildcards are supported.
+        :param long start_time: Start time, expressed in milliseconds since epoch.
+        :param long end_time: End time, expressed in milliseconds since epoch.
+        :param int app_id: Application ID to retrieve metrics for. If :const:`None`, the value stored in the
+            `app_id` property will be used.
+        :param str frequency: Resolution the controller is expected to return: :const:`ONE_MIN`,
+            :const:`TEN_MIN` or :const:`SIXTY_MIN`. This decides where windows start and end, and their
+            default length.
+        :param int window_mins: Length of each window in minutes.
+        :param int max_workers: Maximum number of windows to retrieve at the same time.
+        :returns: One :class:`MetricDataSingle <appd.model.MetricDataSingle>` per metric path, with values
+            in time order.
+        :rtype: appd.model.MetricData
+        """
+        windows = split_time_range(start_time, end_time, frequency, window_mins)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            parts = list(executor.map(
+                lambda w: self.get_metrics(metric_path, app_id, 'BETWEEN_TIMES', None, w[0], w[1], False), windows))
+        return MetricData.stitch(parts)
+
+    def get_metrics_batch(self, paths, app_id=None, time_range_type='BEFORE_NOW', duration_in_mins=15,
+                          start_time=None, end_time=None, rollup=True, max_workers=8, index=None, min_merge=2):
+        """
+        Retrieves many metric paths at once. Duplicate paths are dropped, paths in the same folder are fetched
+        with a single wildcard query, and the queries run concurrently, so the whole batch takes about as
+        long as its slowest query. See :class:`BatchPlan <appd.metric_index.BatchPlan>`.
+
+        >>> data = c.get_metrics_batch(['Backends|DB|Calls per Minute', 'Backends|DB|Errors per Minute',
+        ...                             'Overall Application Performance|Calls per Minute'], 10)
+        >>> data.by_path('Backends|DB|Calls per Minute').first_value()
+
+        :param paths: Metric paths to retrieve. Wildcards are supported.
+        :param int app_id: Application ID to retrieve metrics for. If :const:`None`, the value stored in the
+            `app_id` property will be used.
+        :param str time_range_type: See :meth:`get_metrics`.
+        :param int duration_in_mins: See :meth:`get_metrics`.
+        :param long start_time: See :meth:`get_metrics`.
+        :param long end_time: See :meth:`get_metrics`.
+        :param bool rollup: See :meth:`get_metrics`.
+        :param int max_workers: Maximum number of queries to run at the same time.
+        :param appd.metric_index.MetricPathIndex index: If given, wildcard paths are narrowed using the index
+            before they are sent.
+        :param int min_merge: Minimum number of paths in the same folder to fetch them with one query.
+        :returns: The requested metrics, each path appearing once.
+        :rtype: appd.model.MetricData
+        """
+        plan = BatchPlan(paths, index, min_merge)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(
+                lambda q: self.get_metrics(q, app_id, time_range_type, duration_in_mins, start_time, end_time,
+                                           rollup), plan.queries))
+        return self._merge_batch(plan, results)
+
+    @staticmethod
+    def _merge_batch(plan, results):
+        merged, seen = MetricData(), set()
+        for data in results:
+            for md in data:
+                if md.path not in seen and plan.wanted(md.path):
+                    seen.add(md.path)
+                    merged.append(md)
+        return merged
+
+    def iter_metrics(self, metric_path, app_id=None, time_range_type='BEFORE_NOW',
+                     duration_in_mins=15, start_time=None, end_time=None, rollup=True, chunk_size=65536):
+        """
+        Retrieves metric data like :meth:`get_metrics`, but reads the response a piece at a time and yields
+        each metric as soon as it has been parsed. Use this for wildcard queries that match a very large
+        number of metrics, so that the whole response never has to be held in memory:
+
+        >>> for md in c.iter_metrics('Application Infrastructure Performance|*|Individual Nodes|*|*', 10,
+        ...                          rollup=False):
+        ...     print(md.path, len(md.values))
+
+        Responses are not cached or shared with other threads.
+
+        :param str metric_path: Full metric path of the metric(s) to be retrieved. Wildcards are supported.
+        :param int app_id: Application ID to retrieve metrics for. If :const:`None`, the value stored in the
+            `app_id` property will be used.
+        :param str time_range_type: See :meth:`get_metrics`.
+        :param int duration_in_mins: See :meth:`get_metrics`.
+        :param long start_time: See :meth:`get_metrics`.
+        :param long end_time: See :meth:`get_metrics`.
+        :param bool rollup: See :meth:`get_metrics`.
+        :param int chunk_size: Number of bytes to read from the network at a time.
+        :returns: A generator of metrics.
+        :rtype: generator of appd.model.MetricDataSingle
+        """
+
+        params = self._validate_time_range(time_range_type, duration_in_mins, start_time, end_time)
+        params.update({'metric-path': metric_path,
+                       'rollup': rollup})
+        url, params = self._prepare_request(self._app_path(app_id, '/metric-data'), params)
+
+        r = self._send('GET', url, params, stream=True)
+        try:
+            if r.status_code != requests.codes.ok:
+                print(url, file=sys.stderr)
+                r.raise_for_status()
+            for item in iter_json_array(r.iter_content(chunk_size)):
+                yield MetricDataSingle.from_json(item)
+        finally:
+            r.close()
 
     def get_snapshots(self, app_id=None, time_range_type=None, duration_in_mins=None,
-                      start_time=None, end_time=None, **kwargs):
+                      start_time=None, end_time=None, lazy=False, **kwargs):
         """
         Finds and returns any snapshots in the given time range that match a set of criteria. You must provide
         at least one condition to the search parameters in the :data:`kwargs` parameters. The list of valid
@@ -359,6 +731,9 @@ class AppDynamicsClient(object):
             :attr:`time_range_type` is :const:`AFTER_TIME` or :const:`BETWEEN_TIMES`.
         :param long end_time: End time, expressed in milliseconds since epoch. Only valid if the
             :attr:`time_range_type` is :const:`BEFORE_TIME` or :const:`BETWEEN_TIMES`.
+        :param bool lazy: If :const:`True`, build each snapshot only when it is used. Snapshots have dozens of
+            fields, so this saves a lot of time and memory when only a few of them are read. See
+            :meth:`JsonList.from_json <appd.model.JsonList.from_json>`.
         :param kwargs: Additional key/value pairs to pass to the controller as search parameters.
         :returns: A list of snapshots.
         :rtype: appd.model.Snapshots
@@ -374,7 +749,7 @@ class AppDynamicsClient(object):
             if qs_name in self.SNAPSHOT_REQUEST_LISTS and qs_name in kwargs:
                 params[qs_name] = ','.join(params[qs_name])
 
-        return self._app_request(Snapshots, '/request-snapshots', app_id, params)
+        return self._app_request(Snapshots, '/request-snapshots', app_id, params, lazy)
 
     def get_policy_violations(self, app_id=None, time_range_type='BEFORE_NOW', duration_in_mins=15,
                               start_time=None, end_time=None):
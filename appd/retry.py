@@ -0,0 +1,168 @@
+"""
+Retry and circuit breaker policies for the AppDynamics REST API client.
+"""
+
+import random
+import threading
+import time
+
+from email.utils import parsedate_tz, mktime_tz
+
+from requests.exceptions import ConnectionError
+
+
+class CircuitOpenError(ConnectionError):
+    """
+    Raised instead of sending a request when the circuit breaker has decided that the controller is down.
+    """
+    pass
+
+
+class CircuitBreaker(object):
+    """
+    Stops sending requests to a controller after several consecutive failures. Once :data:`reset_timeout`
+    seconds have passed, a single trial request is let through; if it succeeds, normal operation resumes,
+    otherwise the breaker stays open for another :data:`reset_timeout` seconds.
+    """
+
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        """
+        :param int failure_threshold: Number of consecutive failed requests that opens the circuit.
+        :param float reset_timeout: Number of seconds to wait before sending a trial request.
+        """
+        self.failure_threshold, self.reset_timeout = failure_threshold, reset_timeout
+        self.state, self.failures, self._opened_at = self.CLOSED, 0, 0
+        self._lock = threading.Lock()
+
+    def check(self):
+        """
+        Called before every request.
+
+        :raises CircuitOpenError: if the circuit is open and the request must not be sent.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.time() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return
+            raise CircuitOpenError('controller has failed {0} times in a row, not sending any requests for '
+                                   '{1} seconds'.format(self.failures, self.reset_timeout))
+
+    def record(self, success):
+        """
+        Called after every request with the outcome.
+
+        :param bool success: :const:`False` if the controller failed or could not be reached.
+        """
+        with self._lock:
+            if success:
+                self.state, self.failures = self.CLOSED, 0
+                return
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state, self._opened_at = self.OPEN, time.time()
+
+
+class RetryPolicy(object):
+    """
+    Decides whether and when to retry a failed request. Only idempotent methods are retried, after an
+    exponential backoff with full jitter, or after the delay requested by the controller in a
+    ``Retry-After`` header. Pass one to :class:`AppDynamicsClient <appd.request.AppDynamicsClient>`:
+
+    >>> c = AppDynamicsClient(..., retry_policy=RetryPolicy(max_retries=5, circuit_breaker=CircuitBreaker()))
+
+    The number of retries the last request needed is available from
+    :attr:`AppDynamicsClient.last_retries <appd.request.AppDynamicsClient.last_retries>`, and the total
+    for all requests from :attr:`total_retries`.
+    """
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    IDEMPOTENT_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, max_retries=3, backoff_factor=0.5, max_backoff=60.0, jitter=True,
+                 retry_statuses=RETRY_STATUSES, methods=IDEMPOTENT_METHODS, respect_retry_after=True,
+                 circuit_breaker=None):
+        """
+        :param int max_retries: Maximum number of times to retry a single request.
+        :param float backoff_factor: Delay before the first retry, in seconds. It doubles with each retry.
+        :param float max_backoff: Upper limit on the delay between retries, in seconds.
+        :param bool jitter: If :const:`True`, pick a random delay between zero and the computed backoff, so
+          that many clients do not retry in lockstep.
+        :param retry_statuses: HTTP status codes that should be retried.
+        :param methods: HTTP methods that are safe to retry.
+        :param bool respect_retry_after: If :const:`True`, wait as long as the controller's ``Retry-After``
+          header asks (up to :data:`max_backoff`).
+        :param CircuitBreaker circuit_breaker: Optional circuit breaker shared by all requests.
+        """
+        self.max_retries, self.backoff_factor, self.max_backoff, self.jitter = (max_retries, backoff_factor,
+                                                                                max_backoff, jitter)
+        self.retry_statuses, self.methods, self.respect_retry_after = (retry_statuses, methods,
+                                                                       respect_retry_after)
+        self.circuit_breaker = circuit_breaker
+        self.total_retries = 0
+        self._lock = threading.Lock()
+
+    def check(self):
+        if self.circuit_breaker:
+            self.circuit_breaker.check()
+
+    def record(self, status=None, error=None):
+        """
+        Tells the circuit breaker about the outcome of a request.
+
+        :param int status: HTTP status code of the response, if one was received.
+        :param Exception error: Exception raised while sending the request, if any.
+        """
+        if self.circuit_breaker:
+            self.circuit_breaker.record(error is None and status is not None and status < 500 and status != 429)
+
+    def should_retry(self, method, attempt, status=None, error=None):
+        """
+        :param str method: HTTP method of the request.
+        :param int attempt: Number of retries already made.
+        :param int status: HTTP status code of the response, if one was received.
+        :param Exception error: Exception raised while sending the request, if any.
+        :rtype: bool
+        """
+        if attempt >= self.max_retries or method.upper() not in self.methods:
+            return False
+        return error is not None or status in self.retry_statuses
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Computes how long to sleep before the next retry.
+
+        :param int attempt: Number of retries already made.
+        :param str retry_after: Value of the ``Retry-After`` response header, if any.
+        :returns: Delay in seconds.
+        :rtype: float
+        """
+        with self._lock:
+            self.total_retries += 1
+        if retry_after and self.respect_retry_after:
+            seconds = parse_retry_after(retry_after)
+            if seconds is not None:
+                return min(seconds, self.max_backoff)
+        backoff = min(self.backoff_factor * (2 ** attempt), self.max_backoff)
+        return random.uniform(0, backoff) if self.jitter else backoff
+
+
+def parse_retry_after(value):
+    """
+    Parses the value of a ``Retry-After`` header, which can be either a number of seconds or an HTTP date.
+
+    :param str value: Header value.
+    :returns: Number of seconds to wait, or :const:`None` if the value could not be parsed.
+    :rtype: float
+    """
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        parsed = parsedate_tz(value)
+        if parsed is None:
+            return None
+        return max(mktime_tz(parsed) - time.time(), 0.0)
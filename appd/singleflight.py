@@ -0,0 +1,59 @@
+"""
+Request coalescing for the AppDynamics REST API client.
+"""
+
+import threading
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result, self.error = None, None
+
+
+class SingleFlight(object):
+    """
+    Makes sure that only one call with a given key is in progress at a time. Threads that ask for the same key
+    while the call is running wait for it and share its result (or exception), instead of repeating it.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.shared = 0
+
+    def do(self, key, func, *args, **kwargs):
+        """
+        Calls ``func(*args, **kwargs)``, unless a call with the same key is already running, in which case
+        its result is returned instead.
+
+        :param key: Hashable key identifying the call.
+        :param func: Function to call.
+        :returns: The result of the function.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
@@ -0,0 +1,109 @@
+"""
+Incremental parsing of large JSON responses.
+"""
+
+import codecs
+import json
+
+
+class JsonArrayParser(object):
+    """
+    Push parser for a JSON document whose top level is an array. Feed it the document a chunk at a time,
+    and it returns each element of the array as soon as the element is complete, so that only one
+    element at a time has to be held in memory:
+
+    >>> parser = JsonArrayParser()
+    >>> parser.feed(b'[{"a": 1}, {"a"')
+    [{'a': 1}]
+    >>> parser.feed(b': 2}]')
+    [{'a': 2}]
+    >>> parser.close()
+    """
+
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buf, self._pos, self._need = '', 0, 0
+        self._started, self._finished = False, False
+
+    def _skip(self, chars):
+        while self._pos < len(self._buf) and self._buf[self._pos] in chars:
+            self._pos += 1
+        return self._pos < len(self._buf)
+
+    def feed(self, chunk):
+        """
+        :param bytes chunk: Next piece of the document.
+        :returns: The array elements completed by this chunk.
+        :rtype: list
+        """
+        if isinstance(chunk, bytes):
+            chunk = self._text.decode(chunk)
+        self._buf += chunk
+        return self._parse(final=False)
+
+    def close(self):
+        """
+        Signals the end of the document.
+
+        :returns: Any elements that were still waiting to be returned.
+        :rtype: list
+        :raises ValueError: if the document was incomplete or was not an array.
+        """
+        self._buf += self._text.decode(b'', final=True)
+        items = self._parse(final=True)
+        if not self._finished:
+            raise ValueError('unexpected end of JSON array')
+        return items
+
+    def _parse(self, final):
+        items, waiting = [], False
+        if self._finished or len(self._buf) < self._need and not final:
+            return items
+
+        while True:
+            if not self._started:
+                if not self._skip(' \t\r\n'):
+                    break
+                if self._buf[self._pos] != '[':
+                    raise ValueError('expected a JSON array')
+                self._started, self._pos = True, self._pos + 1
+            if not self._skip(' \t\r\n,'):
+                break
+            if self._buf[self._pos] == ']':
+                self._finished = True
+                break
+            try:
+                item, end = self._decoder.raw_decode(self._buf, self._pos)
+            except ValueError:
+                if final:
+                    raise
+                waiting = True
+                break
+            # A number that reaches the end of the buffer, or "1." or "1e", may continue in the next chunk.
+            if not final and (end == len(self._buf) or self._buf[end] in '.eE+-0123456789'):
+                break
+            items.append(item)
+            self._pos = end
+
+        self._buf, self._pos = self._buf[self._pos:], 0
+        # Wait until the buffer has doubled before trying an incomplete element again, so that a huge
+        # element is not re-parsed from the start for every small chunk.
+        self._need = 2 * len(self._buf) if waiting else 0
+        return items
+
+
+def iter_json_array(chunks):
+    """
+    Parses a JSON array from an iterable of chunks, such as :meth:`requests.Response.iter_content`, and yields
+    its elements one at a time.
+
+    :param chunks: Iterable of :class:`bytes` or :class:`str` pieces of the document.
+    :returns: A generator of the array's elements.
+    """
+    parser = JsonArrayParser()
+    for chunk in chunks:
+        for item in parser.feed(chunk):
+            yield item
+    for item in parser.close():
+        yield item
@@ -32,3 +32,54 @@ def to_ts(dt):
     return int(mktime(dt.timetuple())) * 1000
 
 
+FREQUENCY_MS = {'ONE_MIN': 60 * 1000, 'TEN_MIN': 10 * 60 * 1000, 'SIXTY_MIN': 60 * 60 * 1000}
+"""
+Length in milliseconds of the time slice behind each metric data frequency.
+"""
+
+MAX_WINDOW_MINS = {'ONE_MIN': 24 * 60, 'TEN_MIN': 7 * 24 * 60, 'SIXTY_MIN': 60 * 24 * 60}
+"""
+Default length in minutes of the windows a long time range is split into, for each frequency. Each window
+holds about 1,000 to 1,500 data points per metric.
+"""
+
+
+def align_ts(ms, frequency='ONE_MIN', up=False):
+    """
+    Rounds a timestamp to the start of a metric data time slice.
+
+    :param long ms: Timestamp expressed as milliseconds since epoch.
+    :param str frequency: One of :data:`FREQUENCY_MS`.
+    :param bool up: Round up to the start of the next slice instead of down, unless :data:`ms` is already
+      at the start of one.
+    :rtype: long
+    """
+    step = FREQUENCY_MS[frequency]
+    return -(-ms // step) * step if up else ms // step * step
+
+
+def split_time_range(start_time, end_time, frequency='ONE_MIN', window_mins=None):
+    """
+    Splits a time range into consecutive windows whose boundaries fall on the time slices of a metric data
+    frequency, so that no slice is cut in two. The range is widened to whole slices first.
+
+    :param long start_time: Start time, expressed in milliseconds since epoch.
+    :param long end_time: End time, expressed in milliseconds since epoch.
+    :param str frequency: One of :data:`FREQUENCY_MS`.
+    :param int window_mins: Length of each window in minutes. It is rounded down to a whole number of slices.
+      If :const:`None`, the value in :data:`MAX_WINDOW_MINS` is used.
+    :returns: List of ``(start_time, end_time)`` tuples.
+    :rtype: list
+    """
+    if frequency not in FREQUENCY_MS:
+        raise ValueError('frequency must be one of: ' + ', '.join(sorted(FREQUENCY_MS)))
+    if end_time < start_time:
+        raise ValueError('end_time must not be before start_time')
+    step = FREQUENCY_MS[frequency]
+    window = max(step, (window_mins or MAX_WINDOW_MINS[frequency]) * 60 * 1000 // step * step)
+    start, end = align_ts(start_time, frequency), align_ts(end_time, frequency, up=True)
+    windows = []
+    while start < end:
+        windows.append((start, min(start + window, end)))
+        start += window
+    return windows
@@ -0,0 +1,52 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Compares the JSON decoders available in :mod:`appd.decoder` on the sample responses in the ``data``
+directory. For each file, it reports the time taken to decode the raw bytes, and to decode them and build
+the model objects, as the client does::
+
+    python benchmarks/bench_decoder.py [repeat]
+"""
+
+from __future__ import print_function
+
+import os
+import sys
+import timeit
+
+from appd.decoder import available_decoders, get_decoder
+from appd.model.business_transaction import BusinessTransactions
+from appd.model.metric_treenode import MetricTreeNodes
+from appd.model.node import Nodes
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+FIXTURES = [('nodes.json', Nodes),
+            ('business_transactions.json', BusinessTransactions),
+            ('metric_tree_0.json', MetricTreeNodes),
+            ('metric_tree_1.json', MetricTreeNodes),
+            ('metric_tree_2.json', MetricTreeNodes)]
+
+
+def best_of(func, number, repeat=5):
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
+
+
+def main(number=2000):
+    decoders = available_decoders()
+    print('%-28s %-10s %12s %12s %9s' % ('File', 'Decoder', 'Decode (us)', 'Total (us)', 'Speedup'))
+    for name, cls in FIXTURES:
+        with open(os.path.join(DATA_DIR, name), 'rb') as f:
+            raw = f.read()
+        baseline = None
+        for decoder_name in reversed(decoders):
+            decode = get_decoder(decoder_name)
+            decode_us = best_of(lambda: decode(raw), number)
+            total_us = best_of(lambda: cls.from_json(decode(raw)), number)
+            baseline = baseline or total_us
+            print('%-28s %-10s %12.1f %12.1f %8.2fx' % (name, decoder_name, decode_us, total_us, baseline / total_us))
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:2]])
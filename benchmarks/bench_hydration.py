@@ -0,0 +1,119 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Measures how long it takes to build model objects from decoded JSON and read two attributes of each, and how
+much memory the objects take. It compares:
+
+* ``dict``: equivalent classes that keep their attributes in a ``__dict__`` and set them one at a time, as the
+  models used to;
+* ``slots``: the slotted model classes with their generated field assignment;
+* ``lazy``: collections built with ``from_json(..., lazy=True)``.
+
+The memory column only counts what is allocated on top of the decoded JSON. The ``dict`` and ``slots`` objects
+let the JSON be freed once they are built, while ``lazy`` objects keep it alive.
+
+It uses ``data/nodes.json`` and synthetic snapshot and metric value payloads::
+
+    python benchmarks/bench_hydration.py [repeat]
+"""
+
+from __future__ import print_function
+
+import json
+import os
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+from appd.model.metric_value import MetricValue, MetricValues
+from appd.model.node import Node, Nodes
+from appd.model.snapshot import Snapshot, Snapshots
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+class _LegacyObject(object):
+
+    @classmethod
+    def from_json(cls, json_dict):
+        obj = cls()
+        for k, v in list(obj.FIELDS.items()):
+            obj.__setattr__(k, json_dict[v or k])
+        return obj
+
+    def _list_setter(self, attr_name, new_val, allowed_vals):
+        if new_val and (new_val not in allowed_vals):
+            raise ValueError(attr_name)
+        self.__setattr__(attr_name, new_val)
+
+
+def legacy(cls):
+    """
+    Copies a model class without its slots and generated code.
+    """
+    namespace = dict((k, v) for k, v in cls.__dict__.items()
+                     if k not in ('__slots__', '_assign_fields', '__dict__', '__weakref__')
+                     and k not in cls.__slots__)
+    return type('Legacy' + cls.__name__, (_LegacyObject,), namespace)
+
+
+def snapshot_payload(i):
+    doc = {}
+    for k, v in Snapshot.FIELDS.items():
+        doc[v or k] = None
+    doc.update({'id': i, 'localID': i, 'requestGUID': '%032x' % i, 'summary': 'Slow request', 'URL': '/checkout',
+                'timeTakenInMilliSecs': i % 5000, 'localStartTime': 1500000000000 + i, 'errorOccured': False})
+    return doc
+
+
+def metric_value_payload(i):
+    return {'current': i, 'value': i, 'min': i, 'max': i, 'startTimeInMillis': 1500000000000 + i * 60000}
+
+
+def measure(build, payloads, fields, number):
+    def run():
+        objects = build(payloads)
+        for obj in objects:
+            for name in fields:
+                getattr(obj, name)
+        return objects
+
+    us = min(timeit.repeat(run, number=number, repeat=5)) / number * 1e6
+    kib = None
+    if tracemalloc:
+        tracemalloc.start()
+        objects = run()
+        kib = tracemalloc.get_traced_memory()[0] / 1024.0
+        tracemalloc.stop()
+        del objects
+    return us, kib
+
+
+def main(number=20):
+    with open(os.path.join(DATA_DIR, 'nodes.json')) as f:
+        nodes = json.load(f)
+    cases = [('nodes.json x200', Node, Nodes, nodes * 200, ('name', 'tier_name')),
+             ('snapshots x2000', Snapshot, Snapshots, [snapshot_payload(i) for i in range(2000)],
+              ('url', 'time_taken_ms')),
+             ('metric values x20000', MetricValue, MetricValues, [metric_value_payload(i) for i in range(20000)],
+              ('value', 'start_time_ms'))]
+
+    print('%-22s %-8s %12s %12s %9s %9s' % ('Payload', 'Model', 'Time (us)', 'Memory (KiB)', 'Speedup', 'Memory'))
+    for name, cls, list_cls, payloads, fields in cases:
+        old_hydrate, new_hydrate = legacy(cls).from_json, cls.from_json
+        old_us, old_kib = measure(lambda p: [old_hydrate(x) for x in p], payloads, fields, number)
+        new_us, new_kib = measure(lambda p: [new_hydrate(x) for x in p], payloads, fields, number)
+        lazy_us, lazy_kib = measure(lambda p: list_cls.from_json(p, lazy=True), payloads, fields, number)
+        for label, us, kib in (('dict', old_us, old_kib), ('slots', new_us, new_kib), ('lazy', lazy_us, lazy_kib)):
+            print('%-22s %-8s %12.0f %12s %8.2fx %8s' % (
+                name, label, us, '%.0f' % kib if kib else '-', old_us / us,
+                '%.0f%%' % (100.0 * kib / old_kib) if kib else '-'))
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:2]])
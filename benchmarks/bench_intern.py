@@ -0,0 +1,98 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Measures how much memory string interning saves on large synthetic payloads. Each payload is encoded and
+decoded again, so that like a real response every repeated string starts out as a separate object. The
+objects are built once with the intern table disabled and once with it enabled, and the memory still in
+use after the decoded JSON has been freed is reported::
+
+    python benchmarks/bench_intern.py [scale]
+
+``scale`` multiplies the number of objects (default 1: 100,000 nodes, 50,000 business transactions, 20,000
+snapshots and 50,000 metrics).
+"""
+
+from __future__ import print_function
+
+import gc
+import json
+import sys
+import tracemalloc
+
+from appd.model import STRINGS
+from appd.model.business_transaction import BusinessTransactions
+from appd.model.metric_data import MetricData
+from appd.model.node import Nodes
+from appd.model.snapshot import Snapshot, Snapshots
+
+TIERS = ['Tier %d' % i for i in range(200)]
+VERSIONS = ['Server Agent v4.5.%d.0 GA #2018-06-%02d' % (i, i + 1) for i in range(8)]
+
+
+def node_payload(i):
+    return {'id': i, 'name': 'node-%d' % i, 'type': 'Tomcat 7', 'machineId': i // 4,
+            'machineName': 'host-%d.example.com' % (i // 4), 'tierId': i % 200, 'tierName': TIERS[i % 200],
+            'nodeUniqueLocalId': '', 'machineOSType': 'Linux', 'appAgentPresent': True,
+            'appAgentVersion': VERSIONS[i % 8], 'machineAgentPresent': True,
+            'machineAgentVersion': VERSIONS[(i + 3) % 8]}
+
+
+def bt_payload(i):
+    return {'id': i, 'name': '/api/v1/resource%d' % i, 'entryPointType': 'SERVLET', 'internalName': 'bt%d' % i,
+            'background': False, 'tierId': i % 200, 'tierName': TIERS[i % 200]}
+
+
+def snapshot_payload(i):
+    doc = dict(((v or k), None) for k, v in Snapshot.FIELDS.items())
+    doc.update({'id': i, 'requestGUID': '%032x' % i, 'summary': 'Request was slower than the threshold',
+                'URL': '/checkout/step%d' % (i % 10), 'threadName': 'http-nio-8080-exec-%d' % (i % 50),
+                'userExperience': 'SLOW', 'timeTakenInMilliSecs': i % 5000})
+    return doc
+
+
+def metric_payload(i):
+    folder = 'Business Transaction Performance|Business Transactions|%s|/api/v1/resource%d|' % (
+        TIERS[i % 200], i // 10)
+    leaf = ['Calls per Minute', 'Average Response Time (ms)', 'Errors per Minute', 'Stall Count',
+            'Number of Slow Calls', 'Number of Very Slow Calls', 'Normal Average Response Time (ms)',
+            '95th Percentile Response Time (ms)', 'Exceptions per Minute', 'Infrastructure Errors per Minute']
+    return {'metricPath': folder + leaf[i % 10], 'frequency': 'ONE_MIN', 'metricValues': []}
+
+
+def measure(list_cls, payloads, interned):
+    STRINGS.clear()
+    STRINGS.max_size = 100000 if interned else 0
+    encoded = json.dumps(payloads)
+    gc.collect()
+    tracemalloc.start()
+    decoded = json.loads(encoded)
+    objects = list_cls.from_json(decoded)
+    del decoded
+    gc.collect()
+    kib = tracemalloc.get_traced_memory()[0] / 1024.0
+    tracemalloc.stop()
+    del objects
+    return kib
+
+
+def main(scale=1):
+    cases = [('nodes', Nodes, [node_payload(i) for i in range(100000 * scale)]),
+             ('business transactions', BusinessTransactions, [bt_payload(i) for i in range(50000 * scale)]),
+             ('snapshots', Snapshots, [snapshot_payload(i) for i in range(20000 * scale)]),
+             ('metric data', MetricData, [metric_payload(i) for i in range(50000 * scale)])]
+
+    max_size = STRINGS.max_size
+    print('%-24s %9s %14s %14s %8s' % ('Payload', 'Objects', 'Plain (KiB)', 'Interned (KiB)', 'Memory'))
+    try:
+        for name, list_cls, payloads in cases:
+            plain, interned = measure(list_cls, payloads, False), measure(list_cls, payloads, True)
+            print('%-24s %9d %14.0f %14.0f %7.0f%%' % (name, len(payloads), plain, interned,
+                                                       100.0 * interned / plain))
+    finally:
+        STRINGS.clear()
+        STRINGS.max_size = max_size
+
+
+if __name__ == '__main__':
+    main(*[int(x) for x in sys.argv[1:2]])
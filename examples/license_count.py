@@ -4,9 +4,9 @@
 from __future__ import print_function
 
 from datetime import datetime
-import itertools
 
 from appd.cmdline import parse_argv
+from appd.model.aggregate import group_by, Count, Derived, First, Sum
 from appd.request import AppDynamicsClient
 
 
@@ -15,10 +15,6 @@ __copyright__ = 'Copyright (c) 2013-2015 AppDynamics Inc.'
 __version__ = '0.4.5'
 
 
-def incr(d, name, amt=1):
-    d[name] = d.get(name, 0) + amt
-
-
 args = parse_argv()
 c = AppDynamicsClient(args.url, args.username, args.password, args.account, args.verbose)
 
@@ -41,35 +37,12 @@ for app in c.get_applications():
             nodes.append(node)
 
 
-# Sort and group the nodes by machine_id.
-
-group_func = lambda x: x.machine_id
-nodes.sort(key=group_func)
-
-host_counts = dict()
-node_counts = dict()
-lic_counts = dict()
-for machine_id, nodes_on_machine_iter in itertools.groupby(nodes, key=group_func):
-
-    nodes_on_machine = list(nodes_on_machine_iter)
-    first_node = nodes_on_machine[0]
-    agent_type = first_node.group_type
-    # types = [x.group_type for x in nodes_on_machine]
-    # all_same = all(x.group_type == agent_type for x in nodes_on_machine)
-    # print all_same, types
-    # assert all_same, first_node
-
-    license_count = 1
-    if 'Java' in agent_type:
-        license_count = len(nodes_on_machine)
-
-    incr(lic_counts, agent_type, license_count)
-    incr(host_counts, agent_type, 1)
-    incr(node_counts, agent_type, len(nodes_on_machine))
+# Group the nodes by machine_id, then group the hosts by agent type. Java agents need a license per node,
+# the others one per host.
 
-    # if '.NET' in agent_type:
-    #     node_names = [x.name for x in nodes_on_machine]
-    #     print 'Host:', first_node.machine_name, '\n\t', '\n\t'.join(node_names)
+hosts = group_by(nodes, 'machine_id', agent_type=First('group_type'), nodes=Count(),
+                 licenses=Derived(lambda host: host['nodes'] if 'Java' in host['agent_type'] else 1))
+by_type = group_by(hosts.values(), 'agent_type', hosts=Count(), nodes=Sum('nodes'), licenses=Sum('licenses'))
 
 
 # Print the results.
@@ -85,9 +58,10 @@ print(header_fmt % ('Node Type', 'Node Count', 'Host Count', 'License Count'))
 print(header_fmt % ('=' * 30, '=' * 15, '=' * 15, '=' * 15))
 
 for node_type in ('Java App Agent', '.NET App Agent', 'PHP App Agent', 'Machine Agent only'):
-    node_count = node_counts.get(node_type, 0)
-    host_count = host_counts.get(node_type, 0)
-    lic_count = lic_counts.get(node_type, 0)
+    counts = by_type.get(node_type, {})
+    node_count = counts.get('nodes', 0)
+    host_count = counts.get('hosts', 0)
+    lic_count = counts.get('licenses', 0)
     tot_nodes += node_count
     tot_hosts += host_count
     tot_licenses += lic_count
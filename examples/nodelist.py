@@ -19,7 +19,7 @@ __version__ = '0.4.5'
 args = parse_argv()
 c = AppDynamicsClient(args.url, args.username, args.password, args.account, args.verbose)
 
-for app in c.get_applications():
-    for node in c.get_nodes(app.id):
+for app, nodes in c.fan_out(c.get_nodes, c.get_applications()):
+    for node in nodes:
         print(','.join([app.name, node.tier_name, node.name, node.machine_name]))
 
@@ -32,8 +32,9 @@ setup(name='AppDynamicsREST',
       packages=['appd','appd.model'],
       platforms='any',
       package_data={'': ['README.md', 'data/*', 'examples/*', 'templates/*']},
-      install_requires=['requests', 'argparse', 'six'],
-      extras_require={'examples': ['lxml', 'tzlocal', 'jinja2'], 'testing': ['nose']},
+      install_requires=['requests', 'argparse', 'six', 'futures; python_version < "3.2"'],
+      extras_require={'examples': ['lxml', 'tzlocal', 'jinja2'], 'testing': ['nose'], 'async': ['aiohttp'],
+                      'numpy': ['numpy']},
       test_suite='nose.collector',
       tests_require=['nose'],
       license='Apache',
@@ -0,0 +1,60 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import json
+import os
+import unittest
+
+from appd.model.aggregate import group_by, Count, CountDistinct, Derived, First, Max, Min, Sum
+from appd.model.node import Node, Nodes
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+class GroupByTest(unittest.TestCase):
+
+    def setUp(self):
+        self.nodes = Nodes([Node(node_id=1, machine_id=10, tier_name='web', node_type='Java', tier_id=1),
+                            Node(node_id=2, machine_id=10, tier_name='web', node_type='Java', tier_id=1),
+                            Node(node_id=3, machine_id=11, tier_name='db', node_type='PHP', tier_id=2),
+                            Node(node_id=4, machine_id=12, tier_name='web', node_type='PHP', tier_id=None)])
+
+    def test_aggregates(self):
+        groups = self.nodes.group_by('tier_name', n=Count(), hosts=CountDistinct('machine_id'), ids=Sum('id'),
+                                     low=Min('id'), high=Max('id'), tier=Count('tier_id'), kind=First('type'))
+        self.assertEqual(list(groups), ['web', 'db'])
+        self.assertEqual(groups['web'], {'n': 3, 'hosts': 2, 'ids': 7, 'low': 1, 'high': 4, 'tier': 2,
+                                         'kind': 'Java'})
+        self.assertEqual(groups['db']['hosts'], 1)
+
+    def test_multiple_and_derived_keys(self):
+        groups = self.nodes.group_by(['tier_name', 'type'], n=Count())
+        self.assertEqual(groups[('web', 'PHP')], {'n': 1})
+        groups = self.nodes.group_by([lambda x: x.id % 2], n=Count())
+        self.assertEqual(groups[(0,)], {'n': 2})
+
+    def test_two_level_rollup(self):
+        hosts = self.nodes.group_by('machine_id', kind=First('type'), nodes=Count(),
+                                    licenses=Derived(lambda row: row['nodes'] if row['kind'] == 'Java' else 1))
+        by_kind = group_by(hosts.values(), 'kind', hosts=Count(), licenses=Sum('licenses'))
+        self.assertEqual(by_kind, {'Java': {'hosts': 1, 'licenses': 2}, 'PHP': {'hosts': 2, 'licenses': 2}})
+
+    def test_matches_sorted_groupby(self):
+        with open(os.path.join(DATA_DIR, 'nodes.json')) as f:
+            nodes = Nodes.from_json(json.load(f))
+        groups = nodes.group_by('tier_name', n=Count())
+        self.assertEqual(sum(x['n'] for x in groups.values()), len(nodes))
+        for tier, row in groups.items():
+            self.assertEqual(row['n'], len(nodes.by_tier_name(tier)))
+
+    def test_empty_and_bad_column(self):
+        self.assertEqual(len(Nodes().group_by('tier_name', n=Count())), 0)
+        self.assertRaises(TypeError, self.nodes.group_by, 'tier_name', n=len)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,151 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import asyncio
+import json
+import unittest
+
+from appd.cache import ResponseCache
+from appd.retry import RetryPolicy
+from test.test_crawler import TREE, leaf_paths
+
+try:
+    from aiohttp import web
+    from aiohttp.test_utils import TestServer
+    from appd.aio import AsyncAppDynamicsClient
+except ImportError:
+    web = None
+
+APPS = [{'id': 1, 'name': 'a', 'description': ''}]
+NODES = [{'id': 5, 'name': 'node-5', 'type': 'Tomcat 7', 'machineId': 1, 'machineName': 'host1', 'tierId': 2,
+          'tierName': 'Web', 'nodeUniqueLocalId': '', 'machineOSType': 'Linux', 'appAgentPresent': True,
+          'appAgentVersion': '4.5.1.0', 'machineAgentPresent': False, 'machineAgentVersion': ''}]
+
+
+@unittest.skipIf(web is None, 'requires aiohttp')
+class AsyncClientTest(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.hits, self.failures, self.delay = {}, 0, 0
+        app = web.Application()
+        app.router.add_get('/controller/rest/applications', self.applications)
+        app.router.add_get('/controller/rest/applications/10/nodes', self.nodes)
+        app.router.add_get('/controller/rest/applications/10/metrics', self.metrics)
+        app.router.add_get('/controller/rest/applications/10/metric-data', self.metric_data)
+        self.server = TestServer(app)
+        await self.server.start_server()
+        self.c = AsyncAppDynamicsClient(base_url=str(self.server.make_url('')).rstrip('/'),
+                                        retry_policy=RetryPolicy(max_retries=3, backoff_factor=0, jitter=False))
+
+    async def asyncTearDown(self):
+        await self.c.close()
+        await self.server.close()
+
+    def hit(self, request):
+        self.hits[request.path] = self.hits.get(request.path, 0) + 1
+
+    async def applications(self, request):
+        self.hit(request)
+        await asyncio.sleep(self.delay)
+        return web.json_response(APPS)
+
+    async def nodes(self, request):
+        self.hit(request)
+        if self.failures:
+            self.failures -= 1
+            return web.Response(status=503)
+        return web.json_response(NODES)
+
+    async def metric_data(self, request):
+        self.hit(request)
+        if self.failures:
+            self.failures -= 1
+            return web.Response(status=503)
+        return web.json_response([{'metricPath': 'OAP|Calls per Minute', 'frequency': 'ONE_MIN',
+                                   'metricValues': [{'startTimeInMillis': 0, 'value': 5, 'min': 5, 'max': 5,
+                                                     'current': 5}]}])
+
+    async def metrics(self, request):
+        self.hit(request)
+        folder = TREE
+        path = request.query.get('metric-path')
+        for name in path.split('|') if path else []:
+            folder = folder[name]
+        return web.Response(text=json.dumps([{'name': k, 'type': 'leaf' if v is None else 'folder'}
+                                             for k, v in sorted(folder.items())]), content_type='application/json')
+
+    async def test_get_requests(self):
+        apps = await self.c.get_applications()
+        nodes = await self.c.get_nodes(10)
+        self.assertEqual((apps[0].name, nodes[0].machine_name), ('a', 'host1'))
+        stats = self.c.pool_stats
+        self.assertEqual((stats.requests, stats.opened, stats.reused), (2, 1, 1))
+
+    async def test_retry(self):
+        self.failures = 2
+        nodes = await self.c.get_nodes(10)
+        self.assertEqual(nodes[0].name, 'node-5')
+        self.assertEqual(self.hits['/controller/rest/applications/10/nodes'], 3)
+        self.assertEqual(self.c.last_retries, 2)
+
+        async def other_task():
+            await self.c.get_applications()
+            return self.c.last_retries
+        self.assertEqual(await asyncio.ensure_future(other_task()), 0)
+        self.assertEqual(self.c.last_retries, 2)
+
+        self.failures = 1
+        metrics = [x async for x in self.c.iter_metrics('OAP|*', 10)]
+        self.assertEqual([x.path for x in metrics], ['OAP|Calls per Minute'])
+        self.assertEqual(self.hits['/controller/rest/applications/10/metric-data'], 2)
+        self.assertEqual(self.c.last_retries, 1)
+
+        self.c.cache = ResponseCache(ttls={r'/nodes$': 60})
+        await self.c.get_nodes(10)
+        self.assertEqual(self.c.last_retries, 0)
+
+    async def test_cache(self):
+        self.c.cache = ResponseCache(ttls={r'/applications$': 0.05}, stale_while_revalidate=60)
+        await self.c.get_applications()
+        await self.c.get_applications()
+        self.assertEqual(self.hits['/controller/rest/applications'], 1)
+
+        await asyncio.sleep(0.1)
+        for _ in range(20):
+            self.assertEqual((await self.c.get_applications())[0].name, 'a')
+        tasks = list(self.c._revalidating.values())
+        await asyncio.gather(*tasks)
+        self.assertEqual((len(tasks), self.hits['/controller/rest/applications']), (1, 2))
+        self.assertEqual(self.c.cache.stale_hits, 20)
+
+    async def test_coalescing(self):
+        self.delay = 0.1
+        results = await asyncio.gather(*[self.c.get_applications() for _ in range(5)])
+        self.assertEqual([x[0].name for x in results], ['a'] * 5)
+        self.assertEqual(self.hits['/controller/rest/applications'], 1)
+        self.assertEqual(self.c._flights.shared, 4)
+
+    async def test_crawl_metric_tree(self):
+        done = []
+        tree = await self.c.crawl_metric_tree(10, progress=lambda d, p: done.append((d, p)))
+        self.assertEqual(len(leaf_paths(tree)), 6)
+        self.assertEqual(self.hits['/controller/rest/applications/10/metrics'], 11)
+        self.assertEqual(done[-1], (10, 0))
+
+        done = []
+        tree = await self.c.crawl_metric_tree(10, 'Business Transaction Performance', max_depth=2,
+                                              progress=lambda d, p: done.append((d, p)))
+        self.assertEqual([x.name for x in tree[0].children], ['Batch', 'Web'])
+        self.assertEqual(len(tree[0].children[0].children), 0)
+        self.assertEqual(done, [(1, 0)])
+
+        index = await self.c.get_metric_index(10, include=['Backends|*|*'])
+        self.assertEqual(index.match('Backends|*|*'), ['Backends|DB|Calls per Minute'])
+
+
+if __name__ == '__main__':
+    unittest.main()
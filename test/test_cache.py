@@ -0,0 +1,149 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+
+from appd.cache import ResponseCache, SQLiteCache
+from appd.request import AppDynamicsClient
+from test.test_retry import FakeSession, make_response
+
+
+class ResponseCacheTest(unittest.TestCase):
+
+    def test_ttls(self):
+        cache = ResponseCache(ttls={r'/nodes/\d+$': 0})
+        self.assertEqual(cache.ttl_for('http://c:8090/controller/rest/applications'), 300)
+        self.assertEqual(cache.ttl_for('http://c:8090/controller/rest/applications/10/tiers/3/nodes'), 300)
+        self.assertIsNone(cache.ttl_for('http://c:8090/controller/rest/applications/10/nodes/7'))
+        self.assertIsNone(cache.ttl_for('http://c:8090/controller/rest/applications/10/metric-data'))
+
+    def test_key_normalizes_params(self):
+        self.assertEqual(ResponseCache.key('u', {'a': 1, 'b': True}), ResponseCache.key('u', {'b': 'True', 'a': '1'}))
+
+    def test_expiry_and_lru(self):
+        cache = ResponseCache(max_size=2)
+        cache.set('a', 1, 60)
+        cache.set('b', 2, 0.01)
+        cache.get('a')
+        cache.set('c', 3, 60)
+        self.assertEqual(cache.evictions, 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+        time.sleep(0.02)
+        self.assertEqual((cache.hits, cache.misses), (2, 1))
+
+    def test_invalidate(self):
+        cache = ResponseCache()
+        cache.set(('http://c/applications/1/nodes', ()), 1, 60)
+        cache.set(('http://c/applications/1/tiers', ()), 2, 60)
+        cache.invalidate('/nodes')
+        self.assertEqual(len(cache), 1)
+        cache.invalidate()
+        self.assertEqual(len(cache), 0)
+
+    def test_client(self):
+        c = AppDynamicsClient(cache=ResponseCache())
+        c._session = FakeSession([make_response(200, '[{"id": 1, "name": "a", "description": ""}]')] * 2)
+        self.assertEqual(c.get_applications()[0].name, 'a')
+        self.assertEqual(c.get_applications()[0].name, 'a')
+        self.assertEqual(c._session.calls, 1)
+        c.cache.invalidate()
+        c.get_applications()
+        self.assertEqual(c._session.calls, 2)
+
+    def test_stale_key_refreshed_once(self):
+        c = AppDynamicsClient(cache=ResponseCache(ttls={r'/applications$': 0.01}, stale_while_revalidate=60))
+        c._session = FakeSession([make_response(200, '[{"id": 1, "name": "a", "description": ""}]')] * 2)
+        c.get_applications()
+        time.sleep(0.02)
+        released = threading.Event()
+        request = c._session.request
+        c._session.request = lambda *args, **kwargs: released.wait() and request(*args, **kwargs)
+        for _ in range(20):
+            self.assertEqual(c.get_applications()[0].name, 'a')
+        threads = list(c._revalidating.values())
+        released.set()
+        for t in threads:
+            t.join()
+        self.assertEqual((len(threads), c._session.calls, c.cache.stale_hits), (1, 2, 20))
+        self.assertEqual(c._revalidating, {})
+
+
+class SQLiteCacheTest(unittest.TestCase):
+
+    APPS = '[{"id": 1, "name": "a", "description": ""}]'
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'cache.db')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_persists_across_instances(self):
+        SQLiteCache(self.path).set(('u', ()), {'x': [1, 2]}, 60, etag='"abc"')
+        cache = SQLiteCache(self.path)
+        entry = cache.lookup(('u', ()))
+        self.assertEqual(entry.value, {'x': [1, 2]})
+        self.assertEqual(entry.validators, {'If-None-Match': '"abc"'})
+        self.assertEqual(len(cache), 1)
+        cache.invalidate('u')
+        self.assertEqual(len(cache), 0)
+
+    def test_lru_eviction(self):
+        cache = SQLiteCache(self.path, max_size=2)
+        for k in 'abc':
+            cache.set((k, ()), k, 60)
+            time.sleep(0.01)
+        self.assertEqual((len(cache), cache.evictions), (2, 1))
+        self.assertIsNone(cache.get(('a', ())))
+
+    def test_one_connection_for_all_threads(self):
+        cache = SQLiteCache(self.path)
+        threads = [threading.Thread(target=cache.set, args=((str(i), ()), i, 60)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(cache), 8)
+        self.assertEqual(cache.get(('3', ())), 3)
+        cache.close()
+        self.assertRaises(sqlite3.ProgrammingError, len, cache)
+
+    def test_conditional_revalidation(self):
+        c = AppDynamicsClient(cache=SQLiteCache(self.path, ttls={r'/applications$': 0.01}))
+        c._session = FakeSession([make_response(200, self.APPS, {'ETag': '"v1"'}), make_response(304)])
+        c.get_applications()
+        time.sleep(0.02)
+        self.assertEqual(c.get_applications()[0].name, 'a')
+        self.assertEqual(c._session.kwargs['headers'], {'If-None-Match': '"v1"'})
+        self.assertEqual(c.cache.revalidations, 1)
+
+    def test_stale_while_revalidate(self):
+        # The refreshed entry must still be fresh when it is read back, or it would be served stale again.
+        c = AppDynamicsClient(cache=SQLiteCache(self.path, ttls={r'/applications$': 0.5},
+                                                stale_while_revalidate=60))
+        c._session = FakeSession([make_response(200, self.APPS),
+                                  make_response(200, self.APPS.replace('"a"', '"b"'))])
+        c.get_applications()
+        time.sleep(0.6)
+        self.assertEqual(c.get_applications()[0].name, 'a')
+        for t in threading.enumerate():
+            if t is not threading.current_thread():
+                t.join()
+        self.assertEqual(c.get_applications()[0].name, 'b')
+        self.assertEqual(c.cache.stale_hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import json
+import os
+import unittest
+
+from six import StringIO
+
+from appd.model.aggregate import Count, CountDistinct
+from appd.model.columnar import ColumnarList
+from appd.model.metric_data import MetricDataSingle
+from appd.model.node import Node, Nodes
+from appd.model.query import F
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+class ColumnarListTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(DATA_DIR, 'nodes.json')) as f:
+            self.json = json.load(f)
+        self.nodes = Nodes.from_json(self.json)
+        self.columns = ColumnarList.from_json(Node, self.json, Nodes)
+
+    def test_columns(self):
+        self.assertEqual(len(self.columns), len(self.json))
+        self.assertEqual(list(self.columns.columns['id']), [x['id'] for x in self.json])
+        names = self.columns.columns['tier_name']
+        same = [i for i, x in enumerate(self.json) if x['tierName'] == self.json[0]['tierName']]
+        self.assertIsNot(self.json[same[0]]['tierName'], self.json[same[1]]['tierName'])
+        self.assertIs(names[same[0]], names[same[1]])
+        self.assertRaises(TypeError, ColumnarList.from_json, MetricDataSingle, [])
+
+    def test_rows(self):
+        self.assertEqual(str(self.columns[3]), str(self.nodes[3]))
+        self.assertEqual([x.id for x in self.columns[2:5]], [x.id for x in self.nodes[2:5]])
+        as_list = self.columns.to_list()
+        self.assertIsInstance(as_list, Nodes)
+        self.assertEqual(len(as_list.by_tier_name('Product')), len(self.nodes.by_tier_name('Product')))
+
+    def test_where(self):
+        predicate = (F('tier_name') == 'Product') & (F('id') > 40)
+        found = self.columns.where(predicate)
+        self.assertEqual([x.id for x in found], [x.id for x in self.nodes.query().where(predicate)])
+        self.assertEqual(len(self.columns.where(F('id') < 0)), 0)
+
+    def test_group_by(self):
+        self.assertEqual(self.columns.group_by('tier_name', n=Count(), hosts=CountDistinct('machine_id')),
+                         self.nodes.group_by('tier_name', n=Count(), hosts=CountDistinct('machine_id')))
+        groups = self.columns.group_by([F('name').map(len)], n=Count())
+        self.assertEqual(sum(x['n'] for x in groups.values()), len(self.json))
+        self.assertRaises(TypeError, self.columns.group_by, len, n=Count())
+
+    def test_export(self):
+        rows = self.columns.to_dicts('id', 'name')
+        self.assertEqual(rows[0], {'id': self.json[0]['id'], 'name': self.json[0]['name']})
+        f = StringIO()
+        self.columns[:2].to_csv(f, 'id', 'tier_name')
+        self.assertEqual(f.getvalue().splitlines(), ['id,tier_name'] + ['{0},{1}'.format(x['id'], x['tierName'])
+                                                                        for x in self.json[:2]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import unittest
+
+from appd.crawler import MetricTreeCrawler
+from appd.model.metric_treenode import CompactMetricTree
+from test.test_crawler import TREE, FakeClient, leaf_paths
+
+
+class CompactMetricTreeTest(unittest.TestCase):
+
+    def setUp(self):
+        self.nodes = MetricTreeCrawler(FakeClient(TREE), 10).crawl()
+        self.tree = CompactMetricTree.from_nodes(self.nodes)
+
+    def test_from_nodes(self):
+        self.assertEqual(len(self.tree), 16)
+        self.assertEqual(sorted(self.tree.leaf_paths()), sorted(leaf_paths(self.nodes)))
+        self.assertEqual(self.tree.names.count('Calls per Minute'), 1)
+        self.assertEqual([x.name for x in self.tree.roots()], [x.name for x in self.nodes])
+
+    def test_node_view(self):
+        node = self.tree.find('Business Transaction Performance|Business Transactions|Web|Checkout')
+        self.assertEqual(node.type, 'folder')
+        self.assertEqual([x.name for x in node.children], ['Calls per Minute', 'Errors per Minute'])
+        self.assertEqual(node.children[0].path, node.path + '|Calls per Minute')
+        self.assertEqual(node.children[0].parent, node)
+        self.assertEqual(node.parent.name, 'Web')
+        self.assertIsNone(self.tree.find('Backends').parent)
+        self.assertRaises(KeyError, self.tree.find, 'Backends|Nope')
+
+    def test_add(self):
+        tree = CompactMetricTree(cache_paths=False)
+        folder = tree.add('Backends', 'folder')
+        tree.add('Calls per Minute', 'leaf', folder)
+        self.assertEqual(list(tree.leaf_paths()), ['Backends|Calls per Minute'])
+        self.assertEqual(tree.find('Backends|Calls per Minute').index, 1)
+        self.assertRaises(ValueError, tree.add, 'x', 'file')
+        self.assertRaises(IndexError, tree.add, 'x', 'leaf', 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import copy
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+from appd.crawler import MetricTreeCrawler, MetricTreeSnapshot
+from appd.model.metric_treenode import MetricTreeNodes
+
+TREE = {
+    'Business Transaction Performance': {
+        'Business Transactions': {
+            'Web': {'Checkout': {'Calls per Minute': None, 'Errors per Minute': None},
+                    '_APPDYNAMICS_DEFAULT_TX_': {'Calls per Minute': None}},
+            'Batch': {'Nightly': {'Calls per Minute': None}},
+        },
+    },
+    'Backends': {'DB': {'Calls per Minute': None}},
+    'Overall Application Performance': {'Calls per Minute': None},
+}
+
+
+class FakeClient(object):
+
+    def __init__(self, tree):
+        self.tree, self.paths = tree, []
+        self._lock = threading.Lock()
+
+    def _get_metric_tree(self, app_id=None, parent=None, recurse=False):
+        path = parent.path if parent else ''
+        with self._lock:
+            self.paths.append(path)
+        folder = self.tree
+        for name in path.split('|') if path else []:
+            folder = folder[name]
+        return MetricTreeNodes.from_json([{'name': k, 'type': 'leaf' if v is None else 'folder'}
+                                          for k, v in sorted(folder.items())], parent)
+
+
+def leaf_paths(nodes):
+    paths = []
+    for node in nodes:
+        paths.extend(leaf_paths(node.children) if node.type == 'folder' else [node.path])
+    return paths
+
+
+class MetricTreeCrawlerTest(unittest.TestCase):
+
+    def test_full_tree(self):
+        client = FakeClient(TREE)
+        tree = MetricTreeCrawler(client, 10).crawl()
+        self.assertEqual(len(leaf_paths(tree)), 6)
+        self.assertEqual(len(client.paths), 11)
+        checkout = tree.by_name('Business Transaction Performance').children.by_name('Business Transactions')\
+            .children.by_name('Web').children.by_name('Checkout')
+        self.assertEqual(checkout.children[0].path,
+                         'Business Transaction Performance|Business Transactions|Web|Checkout|Calls per Minute')
+
+    def test_start_path_and_depth(self):
+        client = FakeClient(TREE)
+        tree = MetricTreeCrawler(client, 10, max_depth=2).crawl('Business Transaction Performance')
+        self.assertEqual([x.name for x in tree[0].children], ['Batch', 'Web'])
+        self.assertEqual(len(tree[0].children[0].children), 0)
+
+    def test_include_exclude(self):
+        client = FakeClient(TREE)
+        done = []
+        tree = MetricTreeCrawler(client, 10,
+                                 include=['Business Transaction Performance|Business Transactions|*|*|Calls*'],
+                                 exclude=['*|*|*|_APPDYNAMICS_DEFAULT_TX_'],
+                                 progress=lambda d, p: done.append((d, p))).crawl()
+        self.assertEqual(sorted(leaf_paths(tree)), [
+            'Business Transaction Performance|Business Transactions|Batch|Nightly|Calls per Minute',
+            'Business Transaction Performance|Business Transactions|Web|Checkout|Calls per Minute'])
+        self.assertNotIn('Backends', client.paths)
+        self.assertEqual(done[-1], (len(client.paths) - 1, 0))
+
+
+class MetricTreeSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_save_and_load(self):
+        snapshot = MetricTreeCrawler(FakeClient(TREE), 10).snapshot()
+        for name in ('tree.json', 'tree.json.gz'):
+            path = os.path.join(self.dir, name)
+            snapshot.save(path)
+            loaded = MetricTreeSnapshot.load(path)
+            self.assertEqual(loaded.app_id, 10)
+            self.assertEqual(sorted(loaded.paths()), sorted(snapshot.paths()))
+            self.assertEqual(sorted(leaf_paths(loaded.nodes)), sorted(leaf_paths(snapshot.nodes)))
+
+    def test_refresh(self):
+        tree = copy.deepcopy(TREE)
+        snapshot = MetricTreeCrawler(FakeClient(tree), 10).snapshot()
+        path = os.path.join(self.dir, 'tree.json')
+        snapshot.save(path)
+
+        # Nothing is fetched while the snapshot is younger than the TTL.
+        client = FakeClient(tree)
+        snapshot = MetricTreeSnapshot.load(path)
+        self.assertEqual(MetricTreeCrawler(client, 10).refresh(snapshot, ttl=3600), ([], []))
+        self.assertEqual(client.paths, [])
+
+        tree['Backends']['Cache'] = {'Calls per Minute': None}
+        del tree['Business Transaction Performance']['Business Transactions']['Web']
+        client = FakeClient(tree)
+        added, removed = MetricTreeCrawler(client, 10).refresh(snapshot, ttl=0)
+        self.assertEqual(added, ['Backends|Cache', 'Backends|Cache|Calls per Minute'])
+        self.assertEqual(removed, [
+            'Business Transaction Performance|Business Transactions|Web',
+            'Business Transaction Performance|Business Transactions|Web|Checkout',
+            'Business Transaction Performance|Business Transactions|Web|Checkout|Calls per Minute',
+            'Business Transaction Performance|Business Transactions|Web|Checkout|Errors per Minute',
+            'Business Transaction Performance|Business Transactions|Web|_APPDYNAMICS_DEFAULT_TX_',
+            'Business Transaction Performance|Business Transactions|Web|_APPDYNAMICS_DEFAULT_TX_|Calls per Minute'])
+        self.assertIn('Backends|Cache|Calls per Minute', leaf_paths(snapshot.nodes))
+        self.assertEqual(sorted(snapshot.paths()), sorted(MetricTreeCrawler(FakeClient(tree), 10).snapshot().paths()))
+
+
+if __name__ == '__main__':
+    unittest.main()
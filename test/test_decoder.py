@@ -0,0 +1,67 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import unittest
+
+from appd import decoder
+from appd.request import AppDynamicsClient
+from test.test_retry import FakeSession, make_response
+
+
+def missing():
+    raise ImportError('not installed')
+
+
+class DecoderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.backends = decoder.BACKENDS
+
+    def tearDown(self):
+        decoder.BACKENDS = self.backends
+
+    def test_preference_order(self):
+        fast, slow = lambda raw: 'fast', lambda raw: 'slow'
+        decoder.BACKENDS = (('a', missing), ('b', lambda: fast), ('c', lambda: slow))
+        self.assertEqual(decoder.available_decoders(), ['b', 'c'])
+        self.assertIs(decoder.get_decoder(), fast)
+        self.assertIs(decoder.get_decoder('c'), slow)
+        self.assertRaises(ImportError, decoder.get_decoder, 'a')
+
+    def test_falls_back_to_json(self):
+        decoder.BACKENDS = tuple((name, missing if name != 'json' else loader)
+                                 for name, loader in self.backends)
+        self.assertEqual(decoder.available_decoders(), ['json'])
+        decode = decoder.get_decoder()
+        self.assertEqual(decode(u'{"a": [1, "\xe9"]}'.encode('utf-8')),
+                         {'a': [1, u'\xe9']})
+        self.assertEqual(decode(u'[true, null]'), [True, None])
+
+    def test_unknown_name(self):
+        self.assertRaises(ValueError, decoder.get_decoder, 'bogus')
+        self.assertRaises(ValueError, AppDynamicsClient, json_decoder='bogus')
+
+    def test_every_available_decoder(self):
+        for name in decoder.available_decoders():
+            self.assertEqual(decoder.get_decoder(name)(b'[{"id": 1, "name": "a"}]'), [{'id': 1, 'name': 'a'}])
+
+    def test_client_accepts_function(self):
+        seen = []
+
+        def decode(raw):
+            seen.append(raw)
+            return decoder.get_decoder('json')(raw)
+
+        c = AppDynamicsClient(json_decoder=decode)
+        c._session = FakeSession([make_response(200, '[{"id": 1, "name": "a", "description": ""}]')])
+        self.assertEqual(c.get_applications()[0].name, 'a')
+        self.assertEqual(len(seen), 1)
+        self.assertIsInstance(seen[0], bytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
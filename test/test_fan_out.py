@@ -0,0 +1,47 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import time
+import unittest
+
+from appd.request import AppDynamicsClient
+from appd.model.application import Application
+
+
+class FanOutTest(unittest.TestCase):
+
+    def setUp(self):
+        self.c = AppDynamicsClient()
+
+    def test_results_paired_with_apps(self):
+        apps = [Application(app_id=i, name='app%d' % i) for i in range(10)]
+        results = dict((app.name, result) for app, result in
+                       self.c.fan_out(lambda app_id, scale: app_id * scale, apps, scale=3))
+        self.assertEqual(results, dict(('app%d' % i, i * 3) for i in range(10)))
+
+    def test_calls_run_concurrently(self):
+        start = time.time()
+        results = list(self.c.fan_out(lambda app_id: time.sleep(0.2), range(8), max_workers=8))
+        self.assertEqual(len(results), 8)
+        self.assertLess(time.time() - start, 1.0)
+
+    def test_exceptions(self):
+        def func(app_id):
+            if app_id == 2:
+                raise ValueError(app_id)
+            return app_id
+
+        with self.assertRaises(ValueError):
+            list(self.c.fan_out(func, [1, 2, 3]))
+
+        results = dict(self.c.fan_out(func, [1, 2, 3], return_exceptions=True))
+        self.assertEqual(results[1], 1)
+        self.assertIsInstance(results[2], ValueError)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import unittest
+
+from appd.crawler import MetricTreeCrawler
+from appd.metric_index import MetricPathIndex
+from appd.model.metric_treenode import CompactMetricTree
+from test.test_crawler import TREE, FakeClient, leaf_paths
+
+BTS = 'Business Transaction Performance|Business Transactions'
+
+
+class MetricPathIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.nodes = MetricTreeCrawler(FakeClient(TREE), 10).crawl()
+        self.index = MetricPathIndex.from_tree(self.nodes)
+
+    def test_from_tree(self):
+        self.assertEqual(len(self.index), 6)
+        self.assertIn('Backends|DB|Calls per Minute', self.index)
+        self.assertNotIn('Backends|DB', self.index)
+        compact = MetricPathIndex.from_tree(CompactMetricTree.from_nodes(self.nodes))
+        self.assertEqual(compact.search(''), sorted(leaf_paths(self.nodes)))
+
+    def test_partial_tree(self):
+        nodes = MetricTreeCrawler(FakeClient(TREE), 10).crawl('Backends')
+        self.assertEqual(MetricPathIndex.from_tree(nodes).match('Backends|*|*'), ['Backends|DB|Calls per Minute'])
+
+    def test_match(self):
+        self.assertEqual(self.index.match(BTS + '|*|*|Calls*'), [
+            BTS + '|Batch|Nightly|Calls per Minute',
+            BTS + '|Web|Checkout|Calls per Minute',
+            BTS + '|Web|_APPDYNAMICS_DEFAULT_TX_|Calls per Minute'])
+        self.assertEqual(self.index.match(BTS + '|*'), [])
+        self.assertEqual(self.index.match('Nope|*'), [])
+
+    def test_search(self):
+        self.assertEqual(self.index.search(r'\|Checkout\|'), [BTS + '|Web|Checkout|Calls per Minute',
+                                                              BTS + '|Web|Checkout|Errors per Minute'])
+
+    def test_plan(self):
+        pattern = BTS + '|*|*|*'
+        self.assertEqual(self.index.plan(pattern), self.index.match(pattern))
+        self.assertEqual(self.index.plan(pattern, max_queries=2), [BTS + '|Batch|*|*', BTS + '|Web|*|*'])
+        self.assertEqual(self.index.plan(pattern, max_queries=3), [BTS + '|Batch|Nightly|*',
+                                                                   BTS + '|Web|Checkout|*',
+                                                                   BTS + '|Web|_APPDYNAMICS_DEFAULT_TX_|*'])
+        self.assertEqual(self.index.plan('Nope|*'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import unittest
+
+from appd.model import metric_value
+from appd.model.metric_data import ColumnarMetricData
+from appd.model.metric_value import ColumnarMetricValues, MetricValue
+
+MIN = 60 * 1000
+JSON = [{'startTimeInMillis': i * MIN, 'value': v, 'min': v - 1, 'max': v + 1, 'current': v}
+        for i, v in enumerate([5, 9, 2, 9, 4])]
+
+
+class ColumnarMetricValuesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.values = ColumnarMetricValues.from_json(JSON)
+
+    def test_facade(self):
+        self.assertEqual(len(self.values), 5)
+        v = self.values[1]
+        self.assertIsInstance(v, MetricValue)
+        self.assertEqual((v.start_time_ms, v.value, v.min, v.max, v.current), (MIN, 9, 8, 10, 9))
+        self.assertEqual([x.value for x in self.values], [5, 9, 2, 9, 4])
+        self.assertEqual([x.value for x in self.values.to_list()], [5, 9, 2, 9, 4])
+        self.assertEqual(self.values[-1].value, 4)
+
+    def test_aggregates(self):
+        self.assertEqual(self.values.sum(), 29)
+        self.assertAlmostEqual(self.values.mean(), 5.8)
+        self.assertEqual(self.values.max('max'), 10)
+        self.assertEqual(self.values.argmax(), 1)
+        self.assertRaises(ValueError, self.values.sum, 'median')
+        self.assertRaises(ValueError, ColumnarMetricValues().mean)
+
+    def test_between(self):
+        window = self.values.between(MIN, 3 * MIN)
+        self.assertIsInstance(window, ColumnarMetricValues)
+        self.assertEqual([x.value for x in window], [9, 2])
+        self.assertEqual(len(self.values.between(start_ms=90 * 1000)), 3)
+        self.assertEqual(len(self.values.between(end_ms=0)), 0)
+
+    def test_non_integer_values(self):
+        values = ColumnarMetricValues.from_json([dict(x, value=x['value'] + 0.25) for x in JSON])
+        self.assertEqual([x.value for x in values], [5.25, 9.25, 2.25, 9.25, 4.25])
+        self.assertEqual(values[0].start_time_ms, 0)
+        self.assertIsInstance(values[0].start_time_ms, int)
+        self.assertAlmostEqual(values.sum(), 30.25)
+        self.assertAlmostEqual(values.mean(), 6.05)
+        self.assertEqual(values.max(), 9.25)
+        self.assertEqual(values.max('max'), 10)
+
+    def test_without_numpy(self):
+        saved, metric_value.numpy = metric_value.numpy, None
+        try:
+            self.setUp()
+            self.test_aggregates()
+            self.test_between()
+            self.test_non_integer_values()
+        finally:
+            metric_value.numpy = saved
+
+    def test_metric_data(self):
+        data = ColumnarMetricData.from_json([{'metricPath': 'a|b', 'frequency': 'ONE_MIN', 'metricValues': JSON}])
+        self.assertIsInstance(data[0].values, ColumnarMetricValues)
+        self.assertEqual(data.by_path('a|b')[0].values.sum(), 29)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import threading
+import time
+import unittest
+
+from appd.metric_index import BatchPlan, MetricPathIndex, path_matches
+from appd.model.metric_data import MetricData
+from appd.request import AppDynamicsClient
+
+PATHS = ['Backends|DB|Calls per Minute', 'Backends|DB|Errors per Minute', 'Backends|DB|Average Response Time (ms)',
+         'Backends|Cache|Calls per Minute', 'Overall Application Performance|Calls per Minute']
+
+
+class FakeMetricsClient(AppDynamicsClient):
+
+    def __init__(self, paths, delay=0):
+        super(FakeMetricsClient, self).__init__()
+        self.paths, self.delay, self.queries = paths, delay, []
+        self._lock = threading.Lock()
+
+    def get_metrics(self, metric_path, app_id=None, *args):
+        with self._lock:
+            self.queries.append(metric_path)
+        time.sleep(self.delay)
+        return MetricData.from_json([{'metricPath': p, 'frequency': 'ONE_MIN', 'metricValues': []}
+                                     for p in self.paths if path_matches(metric_path, p)])
+
+
+class BatchPlanTest(unittest.TestCase):
+
+    def test_merge_siblings(self):
+        plan = BatchPlan(['Backends|DB|Calls per Minute', 'Backends|DB|Errors per Minute',
+                          'Backends|DB|Calls per Minute', 'Backends|Cache|Calls per Minute'])
+        self.assertEqual(plan.queries, ['Backends|DB|*', 'Backends|Cache|Calls per Minute'])
+        self.assertTrue(plan.wanted('Backends|DB|Errors per Minute'))
+        self.assertFalse(plan.wanted('Backends|DB|Average Response Time (ms)'))
+
+    def test_patterns(self):
+        plan = BatchPlan(['Backends|*|Calls per Minute'])
+        self.assertEqual(plan.queries, ['Backends|*|Calls per Minute'])
+        self.assertTrue(plan.wanted('Backends|Cache|Calls per Minute'))
+
+        plan = BatchPlan(['Backends|*|Calls per Minute'], index=MetricPathIndex(PATHS), min_merge=3)
+        self.assertEqual(plan.queries, ['Backends|Cache|Calls per Minute', 'Backends|DB|Calls per Minute'])
+
+
+class GetMetricsBatchTest(unittest.TestCase):
+
+    def test_batch(self):
+        c = FakeMetricsClient(PATHS)
+        data = c.get_metrics_batch(['Backends|DB|Calls per Minute', 'Backends|DB|Errors per Minute',
+                                    'Backends|*|Calls per Minute', 'Overall Application Performance|*'], 10)
+        self.assertEqual(sorted(c.queries), ['Backends|*|Calls per Minute', 'Backends|DB|*',
+                                             'Overall Application Performance|*'])
+        self.assertEqual(sorted(x.path for x in data), sorted(set(PATHS) - {PATHS[2]}))
+
+    def test_concurrent(self):
+        c = FakeMetricsClient(PATHS, delay=0.2)
+        start = time.time()
+        data = c.get_metrics_batch(PATHS, 10, min_merge=10)
+        self.assertEqual(len(data), 5)
+        self.assertLess(time.time() - start, 0.6)
+
+
+if __name__ == '__main__':
+    unittest.main()
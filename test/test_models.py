@@ -0,0 +1,219 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import json
+import os
+import threading
+import unittest
+
+from appd.model import InternTable
+from appd.model.application import Application, Applications
+from appd.model.metric_data import MetricData, MetricDataSingle
+from appd.model.metric_treenode import MetricTreeNode
+from appd.model.node import Node, Nodes
+from appd.model.snapshot import Snapshot, Snapshots
+from appd.model.tier import Tier
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+class SlottedModelTest(unittest.TestCase):
+
+    def test_slots(self):
+        app = Application.from_json({'id': 3, 'name': 'a', 'description': ''})
+        self.assertFalse(hasattr(app, '__dict__'))
+        self.assertEqual((app.id, app.name), (3, 'a'))
+        self.assertRaises(AttributeError, setattr, app, 'color', 'red')
+        self.assertEqual(str(app), "<Application: description='', id=3, name='a'>")
+
+    def test_nodes_accept_extra_attributes(self):
+        with open(os.path.join(DATA_DIR, 'nodes.json')) as f:
+            nodes = Nodes.from_json(json.load(f))
+        node = nodes[0]
+        self.assertEqual((node.machine_name, node.tier_id), ('WIN-DEMO2', 10))
+        node.group_type = 'Java App Agent'
+        self.assertIn("group_type='Java App Agent'", str(node))
+
+    def test_property_setters_still_validate(self):
+        json_dict = {'metricPath': 'a|b', 'frequency': 'TWO_MIN', 'metricValues': []}
+        self.assertRaises(ValueError, MetricDataSingle.from_json, json_dict)
+        tier = Tier.from_json({'id': 1, 'name': 't', 'description': '', 'type': 'Java', 'numberOfNodes': 2,
+                               'agentType': 'APP_AGENT'})
+        self.assertEqual(tier.agent_type, 'APP_AGENT')
+
+    def test_keyword_field(self):
+        snapshot = Snapshot.from_json(dict((v or k, k) for k, v in Snapshot.FIELDS.items()))
+        self.assertEqual(getattr(snapshot, 'async'), 'async')
+        self.assertEqual(snapshot.time_taken_ms, 'time_taken_ms')
+
+    def test_from_json_skips_init(self):
+        def fail(self, *args, **kwargs):
+            raise AssertionError('__init__ called')
+        init, Snapshot.__init__ = Snapshot.__init__, fail
+        try:
+            Snapshot.from_json(dict((v or k, None) for k, v in Snapshot.FIELDS.items()))
+        finally:
+            Snapshot.__init__ = init
+        with open(os.path.join(DATA_DIR, 'nodes.json')) as f:
+            node = Node.from_json(json.load(f)[0])
+        self.assertEqual(node.unique_local_id, '')
+        self.assertEqual(len(MetricTreeNode.from_json({'name': 'a', 'type': 'leaf'}).children), 0)
+
+
+class LazyHydrationTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(DATA_DIR, 'nodes.json')) as f:
+            self.json = json.load(f)
+
+    def test_items_built_on_access(self):
+        nodes = Nodes.from_json(self.json, lazy=True)
+        self.assertEqual(len(nodes), len(self.json))
+        self.assertIsInstance(list.__getitem__(nodes.data, 1), dict)
+        node = nodes[1]
+        self.assertIsInstance(node, Node)
+        self.assertIs(nodes[1], node)
+        self.assertIsInstance(list.__getitem__(nodes.data, 2), dict)
+        self.assertEqual([x.id for x in nodes], [x['id'] for x in self.json])
+        self.assertEqual(len(nodes.by_tier_name('Fedex Service')), len(Nodes(self.json).by_tier_name('Fedex Service')))
+
+    def test_fields_copied_on_first_access(self):
+        node = Nodes.from_json(self.json, lazy=True)[0]
+        self.assertEqual(node._json, self.json[0])
+        self.assertEqual(node.machine_name, 'WIN-DEMO2')
+        self.assertEqual(object.__getattribute__(node, 'machine_name'), 'WIN-DEMO2')
+        self.assertRaises(AttributeError, object.__getattribute__, node, 'tier_id')
+
+    def test_full_hydration_keeps_assigned_values(self):
+        node = Nodes.from_json(self.json, lazy=True)[0]
+        node.type = 'Machine Agent'
+        self.assertEqual(node.unique_local_id, '')
+        self.assertFalse(hasattr(node, '_json'))
+        self.assertEqual((node.type, node.tier_id), ('Machine Agent', 10))
+        self.assertRaises(AttributeError, getattr, node, 'nope')
+
+    def test_nested_and_validated(self):
+        data = MetricData.from_json([{'metricPath': 'a|b', 'frequency': 'ONE_MIN',
+                                      'metricValues': [{'current': 1, 'value': 1, 'min': 1, 'max': 1,
+                                                        'startTimeInMillis': 0}]}], lazy=True)
+        self.assertEqual(data[0].frequency, 'ONE_MIN')
+        self.assertEqual(data[0].values[0].value, 1)
+        self.assertEqual(data.by_path('a|b')[0].path, 'a|b')
+
+    def test_list_methods(self):
+        snapshots = Snapshots.from_json([{'id': i, 'URL': '/u%d' % i} for i in range(3)], lazy=True)
+        self.assertEqual([x.url for x in reversed(snapshots)], ['/u2', '/u1', '/u0'])
+        self.assertEqual([x.id for x in snapshots[1:]], [1, 2])
+        first = snapshots[0]
+        self.assertIn(first, snapshots)
+        self.assertEqual(snapshots.index(first), 0)
+
+    def test_concurrent_access(self):
+        nodes = Nodes.from_json(self.json * 20, lazy=True)
+        seen, errors = [], []
+
+        def read():
+            try:
+                for i, node in enumerate(nodes):
+                    seen.append((i, id(node), node.tier_id, node.unique_local_id, node.name))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=read) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        expected = dict((i, (id(x), x.tier_id, '', x.name)) for i, x in enumerate(nodes))
+        for entry in seen:
+            self.assertEqual(entry[1:], expected[entry[0]])
+
+
+class CollectionIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(DATA_DIR, 'nodes.json')) as f:
+            self.json = json.load(f)
+        self.nodes = Nodes.from_json(self.json)
+
+    def test_lookups(self):
+        tier_id = self.json[0]['tierId']
+        found = self.nodes.by_tier_id(tier_id)
+        self.assertIsInstance(found, Nodes)
+        self.assertEqual([x.id for x in found], [x['id'] for x in self.json if x['tierId'] == tier_id])
+        self.assertEqual(len(self.nodes.by_machine_name('WIN-DEMO2')),
+                         len([x for x in self.json if x['machineName'] == 'WIN-DEMO2']))
+        self.assertEqual(len(self.nodes.by_tier_id(-1)), 0)
+
+    def test_index_reused_and_invalidated(self):
+        self.nodes.by_tier_id(self.json[0]['tierId'])
+        index = self.nodes._index('tier_id')
+        self.assertIs(self.nodes._index('tier_id'), index)
+
+        node = Node(node_id=999, tier_id=-1)
+        self.nodes.append(node)
+        self.assertEqual(list(self.nodes.by_tier_id(-1)), [node])
+        self.nodes.remove(node)
+        self.assertEqual(len(self.nodes.by_tier_id(-1)), 0)
+
+        self.nodes.data.append(node)
+        self.assertEqual(list(self.nodes.by_tier_id(-1)), [node])
+
+        node.tier_id = -2
+        self.nodes.invalidate_indexes()
+        self.assertEqual(list(self.nodes.by_tier_id(-2)), [node])
+
+    def test_multi_key_and_first_match(self):
+        apps = Applications([Application(1, 'a'), Application(2, 'b'), Application(3, 'a')])
+        self.assertEqual(apps.by_name('a').id, 1)
+        self.assertRaises(KeyError, apps.by_name, 'c')
+        self.assertEqual(apps._lookup(('name', 'id'), ('a', 3)), [apps[2]])
+
+
+class InternTest(unittest.TestCase):
+
+    def setUp(self):
+        with open(os.path.join(DATA_DIR, 'nodes.json')) as f:
+            self.json = json.load(f)
+
+    def test_bounded_table(self):
+        table = InternTable(max_size=2)
+        a, b = ''.join(['ti', 'er']), ''.join(['ti', 'er'])
+        self.assertIsNot(a, b)
+        self.assertIs(table.intern(a), a)
+        self.assertIs(table.intern(b), a)
+        self.assertIsNone(table.intern(None))
+        self.assertEqual(table.intern([1]), [1])
+        table.intern('x')
+        c = ''.join(['y', 'z'])
+        self.assertIs(table.intern(c), c)
+        self.assertEqual(len(table), 2)
+        table.clear()
+        self.assertEqual(len(table), 0)
+
+    def test_interned_fields(self):
+        for nodes in (Nodes.from_json(self.json), Nodes.from_json(self.json, lazy=True)):
+            self.assertIsNot(self.json[0]['tierName'], self.json[1]['tierName'])
+            same = [x for x in nodes if x.tier_name == nodes[0].tier_name]
+            self.assertIs(same[0].tier_name, same[1].tier_name)
+            self.assertIs(nodes[0].app_agent_version, nodes[1].app_agent_version)
+
+    def test_metric_path_parts(self):
+        md = MetricData.from_json([{'metricPath': 'A|B|Calls', 'frequency': 'ONE_MIN', 'metricValues': []},
+                                   {'metricPath': 'A|B|Errors', 'frequency': 'ONE_MIN', 'metricValues': []},
+                                   {'metricPath': 'Top', 'frequency': 'ONE_MIN', 'metricValues': []}])
+        self.assertEqual([x.path for x in md], ['A|B|Calls', 'A|B|Errors', 'Top'])
+        self.assertIs(md[0]._folder, md[1]._folder)
+        self.assertEqual([x.path for x in md.by_leaf_name('Errors')], ['A|B|Errors'])
+        md[2].path = 'C|Top'
+        self.assertEqual(md[2].path, 'C|Top')
+        self.assertEqual(str(md[0]), "<MetricDataSingle: path='A|B|Calls', frequency='ONE_MIN', values=0>")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from appd.metric_index import path_matches
+from appd.model.metric_data import MetricData
+from appd.poller import MetricPoller
+from appd.request import AppDynamicsClient
+
+MIN = 60 * 1000
+PATHS = ['OAP|Calls per Minute', 'OAP|Errors per Minute']
+
+
+class FakeSeriesClient(AppDynamicsClient):
+    """
+    Serves one data point per minute for each path, up to and including the current minute.
+    """
+
+    def __init__(self, first_ms):
+        super(FakeSeriesClient, self).__init__()
+        self.first_ms, self.requests = first_ms, []
+
+    def get_metrics(self, metric_path, app_id=None, time_range_type='BEFORE_NOW', duration_in_mins=15,
+                    start_time=None, end_time=None, rollup=True):
+        self.requests.append((metric_path, time_range_type, start_time))
+        now = int(time.time() * 1000)
+        start = max(start_time, self.first_ms)
+        times = range(-(-start // MIN) * MIN, now + 1, MIN)
+        return MetricData.from_json([{'metricPath': p, 'frequency': 'ONE_MIN',
+                                      'metricValues': [{'current': 1, 'min': 1, 'max': 1, 'value': 1,
+                                                        'startTimeInMillis': t} for t in times]}
+                                     for p in PATHS if path_matches(metric_path, p)])
+
+
+class MetricPollerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.state = os.path.join(self.tmpdir, 'watermarks.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_only_new_points(self):
+        now = int(time.time() * 1000)
+        c = FakeSeriesClient(now - 30 * MIN)
+        poller = MetricPoller(c, ['OAP|*'], app_id=10, state_file=self.state, initial_mins=10)
+        first = poller.poll()
+        self.assertEqual(sorted(x.path for x in first), PATHS)
+        self.assertTrue(9 <= len(first[0].values) <= 10)
+        self.assertEqual(c.requests[0][:2], ('OAP|*', 'AFTER_TIME'))
+        last = first[0].values[-1].start_time_ms
+        self.assertLessEqual(last, now - MIN)
+        self.assertEqual(poller.watermarks[PATHS[0]], last)
+
+        # A restarted poller picks up from the saved watermarks and returns nothing it has already returned.
+        poller = MetricPoller(c, ['OAP|*'], app_id=10, state_file=self.state)
+        self.assertEqual(poller.watermarks[PATHS[0]], last)
+        second = poller.poll()
+        self.assertEqual(c.requests[-1][2], last + 1)
+        self.assertTrue(all(v.start_time_ms > last for md in second for v in md.values))
+
+    def test_stale_watermark_capped(self):
+        now = int(time.time() * 1000)
+        c = FakeSeriesClient(now - 30 * 24 * 60 * MIN)
+        poller = MetricPoller(c, ['OAP|*'], app_id=10, max_lookback_mins=20)
+        poller.watermarks = {PATHS[0]: now - 5 * MIN, 'OAP|Retired Node': now - 7 * 24 * 60 * MIN}
+        result = poller.poll()
+        self.assertGreaterEqual(c.requests[-1][2], now - 20 * MIN)
+        by_path = dict((x.path, x) for x in result)
+        self.assertTrue(len(by_path[PATHS[1]].values) <= 20)
+        self.assertTrue(all(v.start_time_ms > now - 5 * MIN for v in by_path[PATHS[0]].values))
+
+        # The next poll starts from the live series' watermarks rather than the retired one's.
+        poller.poll()
+        self.assertGreaterEqual(c.requests[-1][2], now - 3 * MIN)
+
+    def test_save_replaces_existing_file(self):
+        def rename(src, dst):
+            # Behave like os.rename on Windows, which refuses to overwrite a file.
+            if os.path.exists(dst):
+                raise OSError('file exists')
+            shutil.move(src, dst)
+
+        poller = MetricPoller(FakeSeriesClient(0), ['OAP|*'], app_id=10, state_file=self.state)
+        saved, os.rename = os.rename, rename
+        try:
+            for i in range(2):
+                poller.watermarks = {PATHS[0]: i}
+                poller.save()
+        finally:
+            os.rename = saved
+        self.assertEqual(MetricPoller(None, [], state_file=self.state).watermarks, {PATHS[0]: 1})
+        self.assertEqual(os.listdir(self.tmpdir), ['watermarks.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
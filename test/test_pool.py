@@ -0,0 +1,74 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import threading
+import time
+import unittest
+
+import requests
+
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+
+from appd.request import AppDynamicsClient
+
+APPS = b'[{"id": 1, "name": "a", "description": ""}]'
+
+
+class Handler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.connection_headers.append(self.headers.get('Connection'))
+        time.sleep(self.server.delay)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(APPS)))
+        self.end_headers()
+        self.wfile.write(APPS)
+
+    def log_message(self, *args):
+        pass
+
+
+class PooledHTTPAdapterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = HTTPServer(('127.0.0.1', 0), Handler)
+        self.server.connection_headers, self.server.delay = [], 0
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.base_url = 'http://127.0.0.1:{0}'.format(self.server.server_address[1])
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def test_connections_reused(self):
+        c = AppDynamicsClient(self.base_url)
+        for _ in range(3):
+            self.assertEqual(c.get_applications()[0].name, 'a')
+        stats = c.pool_stats
+        self.assertEqual((stats.requests, stats.opened, stats.reused, stats.waited), (3, 1, 2, 0))
+
+    def test_keep_alive_off(self):
+        c = AppDynamicsClient(self.base_url, keep_alive=False)
+        for _ in range(2):
+            c.get_applications()
+        self.assertEqual(self.server.connection_headers, ['close', 'close'])
+        self.assertEqual((c.pool_stats.opened, c.pool_stats.reused), (2, 0))
+
+    def test_timeout(self):
+        self.server.delay = 0.5
+        c = AppDynamicsClient(self.base_url, timeout=0.1)
+        self.assertRaises(requests.exceptions.Timeout, c.get_applications)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import unittest
+
+from appd.model.aggregate import Count
+from appd.model.node import Node, Nodes
+from appd.model.query import F, Query, version_tuple
+
+
+class QueryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.nodes = Nodes([Node(node_id=1, name='a', node_type='Tomcat 7', tier_name='web',
+                                 app_agent_version='4.10.0'),
+                            Node(node_id=2, name='b', node_type='Tomcat 7', tier_name='web',
+                                 app_agent_version='4.9.1'),
+                            Node(node_id=3, name='c', node_type='IIS', tier_name='web', app_agent_version=None),
+                            Node(node_id=4, name='d', node_type='Tomcat 7', tier_name='api',
+                                 app_agent_version='Server Agent v3.9.0.0 GA #1234')])
+
+    def ids(self, query):
+        return [x.id for x in query]
+
+    def test_where(self):
+        q = self.nodes.query()
+        self.assertEqual(self.ids(q.where(F('type') == 'Tomcat 7')), [1, 2, 4])
+        self.assertEqual(self.ids(q.where((F('type') == 'Tomcat 7') & ~(F('tier_name') == 'api'))), [1, 2])
+        self.assertEqual(self.ids(q.where((F('id') < 2) | (F('id') >= 4))), [1, 4])
+        self.assertEqual(self.ids(q.where(F('tier_name').isin(['api', 'db']))), [4])
+        self.assertEqual(self.ids(q.where(F('app_agent_version').is_null())), [3])
+        self.assertEqual(self.ids(q.where(F('app_agent_version') > '4')), [1, 2, 4])
+
+    def test_versions(self):
+        self.assertEqual(version_tuple('Server Agent v4.5.1.0 GA #2017'), (4, 5, 1, 0))
+        self.assertIsNone(version_tuple(None))
+        q = self.nodes.query().where((F('type') == 'Tomcat 7') & (F('app_agent_version').map(version_tuple) < (4, 10)))
+        self.assertEqual(self.ids(q), [2, 4])
+
+    def test_order_limit_select(self):
+        q = self.nodes.query().order_by('tier_name', '-id')
+        self.assertEqual(self.ids(q), [4, 3, 2, 1])
+        self.assertEqual(self.ids(self.nodes.query().order_by('app_agent_version')), [3, 1, 2, 4])
+        self.assertEqual(self.ids(self.nodes.query().order_by('-app_agent_version')), [3, 4, 2, 1])
+        self.assertEqual(self.ids(self.nodes.query().order_by('-type', 'id')), [1, 2, 4, 3])
+        self.assertEqual(q.limit(2).select('name', 'tier_name'), [{'name': 'd', 'tier_name': 'api'},
+                                                                  {'name': 'c', 'tier_name': 'web'}])
+        self.assertEqual(q.first().id, 4)
+        self.assertEqual(q.where(F('id') > 10).first(), None)
+
+    def test_results(self):
+        found = self.nodes.query().where(F('name').startswith('a')).all()
+        self.assertIsInstance(found, Nodes)
+        self.assertEqual(len(found), 1)
+        self.assertEqual(len(self.nodes), 4)
+        rows = self.nodes.query().select('id', 'type')
+        self.assertEqual(Query(rows).where(F('type').contains('IIS')).all(), [{'id': 3, 'type': 'IIS'}])
+        self.assertEqual(self.nodes.query().where(F('type') == 'Tomcat 7').group_by('tier_name', n=Count()),
+                         {'web': {'n': 2}, 'api': {'n': 1}})
+
+    def test_mask(self):
+        columns = {'id': [1, 2, 3], 'type': ['IIS', 'Tomcat 7', None]}
+        predicate = (F('id') > 1) & ~F('type').isin(['IIS'])
+        self.assertEqual(list(predicate.mask(columns)), [False, True, True])
+        self.assertEqual(list((F('type') < 'J').mask(columns)), [True, False, False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+from appd.ratelimit import TokenBucket, FileTokenBucket, RateLimiter
+
+
+class TokenBucketTest(unittest.TestCase):
+
+    def test_burst_then_wait(self):
+        bucket = TokenBucket(rate=10, capacity=2)
+        self.assertEqual(bucket.reserve(), 0)
+        self.assertEqual(bucket.reserve(), 0)
+        first, second = bucket.reserve(), bucket.reserve()
+        self.assertTrue(0.05 < first <= 0.1, first)
+        self.assertTrue(0.15 < second <= 0.2, second)
+
+    def test_shared_between_threads(self):
+        bucket = TokenBucket(rate=50, capacity=1)
+        start = time.time()
+        threads = [threading.Thread(target=bucket.acquire) for i in range(11)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertGreaterEqual(time.time() - start, 0.19)
+
+    @unittest.skipIf(os.name != 'posix', 'requires fcntl')
+    def test_file_bucket_shares_state(self):
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'bucket')
+            first, second = FileTokenBucket(path, rate=10, capacity=1), FileTokenBucket(path, rate=10, capacity=1)
+            self.assertEqual(first.reserve(), 0)
+            # Some time passes between the two calls, so the wait is a little under 0.1s.
+            wait = second.reserve()
+            self.assertTrue(0.05 < wait <= 0.1, wait)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_endpoint_classes(self):
+        metrics, default = TokenBucket(1), TokenBucket(1)
+        limiter = RateLimiter({'/metric-data': metrics, '/applications': TokenBucket(1)}, default=default)
+        self.assertIs(limiter.bucket_for('http://c/controller/rest/applications/1/metric-data'), metrics)
+        self.assertIs(limiter.bucket_for('http://c/api/accounts/myaccount'), default)
+        self.assertIsNone(RateLimiter().bucket_for('http://c/api/accounts/myaccount'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import unittest
+
+import requests
+
+from appd.request import AppDynamicsClient
+from appd.retry import RetryPolicy, CircuitBreaker, CircuitOpenError, parse_retry_after
+
+
+def make_response(status, body='[]', headers=None):
+    r = requests.Response()
+    r.status_code, r._content, r._content_consumed = status, body.encode('utf-8'), True
+    r.headers.update(headers or {})
+    return r
+
+
+class FakeSession(object):
+
+    def __init__(self, responses):
+        self.responses, self.calls, self.kwargs = list(responses), 0, None
+
+    def request(self, method, url, **kwargs):
+        self.calls, self.kwargs = self.calls + 1, kwargs
+        r = self.responses.pop(0)
+        if isinstance(r, Exception):
+            raise r
+        return r
+
+
+class RetryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.policy = RetryPolicy(max_retries=3, backoff_factor=0, jitter=False)
+        self.c = AppDynamicsClient(retry_policy=self.policy)
+
+    def test_retries_until_success(self):
+        self.c._session = FakeSession([make_response(503), requests.exceptions.ConnectionError(),
+                                       make_response(200, '[{"id": 1, "name": "a", "description": ""}]')])
+        apps = self.c.get_applications()
+        self.assertEqual(apps[0].name, 'a')
+        self.assertEqual(self.c.last_retries, 2)
+        self.assertEqual(self.policy.total_retries, 2)
+
+    def test_gives_up(self):
+        self.c._session = FakeSession([make_response(503)] * 4)
+        self.assertRaises(requests.exceptions.HTTPError, self.c.get_applications)
+        self.assertEqual(self.c._session.calls, 4)
+
+    def test_only_idempotent_methods(self):
+        self.c._session = FakeSession([make_response(503)])
+        self.assertRaises(requests.exceptions.HTTPError, self.c.request, '/controller/rest/x', method='POST')
+
+    def test_no_retry_on_client_error(self):
+        self.c._session = FakeSession([make_response(404)])
+        self.assertRaises(requests.exceptions.HTTPError, self.c.get_applications)
+        self.assertEqual(self.c.last_retries, 0)
+
+    def test_retry_after(self):
+        self.assertEqual(parse_retry_after('7'), 7.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertEqual(self.policy.delay(0, '2'), 2.0)
+
+    def test_circuit_breaker(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+        self.c.retry_policy = RetryPolicy(max_retries=0, circuit_breaker=breaker)
+        self.c._session = FakeSession([make_response(503)] * 2)
+        for i in range(2):
+            self.assertRaises(requests.exceptions.HTTPError, self.c.get_applications)
+        self.assertRaises(CircuitOpenError, self.c.get_applications)
+        self.assertEqual(self.c._session.calls, 2)
+
+        breaker.reset_timeout = 0
+        self.c._session = FakeSession([make_response(200)])
+        self.c.get_applications()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+if __name__ == '__main__':
+    unittest.main()
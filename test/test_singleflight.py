@@ -0,0 +1,103 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import threading
+import time
+import unittest
+
+from appd.cache import ResponseCache
+from appd.request import AppDynamicsClient
+from appd.retry import RetryPolicy
+from appd.singleflight import SingleFlight
+from test.test_retry import make_response
+
+
+class SlowSession(object):
+
+    def __init__(self, statuses=()):
+        self.calls, self.statuses = 0, list(statuses)
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        time.sleep(0.2)
+        return make_response(self.statuses.pop(0) if self.statuses else 200,
+                             '[{"id": 1, "name": "a", "description": ""}]')
+
+
+class SingleFlightTest(unittest.TestCase):
+
+    def run_threads(self, func, count=5):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(func())) for i in range(count)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_concurrent_calls_share_result(self):
+        flights, calls = SingleFlight(), []
+
+        def work():
+            calls.append(1)
+            time.sleep(0.1)
+            return len(calls)
+
+        results = self.run_threads(lambda: flights.do('k', work))
+        self.assertEqual(results, [1] * 5)
+        self.assertEqual(flights.shared, 4)
+        self.assertEqual(flights.do('k', work), 2)
+
+    def test_error_is_shared(self):
+        flights = SingleFlight()
+
+        def work():
+            time.sleep(0.1)
+            raise ValueError()
+
+        def call():
+            try:
+                flights.do('k', work)
+            except ValueError:
+                return 'raised'
+
+        self.assertEqual(self.run_threads(call), ['raised'] * 5)
+
+    def test_client(self):
+        c = AppDynamicsClient()
+        c._session = SlowSession()
+        results = self.run_threads(c.get_applications)
+        self.assertEqual(c._session.calls, 1)
+        self.assertEqual([r[0].name for r in results], ['a'] * 5)
+        self.assertEqual(len(set(id(r) for r in results)), 5)
+
+        c = AppDynamicsClient(coalesce=False)
+        c._session = SlowSession()
+        self.run_threads(c.get_applications)
+        self.assertEqual(c._session.calls, 5)
+
+    def test_retry_count_is_shared(self):
+        c = AppDynamicsClient(retry_policy=RetryPolicy(max_retries=3, backoff_factor=0, jitter=False))
+        c._session = SlowSession([503])
+
+        def call():
+            c.get_applications()
+            return c.last_retries
+
+        self.assertEqual(self.run_threads(call, 3), [1] * 3)
+        self.assertEqual(c._session.calls, 2)
+
+        c.cache = ResponseCache()
+        c._session = SlowSession([503])
+        c.get_applications()
+        self.assertEqual(c.last_retries, 1)
+        c.get_applications()
+        self.assertEqual(c.last_retries, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,46 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import json
+import os
+import unittest
+
+from appd.stream import iter_json_array, JsonArrayParser
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+
+
+class StreamTest(unittest.TestCase):
+
+    def chunked(self, doc, size):
+        return [doc[i:i + size] for i in range(0, len(doc), size)]
+
+    def test_fixtures(self):
+        for name in ('nodes.json', 'business_transactions.json', 'metric_tree_0.json'):
+            with open(os.path.join(DATA_DIR, name), 'rb') as f:
+                doc = f.read()
+            for size in (1, 17, 4096):
+                self.assertEqual(list(iter_json_array(self.chunked(doc, size))), json.loads(doc.decode('utf-8')))
+
+    def test_split_scalars_and_multibyte(self):
+        doc = json.dumps([12345, u'été', 1.5e10, [1, [2]], None], ensure_ascii=False).encode('utf-8')
+        self.assertEqual(list(iter_json_array(self.chunked(doc, 1))), json.loads(doc.decode('utf-8')))
+
+    def test_incremental(self):
+        parser = JsonArrayParser()
+        self.assertEqual(parser.feed(b'[{"a": 1}, {"a"'), [{'a': 1}])
+        self.assertEqual(parser.feed(b': 2}]'), [{'a': 2}])
+        self.assertEqual(parser.close(), [])
+
+    def test_errors(self):
+        self.assertRaises(ValueError, list, iter_json_array([b'{"a": 1}']))
+        self.assertRaises(ValueError, list, iter_json_array([b'[1, 2']))
+        self.assertEqual(list(iter_json_array([b' [ ] '])), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
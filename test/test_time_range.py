@@ -0,0 +1,75 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Unit tests for AppDynamics REST API
+"""
+
+import threading
+import unittest
+
+from appd.model.metric_data import MetricData
+from appd.request import AppDynamicsClient
+from appd.time import align_ts, split_time_range
+
+MIN = 60 * 1000
+HOUR = 60 * MIN
+
+
+def metric_data(path, times):
+    return MetricData.from_json([{'metricPath': path, 'frequency': 'ONE_MIN',
+                                  'metricValues': [{'current': t, 'min': t, 'max': t, 'value': t,
+                                                    'startTimeInMillis': t} for t in times]}])
+
+
+class FakeRangeClient(AppDynamicsClient):
+
+    def __init__(self):
+        super(FakeRangeClient, self).__init__()
+        self.windows = []
+        self._lock = threading.Lock()
+
+    def get_metrics(self, metric_path, app_id=None, time_range_type='BEFORE_NOW', duration_in_mins=15,
+                    start_time=None, end_time=None, rollup=True):
+        with self._lock:
+            self.windows.append((start_time, end_time))
+        # The controller includes the slice that starts at end_time.
+        return metric_data(metric_path, range(start_time, end_time + 1, MIN))
+
+
+class SplitTimeRangeTest(unittest.TestCase):
+
+    def test_align(self):
+        self.assertEqual(align_ts(HOUR + 90 * 1000), HOUR + MIN)
+        self.assertEqual(align_ts(HOUR + 90 * 1000, up=True), HOUR + 2 * MIN)
+        self.assertEqual(align_ts(HOUR + 5 * MIN, 'TEN_MIN'), HOUR)
+        self.assertEqual(align_ts(HOUR, 'SIXTY_MIN', up=True), HOUR)
+
+    def test_split(self):
+        self.assertEqual(split_time_range(HOUR + 1, 4 * HOUR - 1, window_mins=60),
+                         [(HOUR, 2 * HOUR), (2 * HOUR, 3 * HOUR), (3 * HOUR, 4 * HOUR)])
+        self.assertEqual(split_time_range(0, 30 * MIN, 'TEN_MIN', window_mins=25), [
+            (0, 20 * MIN), (20 * MIN, 30 * MIN)])
+        self.assertEqual(len(split_time_range(0, 30 * 24 * HOUR)), 30)
+        self.assertRaises(ValueError, split_time_range, 0, HOUR, 'FIVE_MIN')
+        self.assertRaises(ValueError, split_time_range, HOUR, 0)
+
+
+class StitchTest(unittest.TestCase):
+
+    def test_stitch(self):
+        data = MetricData.stitch([metric_data('a', [2 * MIN, 3 * MIN]), metric_data('b', [0]),
+                                  metric_data('a', [0, MIN, 2 * MIN])])
+        self.assertEqual([x.path for x in data], ['a', 'b'])
+        self.assertEqual([v.start_time_ms for v in data[0].values], [0, MIN, 2 * MIN, 3 * MIN])
+
+    def test_get_metrics_range(self):
+        c = FakeRangeClient()
+        data = c.get_metrics_range('a', HOUR, 5 * HOUR, 10, window_mins=60)
+        self.assertEqual(sorted(c.windows), [(HOUR * i, HOUR * (i + 1)) for i in range(1, 5)])
+        self.assertEqual(len(data), 1)
+        self.assertEqual([v.start_time_ms for v in data[0].values], list(range(HOUR, 5 * HOUR + 1, MIN)))
+
+
+if __name__ == '__main__':
+    unittest.main()